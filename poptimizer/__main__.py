@@ -17,6 +17,12 @@ def evolve() -> None:
     ev.evolve()
 
 
+def worker() -> None:
+    """Run evolution worker that re-evaluates organisms."""
+    ev = Evolution()
+    ev.work()
+
+
 def dividends(ticker: str) -> None:
     """Get dividends status."""
     div_status.dividends_validation(ticker)
@@ -40,6 +46,7 @@ if __name__ == "__main__":
     app = typer.Typer(help="Run poptimizer subcommands.", add_completion=False)
 
     app.command()(evolve)
+    app.command()(worker)
     app.command()(dividends)
     app.command()(optimize)
 
@@ -32,6 +32,9 @@ PORT_PATH = _root / "portfolio"
 # Путь к директории с логами
 LOG_PATH = _root / "logs"
 
+# Путь к директории с хранилищем данных для признаков
+FEATURES_PATH = _root / "features"
+
 # Конфигурация логгера
 logging.basicConfig(level=logging.INFO, handlers=get_handlers(LOG_PATH))
 
@@ -63,3 +66,7 @@ TRADING_INTERVAL = cast(int, _cfg.get("TRADING_INTERVAL", 1))
 START_EVOLVE_HOUR = cast(int, _cfg.get("START_EVOLVE_HOUR", 1))
 STOP_EVOLVE_HOUR = cast(int, _cfg.get("STOP_EVOLVE_HOUR", 1))
 OPTIMIZER = cast(str, _cfg.get("OPTIMIZER", "resample"))
+FORECAST_WORKERS = cast(int, _cfg.get("FORECAST_WORKERS", 0))
+EVOLVE_WORKERS = cast(int, _cfg.get("EVOLVE_WORKERS", 0))
+WORKER_THREADS = cast(int, _cfg.get("WORKER_THREADS", 1))
+SURROGATE_CANDIDATES = cast(int, _cfg.get("SURROGATE_CANDIDATES", 4))
@@ -0,0 +1,110 @@
+"""Хранение таблиц с растущей историей в виде годовых частей и хвоста.
+
+Данные за завершенные годы записываются в отдельные документы один раз, а ежедневное обновление
+перезаписывает только основной документ с данными последнего года. При чтении части объединяются без
+декодирования. Документы без частей читаются без изменений и разбиваются на части при следующем сохранении.
+"""
+from typing import Any, Final, Optional
+
+from motor import motor_asyncio
+from pymongo.collection import Collection
+
+from poptimizer.data.adapters import codec
+from poptimizer.shared import adapters, connections, domain
+
+# Поле основного документа с таблицей, ее столбцами и списком лет, сохраненных в отдельных документах
+DATA: Final = "data"
+_COLUMNS: Final = f"{DATA}.columns"
+CHUNKS: Final = "chunks"
+
+# Суффикс коллекции с частями таблиц
+CHUNKS_SUFFIX: Final = "_chunks"
+
+
+class ChunkedMapper(adapters.Mapper[adapters.EntityType]):
+    """Мэппер, сохраняющий таблицы заданных групп по частям.
+
+    Предполагается, что данные за завершенные годы не меняются при обновлении таблицы, поэтому
+    перезаписываются только части для лет, которые еще не были сохранены. При изменении столбцов таблицы
+    перезаписываются все части.
+    """
+
+    def __init__(  # type: ignore
+        self,
+        desc_list: tuple[adapters.Desc, ...],
+        factory: domain.AbstractFactory[adapters.EntityType],
+        groups: frozenset[str],
+        client: motor_asyncio.AsyncIOMotorClient = connections.MONGO_CLIENT,
+    ) -> None:
+        """Дополнительно сохраняет названия групп, таблицы которых хранятся по частям."""
+        super().__init__(desc_list, factory, client)
+        self._groups = groups
+
+    async def get_doc(self, id_: domain.ID, projection: Optional[dict[str, bool]] = None) -> domain.StateDict:
+        """Запрашивает документ по ID и присоединяет к таблице сохраненные части."""
+        doc = await super().get_doc(id_, projection)
+        if (years := doc.pop(CHUNKS, None)) is None:
+            return doc
+
+        collection, name = self._get_collection_and_id(id_)
+        chunks_ids = [_chunk_id(name, year) for year in years]
+        cursor = _chunks_collection(collection).find({"_id": {"$in": chunks_ids}})
+        chunks = {chunk["_id"]: chunk[DATA] for chunk in await cursor.to_list(length=None)}
+        doc[DATA] = codec.concat([*(chunks[chunk_id] for chunk_id in chunks_ids), doc[DATA]])
+
+        return doc
+
+    async def commit(
+        self,
+        entity: adapters.EntityType,
+    ) -> None:
+        """Записывает изменения, сохраняя данные за завершенные годы в отдельные документы."""
+        id_ = entity.id_
+        if id_.group not in self._groups:
+            await super().commit(entity)
+
+            return
+
+        if not (mongo_dict := self._encode(entity)):
+            return
+
+        self._logger(f"Сохранение {id_}")
+        collection, name = self._get_collection_and_id(id_)
+
+        if (table := mongo_dict.get(DATA)) is not None:
+            mongo_dict[DATA], chunks = _split_years(table)
+            stored = await collection.find_one({"_id": name}, projection={CHUNKS: True, _COLUMNS: True}) or {}
+            stored_years = set(stored.get(CHUNKS, ()))
+            if stored.get(DATA, {}).get("columns") != table["columns"]:
+                stored_years = set()
+            for year, chunk in chunks.items():
+                if year not in stored_years:
+                    await _chunks_collection(collection).replace_one(
+                        filter={"_id": _chunk_id(name, year)},
+                        replacement={DATA: chunk},
+                        upsert=True,
+                    )
+            mongo_dict[CHUNKS] = list(chunks)
+
+        await collection.replace_one(
+            filter={"_id": name},
+            replacement=dict(_id=name, **mongo_dict),
+            upsert=True,
+        )
+
+
+def _split_years(table: dict[str, Any]) -> tuple[dict[str, Any], dict[int, dict[str, Any]]]:
+    """Разбивает закодированную таблицу на хвост с данными последнего года и части по завершенным годам."""
+    years = codec.decode_index(table).year.tolist()
+    starts = [0, *(n_row for n_row in range(1, len(years)) if years[n_row] != years[n_row - 1])]
+    chunks = {years[start]: codec.rows(table, start, stop) for start, stop in zip(starts, starts[1:])}
+
+    return codec.rows(table, starts[-1], len(years)), chunks
+
+
+def _chunk_id(name: str, year: int) -> str:
+    return f"{name}_{year}"
+
+
+def _chunks_collection(collection: Collection) -> Collection:
+    return collection.database[f"{collection.name}{CHUNKS_SUFFIX}"]
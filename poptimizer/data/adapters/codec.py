@@ -0,0 +1,119 @@
+"""Колоночное двоичное кодирование таблиц для хранения в MongoDB.
+
+Индекс и столбцы с числовыми типами и датами хранятся в виде байтов массивов NumPy в порядке little-endian
+с описанием типа, а остальные — в виде списков значений. Документы в старом формате DataFrame.to_dict("split")
+читаются без изменений и перезаписываются в новом формате при следующем сохранении таблицы.
+"""
+from typing import Any, Final, Union
+
+import numpy as np
+import pandas as pd
+
+from poptimizer import config
+
+# Версия формата кодирования
+VERSION: Final = 1
+
+# Типы NumPy, хранимые в двоичном виде, — логические, числовые, интервалы времени и даты
+_BINARY_KINDS: Final = "biufmM"
+_OBJECT: Final = "object"
+
+
+class CodecError(config.POptimizerError):
+    """Неизвестная версия формата кодирования."""
+
+
+def encode(df: pd.DataFrame) -> dict[str, Any]:
+    """Кодирует DataFrame в документ MongoDB."""
+    return {
+        "version": VERSION,
+        "index": _encode_array(df.index),
+        "index_name": df.index.name,
+        "columns": df.columns.tolist(),
+        "columns_name": df.columns.name,
+        "data": [_encode_array(df.iloc[:, n_col]) for n_col in range(df.shape[1])],
+    }
+
+
+def decode(doc: dict[str, Any]) -> pd.DataFrame:
+    """Декодирует DataFrame из документа MongoDB в новом или старом формате."""
+    if (version := doc.get("version")) is None:
+        return pd.DataFrame(**doc)
+    if version != VERSION:
+        raise CodecError(version)
+
+    df = pd.DataFrame(
+        dict(enumerate(_decode_array(column) for column in doc["data"])),
+        index=decode_index(doc),
+    )
+    df.columns = pd.Index(doc["columns"], name=doc["columns_name"])
+
+    return df
+
+
+def decode_index(doc: dict[str, Any]) -> pd.Index:
+    """Декодирует только индекс таблицы."""
+    return pd.Index(_decode_array(doc["index"]), name=doc["index_name"])
+
+
+def rows(doc: dict[str, Any], start: int, stop: int) -> dict[str, Any]:
+    """Строки закодированной таблицы с номерами из полуинтервала [start, stop) без декодирования."""
+    return dict(
+        doc,
+        index=_slice_array(doc["index"], start, stop),
+        data=[_slice_array(column, start, stop) for column in doc["data"]],
+    )
+
+
+def concat(docs: list[dict[str, Any]]) -> dict[str, Any]:
+    """Объединяет закодированные таблицы по строкам.
+
+    Таблицы с одинаковыми столбцами и типами объединяются без декодирования, а остальные — через DataFrame.
+    """
+    first, *_ = docs
+    if any(doc["columns"] != first["columns"] or _dtypes(doc) != _dtypes(first) for doc in docs):
+        return encode(pd.concat([decode(doc) for doc in docs], axis=0))
+
+    return dict(
+        first,
+        index=_concat_arrays([doc["index"] for doc in docs]),
+        data=[_concat_arrays(list(columns)) for columns in zip(*(doc["data"] for doc in docs))],
+    )
+
+
+def _dtypes(doc: dict[str, Any]) -> list[str]:
+    return [doc["index"]["dtype"], *(column["dtype"] for column in doc["data"])]
+
+
+def _slice_array(column: dict[str, Any], start: int, stop: int) -> dict[str, Any]:
+    if (dtype := column["dtype"]) == _OBJECT:
+        return dict(column, values=column["values"][start:stop])
+
+    itemsize = np.dtype(dtype).itemsize
+
+    return dict(column, buffer=column["buffer"][start * itemsize : stop * itemsize])
+
+
+def _concat_arrays(columns: list[dict[str, Any]]) -> dict[str, Any]:
+    first, *_ = columns
+    if first["dtype"] == _OBJECT:
+        return dict(first, values=[value for column in columns for value in column["values"]])  # noqa: WPS110
+
+    return dict(first, buffer=b"".join(column["buffer"] for column in columns))
+
+
+def _encode_array(values: Union[pd.Index, pd.Series]) -> dict[str, Any]:
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in _BINARY_KINDS:
+        array = values.to_numpy().astype(dtype.newbyteorder("<"), copy=False)
+
+        return {"dtype": array.dtype.str, "buffer": array.tobytes()}
+
+    return {"dtype": _OBJECT, "values": values.tolist()}
+
+
+def _decode_array(column: dict[str, Any]) -> Union[np.ndarray, list[Any]]:
+    if (dtype := column["dtype"]) == _OBJECT:
+        return column["values"]
+
+    return np.frombuffer(column["buffer"], dtype=np.dtype(dtype))
@@ -5,10 +5,10 @@ import pathlib
 from typing import Final
 
 import aiohttp
-import pandas as pd
 import psutil
 from motor import motor_asyncio
 
+from poptimizer.data.adapters import codec
 from poptimizer.shared import adapters, connections
 
 # Путь к dump с данными по дивидендам
@@ -40,8 +40,8 @@ DATA_DESCRIPTION: Final = (
         field_name="_df",
         doc_name="data",
         factory_name="df",
-        encoder=lambda df: df.to_dict("split"),
-        decoder=lambda doc_df: pd.DataFrame(**doc_df),
+        encoder=codec.encode,
+        decoder=codec.decode,
     ),
     adapters.Desc(
         field_name="_timestamp",
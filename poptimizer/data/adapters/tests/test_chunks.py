@@ -0,0 +1,90 @@
+"""Тесты хранения таблиц по частям."""
+import pandas as pd
+import pytest
+
+from poptimizer.data.adapters import chunks, codec
+from poptimizer.shared import domain
+
+TEST_ID = domain.ID("data", "quotes", "AKRN")
+
+
+@pytest.fixture(name="df")
+def make_df():
+    """Таблица с данными за три года."""
+    index = pd.DatetimeIndex(["2019-12-30", "2020-06-01", "2020-12-30", "2021-01-04", "2021-01-05"], name="DATE")
+
+    return pd.DataFrame({"CLOSE": [1.0, 2.0, 3.0, 4.0, 5.0], "TICKER": list("abcde")}, index=index)
+
+
+@pytest.fixture(name="mapper")
+def create_mapper(mocker):
+    """Мэппер с фейковыми коллекциями основных документов и частей."""
+    mapper = chunks.ChunkedMapper((), mocker.MagicMock(), frozenset(("quotes",)), mocker.MagicMock())
+    collection = mocker.MagicMock()
+    collection.find_one = mocker.AsyncMock()
+    collection.replace_one = mocker.AsyncMock()
+    chunks_collection = collection.database.__getitem__.return_value
+    chunks_collection.replace_one = mocker.AsyncMock()
+    mocker.patch.object(mapper, "_get_collection_and_id", return_value=(collection, "AKRN"))
+
+    return mapper, collection, chunks_collection
+
+
+def test_split_years(df):
+    """Части за завершенные годы и хвост с последним годом."""
+    tail, years = chunks._split_years(codec.encode(df))
+
+    assert list(years) == [2019, 2020]
+    pd.testing.assert_frame_equal(codec.decode(years[2020]), df.iloc[1:3])
+    pd.testing.assert_frame_equal(codec.decode(tail), df.iloc[3:])
+
+
+@pytest.mark.asyncio
+async def test_commit_new_chunks_only(mocker, mapper, df):
+    """Сохраняются только части, которых еще нет, и основной документ с хвостом."""
+    mapper, collection, chunks_collection = mapper
+    mocker.patch.object(mapper, "_encode", return_value={"data": codec.encode(df), "timestamp": 1})
+    collection.find_one.return_value = {chunks.CHUNKS: [2019], "data": {"columns": ["CLOSE", "TICKER"]}}
+
+    await mapper.commit(mocker.Mock(id_=TEST_ID))
+
+    chunks_collection.replace_one.assert_called_once()
+    assert chunks_collection.replace_one.call_args.kwargs["filter"] == {"_id": "AKRN_2020"}
+    replacement = collection.replace_one.call_args.kwargs["replacement"]
+    assert replacement[chunks.CHUNKS] == [2019, 2020]
+    assert replacement["timestamp"] == 1
+    pd.testing.assert_frame_equal(codec.decode(replacement["data"]), df.iloc[3:])
+
+
+@pytest.mark.asyncio
+async def test_commit_rewrites_chunks_on_new_columns(mocker, mapper, df):
+    """При изменении столбцов перезаписываются все части."""
+    mapper, collection, chunks_collection = mapper
+    mocker.patch.object(mapper, "_encode", return_value={"data": codec.encode(df)})
+    collection.find_one.return_value = {chunks.CHUNKS: [2019, 2020], "data": {"columns": ["CLOSE"]}}
+
+    await mapper.commit(mocker.Mock(id_=TEST_ID))
+
+    assert chunks_collection.replace_one.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_doc_joins_chunks(mocker, mapper, df):
+    """Части присоединяются к хвосту в порядке лет."""
+    mapper, collection, chunks_collection = mapper
+    tail, years = chunks._split_years(codec.encode(df))
+    mocker.patch.object(
+        chunks.adapters.Mapper,
+        "get_doc",
+        mocker.AsyncMock(return_value={"data": tail, chunks.CHUNKS: [2019, 2020], "timestamp": 1}),
+    )
+    cursor = chunks_collection.find.return_value
+    cursor.to_list = mocker.AsyncMock(
+        return_value=[{"_id": f"AKRN_{year}", "data": chunk} for year, chunk in reversed(years.items())],
+    )
+
+    doc = await mapper.get_doc(TEST_ID)
+
+    assert doc["timestamp"] == 1
+    assert chunks.CHUNKS not in doc
+    pd.testing.assert_frame_equal(codec.decode(doc["data"]), df)
@@ -0,0 +1,68 @@
+"""Тесты колоночного кодирования таблиц."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from poptimizer.data.adapters import codec
+
+
+@pytest.fixture(name="df")
+def make_df():
+    """Таблица с датами в индексе и столбцами разных типов."""
+    index = pd.date_range("2021-03-01", periods=3, freq="D", name="DATE")
+    df = pd.DataFrame(
+        {
+            "CLOSE": [1.5, np.nan, 3.25],
+            "TURNOVER": [10, 20, 30],
+            "TICKER": ["AKRN", "GMKN", "MTSS"],
+            "ON": [True, False, True],
+        },
+        index=index,
+    )
+    df.columns.name = "FIELDS"
+
+    return df
+
+
+def test_round_trip(df):
+    """Числовые столбцы и индекс хранятся в двоичном виде и восстанавливаются без изменений."""
+    doc = codec.encode(df)
+
+    assert doc["version"] == codec.VERSION
+    assert isinstance(doc["index"]["buffer"], bytes)
+    assert isinstance(doc["data"][0]["buffer"], bytes)
+    assert doc["data"][2]["values"] == ["AKRN", "GMKN", "MTSS"]
+
+    pd.testing.assert_frame_equal(codec.decode(doc), df, check_freq=False)
+
+
+def test_decode_old_format(df):
+    """Документы в старом формате читаются без изменений."""
+    df_data = {"index": [5], "columns": [6], "data": [[7]]}
+
+    pd.testing.assert_frame_equal(codec.decode(df_data), pd.DataFrame(**df_data))
+
+
+def test_decode_unknown_version(df):
+    """Ошибка при неизвестной версии формата."""
+    doc = dict(codec.encode(df), version=codec.VERSION + 1)
+
+    with pytest.raises(codec.CodecError):
+        codec.decode(doc)
+
+
+def test_rows_and_concat(df):
+    """Части закодированной таблицы объединяются в исходную таблицу."""
+    doc = codec.encode(df)
+    parts = [codec.rows(doc, 0, 1), codec.rows(doc, 1, 3)]
+
+    pd.testing.assert_frame_equal(codec.decode(parts[1]), df.iloc[1:], check_freq=False)
+    pd.testing.assert_frame_equal(codec.decode(codec.concat(parts)), df, check_freq=False)
+
+
+def test_concat_different_dtypes(df):
+    """Таблицы с разными типами столбцов объединяются через декодирование."""
+    other = df.iloc[2:].astype({"TURNOVER": float})
+    doc = codec.concat([codec.encode(df.iloc[:2]), codec.encode(other)])
+
+    pd.testing.assert_frame_equal(codec.decode(doc), pd.concat([df.iloc[:2], other]), check_freq=False)
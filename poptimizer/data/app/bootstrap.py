@@ -2,11 +2,12 @@
 import datetime
 from typing import Final, Tuple
 
-from poptimizer.data.adapters import odm
+from poptimizer.data import ports
+from poptimizer.data.adapters import chunks, odm
 from poptimizer.data.app import viewers
 from poptimizer.data.domain import events, factory, handlers
 from poptimizer.data.domain.tables import base
-from poptimizer.shared import adapters, app, domain
+from poptimizer.shared import app, domain
 
 # Параметры представления конечных данных
 # До 2015 года не у всех бумаг был режим T+2
@@ -14,6 +15,9 @@ from poptimizer.shared import adapters, app, domain
 _START_YEAR = 2015
 START_DATE: Final = datetime.date(_START_YEAR, 1, 1)
 
+# Группы таблиц с растущей историей, которые хранятся по частям
+CHUNKED_GROUPS: Final = frozenset((ports.QUOTES, ports.QUOTES_PANEL))
+
 # Параметры налогов
 TAX: Final = 0.13
 AFTER_TAX: Final = 1 - TAX
@@ -32,7 +36,7 @@ def start_app() -> Tuple[TableBus, viewers.Viewer]:
 
     Инициируется обработка сообщения начала работы приложения.
     """
-    mapper = adapters.Mapper(odm.DATA_DESCRIPTION, factory.TablesFactory())
+    mapper = chunks.ChunkedMapper(odm.DATA_DESCRIPTION, factory.TablesFactory(), CHUNKED_GROUPS)
 
     bus = app.EventBus(
         lambda: app.UoW(mapper),
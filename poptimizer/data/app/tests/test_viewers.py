@@ -29,6 +29,29 @@ async def test_query(mocker):
     pd.testing.assert_frame_equal(df, pd.DataFrame(**df_data))
 
 
+@pytest.mark.asyncio
+async def test_query_cache(mocker):
+    """Таблица из кеша выдается в виде копии, пока не изменится время ее обновления."""
+    fake_mapper = mocker.AsyncMock()
+    df_data = {"index": [5], "columns": [6], "data": [[7]]}
+    fake_mapper.get_doc.side_effect = [
+        {"data": df_data, "timestamp": 1},
+        {"timestamp": 1},
+        {"timestamp": 2},
+        {"data": {"index": [5], "columns": [6], "data": [[8]]}, "timestamp": 2},
+    ]
+    viewer = viewers.Viewer(fake_mapper)
+
+    df = await viewer._query("", "")
+    df.iloc[0, 0] = 0
+    cached = await viewer._query("", "")
+
+    pd.testing.assert_frame_equal(cached, pd.DataFrame(**df_data))
+    assert fake_mapper.get_doc.call_args.args[1] == {"timestamp": True}
+    assert (await viewer._query("", "")).iloc[0, 0] == 8
+    assert fake_mapper.get_doc.call_count == 4
+
+
 def test_get_df(mocker):
     """Для получения DataFrame осуществляется вызов запроса с правильными параметрами."""
     fake_query = mocker.AsyncMock()
@@ -54,3 +77,13 @@ def test_get_dfs(mocker):
             mocker.call("a", "c"),
         ],
     )
+
+
+def test_get_timestamps(mocker):
+    """Загружаются только времена обновления таблиц."""
+    fake_mapper = mocker.AsyncMock()
+    fake_mapper.get_doc.side_effect = [{"timestamp": 1}, {}]
+    viewer = viewers.Viewer(fake_mapper)
+
+    assert viewer.get_timestamps("a", ("b", "c")) == [1, None]
+    fake_mapper.get_doc.assert_called_with(viewers.base.create_id("a", "c"), {"timestamp": True})
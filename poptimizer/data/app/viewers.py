@@ -1,25 +1,38 @@
 """Показывает данные из таблиц."""
 import asyncio
-from typing import List, Tuple
+import collections
+from datetime import datetime
+from typing import Final, List, Optional, Tuple
 
 import pandas as pd
 
 from poptimizer import config
+from poptimizer.data.adapters import codec
 from poptimizer.data.domain.tables import base
 from poptimizer.shared import adapters, domain
 
+# Поле документа со временем последнего обновления таблицы
+TIMESTAMP: Final = "timestamp"
+
+# Количество таблиц в кеше — с запасом больше количества таблиц с котировками и дивидендами всех бумаг
+CACHE_SIZE: Final = 1024
+
 
 class NoDFError(config.POptimizerError):
     """Данные отсутствуют."""
 
 
 class Viewer:
-    """Показывает данные из таблиц."""
+    """Показывает данные из таблиц.
+
+    Загруженные таблицы хранятся в ограниченном по размеру кеше и выдаются в виде копий.
+    """
 
     def __init__(self, mapper: adapters.Mapper[base.AbstractTable[domain.AbstractEvent]]) -> None:
-        """Сохраняет ссылку на mapper."""
+        """Сохраняет ссылку на mapper и создает кеш таблиц."""
         self._mapper = mapper
         self._loop = asyncio.get_event_loop()
+        self._cache: collections.OrderedDict[domain.ID, tuple[datetime, pd.DataFrame]] = collections.OrderedDict()
 
     def get_df(
         self,
@@ -38,16 +51,48 @@ class Viewer:
         tasks = [self._query(group, name) for name in names]
         return self._loop.run_until_complete(asyncio.gather(*tasks))
 
+    def get_timestamps(
+        self,
+        group: str,
+        names: Tuple[str, ...],
+    ) -> List[Optional[datetime]]:
+        """Возвращает время последнего обновления нескольких таблиц из одной группы без загрузки данных."""
+        projection = {TIMESTAMP: True}
+        tasks = [self._mapper.get_doc(base.create_id(group, name), projection) for name in names]
+        docs = self._loop.run_until_complete(asyncio.gather(*tasks))
+        return [doc.get(TIMESTAMP) for doc in docs]
+
     async def _query(
         self,
         group: str,
         name: str,
     ) -> pd.DataFrame:
-        """Выполняет асинхронный запрос."""
+        """Выполняет асинхронный запрос.
+
+        Таблица из кеша используется, если время ее обновления совпадает с сохраненным в MongoDB, которое
+        запрашивается без загрузки данных.
+        """
         id_ = base.create_id(group, name)
+        cache = self._cache
+
+        if (cached := cache.get(id_)) is not None:
+            timestamp_doc = await self._mapper.get_doc(id_, {TIMESTAMP: True})
+            timestamp, df = cached
+            if timestamp == timestamp_doc.get(TIMESTAMP):
+                cache.move_to_end(id_)
+                return df.copy()
+
         doc = await self._mapper.get_doc(id_)
 
         if (df_data := doc.get("data")) is None:
+            cache.pop(id_, None)
             raise NoDFError(group, name)
 
-        return pd.DataFrame(**df_data)
+        df = codec.decode(df_data)
+        if (timestamp := doc.get(TIMESTAMP)) is not None:
+            cache[id_] = (timestamp, df)
+            cache.move_to_end(id_)
+            if len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+
+        return df.copy()
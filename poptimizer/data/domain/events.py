@@ -28,6 +28,17 @@ class TradingDayEnded(domain.AbstractEvent):
     date: datetime.date
 
 
+@dataclasses.dataclass(frozen=True)
+class QuotesPanelRequired(domain.BarrierEvent):
+    """Котировки всех бумаг обновлены по итогам торгового дня и нужно обновить панели котировок.
+
+    Котировки добавляются обработчиком события перед обновлением панелей.
+    """
+
+    date: datetime.date
+    quotes: Optional[dict[str, pd.DataFrame]] = dataclasses.field(default=None, repr=False)
+
+
 @dataclasses.dataclass(frozen=True)
 class USDUpdated(domain.AbstractEvent):
     """Произошло обновление курса."""
@@ -11,6 +11,7 @@ from poptimizer.data.domain.tables import (  # noqa: WPS235
     cpi,
     dividends,
     indexes,
+    panel,
     quotes,
     securities,
     trading_dates,
@@ -28,6 +29,7 @@ _TABLE_TYPES: Final = cast(
         trading_dates.TradingDates,
         securities.Securities,
         quotes.Quotes,
+        panel.QuotesPanel,
         indexes.Indexes,
         cpi.CPI,
         cbr.RF,
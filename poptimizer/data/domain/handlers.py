@@ -3,6 +3,7 @@ import asyncio
 import dataclasses
 import functools
 import itertools
+from typing import Final
 
 from poptimizer import config
 from poptimizer.data import ports
@@ -11,6 +12,10 @@ from poptimizer.data.domain.tables import base
 from poptimizer.shared import col, domain
 
 
+# Поля котировок, для которых ведутся панели
+_PANEL_FIELDS: Final = (col.CLOSE, col.OPEN, col.HIGH, col.LOW, col.TURNOVER)
+
+
 class UnknownEventError(config.POptimizerError):
     """Для события не зарегистрирован обработчик."""
 
@@ -67,6 +72,7 @@ class EventHandlersDispatcher(domain.AbstractHandler[AnyTable]):  # noqa: WPS214
             events.IndexCalculated("IMOEX", event.date),
             events.IndexCalculated("RVI", event.date),
             *itertools.chain.from_iterable(await asyncio.gather(*aws)),
+            events.QuotesPanelRequired(event.date),
         ]
 
     @handle_event.register
@@ -91,6 +97,26 @@ class EventHandlersDispatcher(domain.AbstractHandler[AnyTable]):  # noqa: WPS214
         aws = [_load_by_id_and_handle_event(repo, id_, event) for id_ in table_ids]
         return list(itertools.chain.from_iterable(await asyncio.gather(*aws)))
 
+    @handle_event.register
+    async def quotes_panel_required(
+        self,
+        event: events.QuotesPanelRequired,
+        repo: AnyTableRepo,
+    ) -> list[domain.AbstractEvent]:
+        """Обновляет панели котировок по данным всех бумаг с котировками."""
+        securities = await repo(base.create_id(ports.SECURITIES))
+        tickers = securities.df.index
+        tables = await asyncio.gather(*[repo(base.create_id(ports.QUOTES, ticker)) for ticker in tickers])
+
+        enriched_event = dataclasses.replace(
+            event,
+            quotes={ticker: table.df for ticker, table in zip(tickers, tables) if table.has_df},
+        )
+
+        table_ids = [base.create_id(ports.QUOTES_PANEL, field) for field in _PANEL_FIELDS]
+        aws = [_load_by_id_and_handle_event(repo, id_, enriched_event) for id_ in table_ids]
+        return list(itertools.chain.from_iterable(await asyncio.gather(*aws)))
+
     @handle_event.register
     async def index_calculated(
         self,
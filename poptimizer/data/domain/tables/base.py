@@ -53,6 +53,11 @@ class AbstractTable(Generic[Event], domain.BaseEntity):
         self._timestamp = timestamp
         self._df_lock = asyncio.Lock()
 
+    @property
+    def has_df(self) -> bool:
+        """Загружены ли данные."""
+        return self._df is not None
+
     @property
     def df(self) -> pd.DataFrame:
         """Копия данных."""
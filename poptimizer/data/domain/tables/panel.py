@@ -0,0 +1,61 @@
+"""Панели котировок всех бумаг, выровненные по датам."""
+from typing import ClassVar, List
+
+import pandas as pd
+
+from poptimizer.data import ports
+from poptimizer.data.domain import events
+from poptimizer.data.domain.tables import base
+from poptimizer.shared import domain
+
+
+class QuotesPanel(base.AbstractTable[events.QuotesPanelRequired]):
+    """Таблица с одним из полей котировок (ценой или оборотом) всех бумаг с датами в строках и тикерами в столбцах.
+
+    Название таблицы совпадает с названием поля котировок. При обновлении перезаписываются данные начиная с
+    последней даты панели, а для новых тикеров добавляется вся история. Данные тикеров, исключенных из
+    перечня бумаг, сохраняются.
+    """
+
+    group: ClassVar[ports.GroupName] = ports.QUOTES_PANEL
+
+    def _update_cond(self, event: events.QuotesPanelRequired) -> bool:
+        """Если панели нет или в ней нет данных за дату события."""
+        if (df := self._df) is None:
+            return True
+
+        return df.empty or df.index[-1] < pd.Timestamp(event.date)
+
+    async def _prepare_df(self, event: events.QuotesPanelRequired) -> pd.DataFrame:
+        """Присоединяет к панели новые данные."""
+        field = self.id_.name
+        quotes = event.quotes or {}
+
+        if (df := self._df) is None or df.empty:
+            return _align({ticker: quote[field] for ticker, quote in quotes.items()})
+
+        new_tickers = [ticker for ticker in quotes if ticker not in df.columns]
+        start = df.index[-1]
+        tail = _align({ticker: quote[field].loc[start:] for ticker, quote in quotes.items()})
+        df = pd.concat([df.iloc[:-1], tail.combine_first(df.iloc[-1:])], axis=0)
+
+        if new_tickers:
+            df = df.combine_first(_align({ticker: quotes[ticker][field] for ticker in new_tickers}))
+
+        return df
+
+    def _validate_new_df(self, df_new: pd.DataFrame) -> None:
+        """Индекс должен быть уникальным и возрастающим."""
+        base.check_unique_increasing_index(df_new)
+
+    def _new_events(self, event: events.QuotesPanelRequired) -> List[domain.AbstractEvent]:
+        """Обновление панели не порождает события."""
+        return []
+
+
+def _align(columns: dict[str, pd.Series]) -> pd.DataFrame:
+    """Выравнивает данные тикеров по датам."""
+    if not columns:
+        return pd.DataFrame(index=pd.DatetimeIndex([]))
+
+    return pd.concat(columns, axis=1).sort_index()
@@ -72,9 +72,16 @@ class Quotes(base.AbstractTable[events.TickerTraded]):
         )
 
     def _validate_new_df(self, df_new: pd.DataFrame) -> None:
-        """Индекс должен быть уникальным и возрастающим, а данные стыковаться."""
+        """Индекс должен быть уникальным и возрастающим, а данные стыковаться.
+
+        Все строки старых данных, кроме последней, переносятся в новые без изменений, поэтому проверяется
+        только стыковка по последней строке.
+        """
         base.check_unique_increasing_index(df_new)
-        base.check_dfs_mismatch(self.id_, self._df, df_new)
+        df_old = self._df
+        if df_old is not None:
+            df_old = df_old.iloc[-1:]
+        base.check_dfs_mismatch(self.id_, df_old, df_new)
 
     def _new_events(self, event: events.TickerTraded) -> List[domain.AbstractEvent]:
         """Обновление котировок не порождает события."""
@@ -0,0 +1,72 @@
+"""Тесты для панелей котировок."""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from poptimizer.data import ports
+from poptimizer.data.domain import events
+from poptimizer.data.domain.tables import base, panel
+from poptimizer.shared import col
+
+DATES = pd.DatetimeIndex(["2020-12-14", "2020-12-15", "2020-12-16"], name=col.DATE)
+
+
+def make_quotes(ticker_values: dict[str, list[float]]) -> dict[str, pd.DataFrame]:
+    """Котировки тикеров, заканчивающиеся последней датой."""
+    return {
+        ticker: pd.DataFrame({col.CLOSE: close_values}, index=DATES[-len(close_values) :])
+        for ticker, close_values in ticker_values.items()
+    }
+
+
+@pytest.fixture(scope="function", name="table")
+def create_table():
+    """Создает пустую таблицу для тестов."""
+    id_ = base.create_id(ports.QUOTES_PANEL, col.CLOSE)
+    return panel.QuotesPanel(id_)
+
+
+def test_update_cond(table):
+    """Обновление происходит при отсутствии панели или данных за дату события."""
+    event = events.QuotesPanelRequired(date(2020, 12, 15))
+    assert table._update_cond(event)
+
+    table._df = pd.DataFrame({"AKRN": [1.0, 2.0]}, index=DATES[:2])
+    assert not table._update_cond(event)
+    assert table._update_cond(events.QuotesPanelRequired(date(2020, 12, 16)))
+
+
+@pytest.mark.asyncio
+async def test_prepare_df_for_new_table(table):
+    """Котировки выравниваются по датам."""
+    event = events.QuotesPanelRequired(date(2020, 12, 16), make_quotes({"AKRN": [1.0, 2.0, 3.0], "GMKN": [4.0, 5.0]}))
+
+    df = await table._prepare_df(event)
+
+    pd.testing.assert_frame_equal(
+        df,
+        pd.DataFrame({"AKRN": [1, 2, 3], "GMKN": [None, 4, 5]}, index=DATES, dtype=float),
+        check_freq=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_prepare_df_for_update_table(table):
+    """Последняя дата перезаписывается, новые тикеры добавляются с историей, а исключенные сохраняются."""
+    table._df = pd.DataFrame({"AKRN": [1.0, 0.0], "MSTT": [7.0, 8.0]}, index=DATES[:2])
+    event = events.QuotesPanelRequired(date(2020, 12, 16), make_quotes({"AKRN": [1, 2, 3], "GMKN": [4, 5, 6]}))
+
+    df = await table._prepare_df(event)
+
+    pd.testing.assert_frame_equal(
+        df,
+        pd.DataFrame(
+            {"AKRN": [1, 2, 3], "GMKN": [4, 5, 6], "MSTT": [7, 8, None]},
+            index=DATES,
+            dtype=float,
+        ),
+        check_names=False,
+        check_freq=False,
+        check_like=True,
+    )
@@ -166,6 +166,16 @@ def test_validate_new_df(table, mocker):
     base.check_dfs_mismatch.assert_called_once_with(table.id_, None, mocker.sentinel)
 
 
+def test_validate_new_df_last_row(table):
+    """Стыковка проверяется по последней строке старых данных."""
+    table._df = pd.DataFrame([[1, 1], [2, 2]], index=pd.Index([1, 2], name=col.DATE), columns=COLUMNS)
+
+    table._validate_new_df(pd.DataFrame([[3, 3], [2, 2], [4, 4]], index=[0, 2, 3], columns=COLUMNS))
+
+    with pytest.raises(base.TableNewDataMismatchError):
+        table._validate_new_df(pd.DataFrame([[1, 1], [5, 5]], index=[1, 2], columns=COLUMNS))
+
+
 def test_new_events(table):
     """Не возвращает новых событий."""
     new_events = table._new_events(object())
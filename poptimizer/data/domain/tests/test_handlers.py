@@ -74,6 +74,7 @@ async def test_trading_day_ended(mocker):
         "b",
         "c",
         "usd",
+        events.QuotesPanelRequired(event.date),
     ]
 
 
@@ -121,6 +122,25 @@ async def test_ticker_traded(mocker):
     )
 
 
+@pytest.mark.asyncio
+async def test_quotes_panel_required(mocker):
+    """Панели обновляются по котировкам всех бумаг, для которых они есть."""
+    dispatcher = handlers.EventHandlersDispatcher()
+    event = events.QuotesPanelRequired(date(2020, 12, 22))
+    securities = mocker.Mock(df=pd.DataFrame(index=["AKRN", "GMKN"]))
+    akrn = mocker.Mock(has_df=True)
+    gmkn = mocker.Mock(has_df=False)
+    fake_repo = mocker.AsyncMock(side_effect=[securities, akrn, gmkn])
+    fake_loader_and_handler = mocker.patch.object(handlers, "_load_by_id_and_handle_event", return_value=["a"])
+
+    assert await dispatcher.handle_event(event, fake_repo) == ["a"] * 5
+
+    (_, table_id, enriched_event), _ = fake_loader_and_handler.call_args
+    assert table_id == base.create_id(ports.QUOTES_PANEL, "TURNOVER")
+    assert enriched_event.date == event.date
+    assert enriched_event.quotes == {"AKRN": akrn.df}
+
+
 @pytest.mark.asyncio
 async def test_index_calculated(mocker):
     """Требуется обновить таблицу с индексом."""
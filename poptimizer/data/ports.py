@@ -10,6 +10,7 @@ RF: Final = "risk_free"
 SECURITIES: Final = "securities"
 INDEX: Final = "indexes"
 QUOTES: Final = "quotes"
+QUOTES_PANEL: Final = "quotes_panel"
 USD: Final = "usd"
 
 GroupName = Literal[
@@ -22,5 +23,6 @@ GroupName = Literal[
     "securities",
     "indexes",
     "quotes",
+    "quotes_panel",
     "usd",
 ]
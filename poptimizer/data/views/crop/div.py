@@ -1,5 +1,6 @@
 """Обрезка данных для различных источников по дивидендам."""
-from typing import Tuple
+from datetime import datetime
+from typing import Optional, Tuple
 
 import pandas as pd
 
@@ -25,6 +26,14 @@ def dividends(
     return df.loc[bootstrap.START_DATE :]  # type: ignore
 
 
+def timestamps(
+    tickers: Tuple[str, ...],
+    viewer: viewers.Viewer = bootstrap.VIEWER,
+) -> Tuple[Optional[datetime], ...]:
+    """Время последнего обновления таблиц с дивидендами для заданных тикеров."""
+    return tuple(viewer.get_timestamps(ports.DIVIDENDS, tickers))
+
+
 def dividends_all(
     tickers: Tuple[str, ...],
     viewer: viewers.Viewer = bootstrap.VIEWER,
@@ -1,10 +1,20 @@
 """Обрезка данных для различных источников кроме дивидендов."""
+from datetime import datetime
+from typing import Optional
+
 import pandas as pd
 
 from poptimizer.data import ports
 from poptimizer.data.app import bootstrap, viewers
 from poptimizer.shared import col
 
+# Группы и названия таблиц с рыночными данными, общими для всех тикеров
+_MARKET_TABLES = (
+    (ports.INDEX, ("MCFTRR", "MEOGTRR", "IMOEX", "RVI")),
+    (ports.USD, (ports.USD,)),
+    (ports.QUOTES_PANEL, (col.CLOSE, col.OPEN, col.HIGH, col.LOW, col.TURNOVER)),
+)
+
 
 def cpi(viewer: viewers.Viewer = bootstrap.VIEWER) -> pd.Series:
     """Потребительская инфляция."""
@@ -35,3 +45,24 @@ def quotes(
     dfs = viewer.get_dfs(ports.QUOTES, tickers)
     start_date = bootstrap.START_DATE
     return [df.loc[start_date:] for df in dfs]  # type: ignore
+
+
+def quotes_panel(
+    field: str,
+    viewer: viewers.Viewer = bootstrap.VIEWER,
+) -> pd.DataFrame:
+    """Панель с одним из полей котировок всех бумаг."""
+    df = viewer.get_df(ports.QUOTES_PANEL, field)
+    return df.loc[bootstrap.START_DATE :]  # type: ignore
+
+
+def timestamps(
+    tickers: tuple[str, ...],
+    viewer: viewers.Viewer = bootstrap.VIEWER,
+) -> tuple[Optional[datetime], ...]:
+    """Время последнего обновления таблиц с котировками заданных тикеров и таблиц с рыночными данными."""
+    table_timestamps = viewer.get_timestamps(ports.QUOTES, tickers)
+    for group, names in _MARKET_TABLES:
+        table_timestamps.extend(viewer.get_timestamps(group, names))
+
+    return tuple(table_timestamps)
@@ -95,3 +95,16 @@ def test_quotes(tickers, pos, loc, quote):
     columns = [col.OPEN, col.CLOSE, col.HIGH, col.LOW, col.TURNOVER]
     assert df.columns.tolist() == columns
     assert df.loc[loc] == pytest.approx(quote)
+
+
+def test_timestamps(mocker):
+    """Время обновления котировок тикеров дополняется временем обновления рыночных таблиц."""
+    viewer = mocker.Mock()
+    viewer.get_timestamps.side_effect = lambda group, names: [f"{group}/{name}" for name in names]
+
+    timestamps = not_div.timestamps(("AKRN", "GAZP"), viewer)
+
+    assert timestamps[:2] == ("quotes/AKRN", "quotes/GAZP")
+    assert "indexes/MCFTRR" in timestamps
+    assert "usd/usd" in timestamps
+    assert f"quotes_panel/{col.TURNOVER}" in timestamps
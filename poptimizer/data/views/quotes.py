@@ -1,10 +1,12 @@
 """Функции предоставления данных о котировках."""
+import datetime
 import functools
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-from pandas.tseries import offsets
 
+from poptimizer.data.app import viewers
 from poptimizer.data.views.crop import div, not_div
 from poptimizer.shared import col
 
@@ -36,12 +38,8 @@ def prices(
 
 
 def all_prices(tickers: tuple[str, ...], price_type: col.PriceType = col.CLOSE) -> pd.DataFrame:
-    quotes_list = not_div.quotes(tickers)
-
-    return pd.concat(
-        [df[price_type] for df in quotes_list],
-        axis=1,
-    )
+    """Дневные цены для указанных тикеров с пропусками для дней без торгов."""
+    return _panel(tickers, price_type)
 
 
 @functools.lru_cache(maxsize=1)
@@ -57,31 +55,54 @@ def turnovers(tickers: tuple[str, ...], last_date: pd.Timestamp) -> pd.DataFrame
     :return:
         Обороты.
     """
-    quotes_list = not_div.quotes(tickers)
-    df = pd.concat(
-        [df[col.TURNOVER] for df in quotes_list],
-        axis=1,
-    )
+    df = _panel(tickers, col.TURNOVER)
     df = df.loc[:last_date]
     df.columns = tickers
     return df.fillna(0, axis=0)
 
 
-def _t2_shift(date: pd.Timestamp, index: pd.DatetimeIndex) -> pd.Timestamp:
-    """Рассчитывает эксдивидендную дату для режима T-2 на основании даты закрытия реестра.
+def _panel(tickers: tuple[str, ...], field: str) -> pd.DataFrame:
+    """Данные для указанных тикеров из панели котировок, выровненные по дням торгов хотя бы одного из них.
+
+    Данные тикеров, отсутствующих в панели, или всех тикеров до первого создания панели загружаются из
+    таблиц с котировками.
+    """
+    try:
+        panel = not_div.quotes_panel(field)
+    except viewers.NoDFError:
+        panel = pd.DataFrame()
+
+    present = [ticker for ticker in tickers if ticker in panel.columns]
+    missing = tuple(ticker for ticker in tickers if ticker not in panel.columns)
+    frames = [df[field].rename(ticker) for ticker, df in zip(missing, not_div.quotes(missing))]
+    if present:
+        frames.append(panel[present].dropna(how="all"))
+
+    return pd.concat(frames, axis=1)[list(tickers)]
+
+
+def _t2_shift(dates: pd.DatetimeIndex, index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Рассчитывает эксдивидендные даты для режима T-2 на основании дат закрытия реестра.
 
     Если дата не содержится в индексе цен, то необходимо найти предыдущую из индекса цен. После этого
-    взять сдвинутую на 1 назад дату.
+    взять сдвинутую на 1 назад дату. Для дат, у которых нет предыдущей даты в индексе цен, возвращается NaT.
 
     Если дата находится в будущем за пределом истории котировок, то нужно сдвинуть на 1 бизнес день
     вперед и на два назад. Это не эквивалентно сдвигу на один день назад для выходных.
     """
-    if date <= index[-1]:
-        position = index.get_loc(date, "ffill")
-        return index[position - 1]
+    positions = index.searchsorted(dates, side="right") - 2
+    in_history = dates <= index[-1]
+
+    shifted = np.busday_offset(dates.values.astype("datetime64[D]"), -1, roll="backward").astype(index.dtype)
+    shifted[in_history] = index.values[np.maximum(positions[in_history], 0)]
+    shifted[in_history & (positions < 0)] = np.datetime64("NaT")
 
-    next_b_day = date + offsets.BDay()
-    return next_b_day - 2 * offsets.BDay()
+    return pd.DatetimeIndex(shifted)
+
+
+def timestamps(tickers: tuple[str, ...]) -> tuple[Optional[datetime.datetime], ...]:
+    """Время последнего обновления таблиц с котировками, дивидендами и рыночными данными для тикеров."""
+    return div.timestamps(tickers) + not_div.timestamps(tickers)
 
 
 def div_and_prices(
@@ -93,12 +114,22 @@ def div_and_prices(
     Дивиденды на эксдивидендную дату нужны для корректного расчета доходности. Также для многих
     расчетов удобна привязка к торговым дням, а отсечки часто приходятся на выходные.
 
-    Данные обрезаются с учетом установки о начале статистики.
+    Данные обрезаются с учетом установки о начале статистики и кешируются до изменения таблиц с дивидендами.
     """
+    return _div_and_prices(tickers, last_date, div.timestamps(tickers))
+
+
+@functools.lru_cache(maxsize=4)
+def _div_and_prices(
+    tickers: tuple[str, ...],
+    last_date: pd.Timestamp,
+    timestamps: tuple[Optional[datetime.datetime], ...],
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Дивиденды и цены — время обновления таблиц с дивидендами используется только в ключе кеша."""
     price = prices(tickers, last_date)
     div_data = div.dividends_all(tickers)
-    div_data.index = div_data.index.map(functools.partial(_t2_shift, index=price.index))
+    div_data.index = _t2_shift(div_data.index, price.index)
     # Может образоваться несколько одинаковых дат, если часть дивидендов приходится на выходные
-    div_data = div_data.groupby(by=lambda date: date).sum()
+    div_data = div_data.loc[div_data.index.notna()].groupby(level=0).sum()
 
     return div_data.reindex(index=price.index, fill_value=0), price
@@ -83,7 +83,7 @@ T2_CASES = (
 def test_t2_shift(date, t2):
     """Различные варианты сдвига около выходных."""
     index = quotes.prices(("NLMK", "GMKN"), pd.Timestamp("2018-10-08")).index
-    assert quotes._t2_shift(pd.Timestamp(date), index) == pd.Timestamp(t2)
+    assert quotes._t2_shift(pd.DatetimeIndex([date]), index)[0] == pd.Timestamp(t2)
 
 
 DIV_PRICE_CASES = (
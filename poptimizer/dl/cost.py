@@ -0,0 +1,174 @@
+"""Оценка времени и памяти шага обучения модели по фенотипу до загрузки данных.
+
+Вычислительная сложность сети рассчитывается аналитически по параметрам WaveNet, а скорость вычислений
+калибруется по времени обучения блоков сети разного размера на данной машине.
+"""
+import dataclasses
+import functools
+import time
+from typing import Final
+
+import numpy as np
+import psutil
+import torch
+
+from poptimizer.config import DEVICE
+from poptimizer.dl import PhenotypeData
+from poptimizer.dl.models.wave_net import Block
+
+# Размеры блоков для калибровки — количество примеров, каналов и дней
+_CALIBRATION_SIZES: Final = ((16, 8, 32), (64, 32, 128))
+_CALIBRATION_REPEATS: Final = 5
+_CALIBRATION_KERNELS: Final = 3
+
+# Значений на параметр при обучении — сам параметр, градиент и два момента AdamW
+_VALUES_PER_PARAM: Final = 4
+# Сохраненные для обратного прохода значения и их градиенты
+_VALUES_PER_ACTIVATION: Final = 2
+_FLOAT_BYTES: Final = 4
+
+
+@dataclasses.dataclass(frozen=True)
+class StepCost:
+    """Предсказанные время в секундах и пиковая память в байтах для шага обучения."""
+
+    seconds: float
+    memory: float
+
+
+@dataclasses.dataclass(frozen=True)
+class _Complexity:
+    """Умножения-сложения прямого прохода и сохраняемые значения на пример, параметры и вызовы блоков."""
+
+    macs: float = 0
+    values: float = 0
+    params: float = 0
+    calls: int = 0
+
+    def __add__(self, other: "_Complexity") -> "_Complexity":
+        return _Complexity(*(np.add(dataclasses.astuple(self), dataclasses.astuple(other))))
+
+
+def step_cost(phenotype: PhenotypeData) -> StepCost:
+    """Предсказанные время и пиковая память шага обучения модели с заданным фенотипом."""
+    model = phenotype["model"]
+    data = phenotype["data"]
+    batch_size = data["batch_size"]
+
+    complexity = _complexity(
+        history_days=data["history_days"],
+        sequences=sum(1 for key, feature in data["features"].items() if key != "Label" and feature["on"]),
+        **model,
+    )
+    overhead, seconds_per_mac = _calibration()
+    values = _VALUES_PER_ACTIVATION * complexity.values * batch_size + _VALUES_PER_PARAM * complexity.params
+
+    return StepCost(
+        seconds=complexity.calls * overhead + seconds_per_mac * complexity.macs * batch_size,
+        memory=_FLOAT_BYTES * values,
+    )
+
+
+def memory_budget() -> float:
+    """Доступная для обучения память в байтах."""
+    if DEVICE.type == "cuda":
+        return torch.cuda.get_device_properties(DEVICE).total_memory
+
+    return psutil.virtual_memory().total
+
+
+def _complexity(
+    history_days: int,
+    sequences: int,
+    start_bn: bool,
+    sub_blocks: int,
+    kernels: int,
+    gate_channels: int,
+    residual_channels: int,
+    skip_channels: int,
+    end_channels: int,
+    mixture_size: int,
+) -> _Complexity:
+    """Сложность WaveNet — входной свертки, блоков с уменьшающейся вдвое длиной и выходных сверток.
+
+    Параметры эмбедингов не учитываются, так как их размер зависит от данных, а вычисления для них
+    пренебрежимо малы.
+    """
+    residual = residual_channels
+    total = _Complexity(
+        macs=sequences * residual * history_days,
+        values=(sequences + residual) * history_days,
+        params=(sequences + 1) * residual + 2 * sequences * start_bn,
+        calls=1,
+    )
+
+    length = history_days
+    for _ in range(int(np.log2(history_days - 1)) + 1):
+        total += _block_complexity(length, sub_blocks, kernels, gate_channels, residual, skip_channels)
+        length = (length + 1) // 2
+
+    head = residual * skip_channels + skip_channels * end_channels + 3 * end_channels * mixture_size
+    total += _Complexity(
+        macs=head,
+        values=2 * skip_channels + end_channels + 3 * mixture_size,
+        params=head + skip_channels + end_channels + 3 * mixture_size,
+        calls=1,
+    )
+
+    return total
+
+
+def _block_complexity(
+    length: int,
+    sub_blocks: int,
+    kernels: int,
+    gate: int,
+    residual: int,
+    skip: int,
+) -> _Complexity:
+    """Сложность блока — маленьких блоков с гейтом, скипа и свертки с уменьшением длины."""
+    sub_block = _Complexity(
+        macs=(2 * kernels * residual * gate + gate * residual) * length,
+        values=(2 * residual + 5 * gate) * length,
+        params=2 * (kernels * residual + 1) * gate + (gate + 1) * residual,
+    )
+    dilated_length = (length + 1) // 2
+
+    return _Complexity(
+        macs=sub_blocks * sub_block.macs + residual * skip + 2 * residual ** 2 * dilated_length,
+        values=sub_blocks * sub_block.values + residual * (length + 1) + skip,
+        params=sub_blocks * sub_block.params + (residual + 1) * skip + (2 * residual + 1) * residual,
+        calls=1,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _calibration() -> tuple[float, float]:
+    """Накладные расходы на вызов блока и время умножения-сложения с учетом обратного прохода.
+
+    Определяются по медианному времени прямого и обратного прохода блоков двух размеров. Состояние
+    генератора случайных чисел не меняется, чтобы не влиять на инициализацию моделей.
+    """
+    macs = []
+    seconds = []
+    for batch, channels, days in _CALIBRATION_SIZES:
+        with torch.random.fork_rng():
+            block = Block(1, _CALIBRATION_KERNELS, channels, channels, channels).to(DEVICE)
+            x = torch.randn(batch, channels, days, device=DEVICE)
+        timings = []
+        for _ in range(_CALIBRATION_REPEATS + 1):
+            start = time.perf_counter()
+            y, skip = block(x)
+            (y.sum() + skip.sum()).backward()
+            if DEVICE.type == "cuda":
+                torch.cuda.synchronize(DEVICE)
+            timings.append(time.perf_counter() - start)
+
+        complexity = _block_complexity(days, 1, _CALIBRATION_KERNELS, channels, channels, channels)
+        macs.append(complexity.macs * batch)
+        seconds.append(float(np.median(timings[1:])))
+
+    seconds_per_mac = max((seconds[1] - seconds[0]) / (macs[1] - macs[0]), seconds[1] / macs[1] / 2)
+    overhead = max(seconds[0] - seconds_per_mac * macs[0], 0)
+
+    return overhead, seconds_per_mac
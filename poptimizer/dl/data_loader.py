@@ -1,15 +1,21 @@
 """Формирование примеров для обучения в формате PyTorch."""
-from typing import Any, Dict, List, Tuple, Type, Union
+from typing import Any, Callable, Dict, List, Tuple, Type, Union
 
 import pandas as pd
+import torch
 from torch import Tensor
+from torch.nn import functional
 from torch.utils import data
 
+from poptimizer.config import DEVICE
 from poptimizer.dl import features
 
 # Описание фенотипа и его подразделов
 PhenotypeData = Dict[str, Union[Any, "PhenotypeData"]]
 
+# Ключ маски тикеров, для которых есть примеры, в батчах с сечениями по датам
+MASK = "Mask"
+
 
 class OneTickerDataset(data.Dataset):
     """Готовит обучающие примеры для одного тикера на основе параметров модели."""
@@ -40,6 +46,175 @@ class OneTickerDataset(data.Dataset):
         return features_description
 
 
+def _sequence_batch(parts: features.WindowParts, tickers: Tensor, starts: Tensor, history_days: int) -> Tensor:
+    windows = parts.value.unfold(1, history_days, 1)[tickers, starts]
+    shift = parts.shift[tickers, starts].unsqueeze(2)
+    scale = parts.scale[tickers, starts].unsqueeze(2)
+    return (windows - shift) / scale
+
+
+def _embedding_sequence_batch(
+    parts: features.WindowParts,
+    tickers: Tensor,
+    starts: Tensor,
+    history_days: int,
+) -> Tensor:
+    windows = parts.value.unfold(1, history_days, 1)[tickers, starts]
+    return windows - parts.shift[tickers, starts].unsqueeze(2)
+
+
+def _embedding_batch(parts: features.WindowParts, tickers: Tensor, starts: Tensor, history_days: int) -> Tensor:
+    return parts.value[tickers, starts]
+
+
+def _label_batch(parts: features.WindowParts, tickers: Tensor, starts: Tensor, history_days: int) -> Tensor:
+    label = (parts.value[tickers, starts] - parts.shift[tickers, starts]) / parts.scale[tickers, starts]
+    return label.unsqueeze(2)
+
+
+# Формирование батча из выровненных рядов признаков одного типа - значения признаков по второй оси
+_BATCH_MAKERS: Dict[features.FeatureType, Callable[[features.WindowParts, Tensor, Tensor, int], Tensor]] = {
+    features.FeatureType.SEQUENCE: _sequence_batch,
+    features.FeatureType.EMBEDDING_SEQUENCE: _embedding_sequence_batch,
+    features.FeatureType.EMBEDDING: _embedding_batch,
+    features.FeatureType.LABEL: _label_batch,
+}
+
+
+def _stack_parts(tickers_parts: List[List[features.WindowParts]], days: int) -> features.WindowParts:
+    """Объединяет ряды признаков в тензоры [тикеры, дни, каналы] выровненные по последней дате.
+
+    Начало истории у тикеров с короткой историей дополняется нейтральными значениями.
+    """
+    stacked = []
+    for field, pad_value in enumerate((0, 0, 1)):
+        tickers_channels = []
+        for parts in tickers_parts:
+            channels = torch.stack([part[field] for part in parts], dim=1)
+            channels = functional.pad(channels, (0, 0, days - len(channels), 0), value=pad_value)
+            tickers_channels.append(channels)
+        stacked.append(torch.stack(tickers_channels))
+
+    return features.WindowParts(*stacked)
+
+
+class BatchedDataset(data.Dataset):
+    """Готовит сразу целые батчи обучающих примеров для всех тикеров на основе параметров модели.
+
+    Признаки каждого типа хранятся в виде тензоров [тикеры, дни, каналы], выровненных по последней
+    дате, а батч формируется одной выборкой из скользящих окон без перебора признаков и примеров.
+    Не зависящие от тикера рыночные признаки хранятся в одном экземпляре и выбираются только по дате.
+    Нумерация и значения примеров совпадают с объединением OneTickerDataset для всех тикеров.
+    """
+
+    def __init__(self, params: features.DataParams):
+        tickers = params.tickers
+        tickers_features = [
+            [getattr(features, feat_name)(ticker, params) for feat_name in params.get_all_feat()]
+            for ticker in tickers
+        ]
+
+        self._history_days = params.history_days
+        self._features_description = {}
+        for feature in tickers_features[0]:
+            self._features_description[feature.__class__.__name__] = feature.type_and_size
+
+        days = params.days
+        self._groups = {}
+        for feature_type in _BATCH_MAKERS:
+            for market in (False, True):
+                channels = [
+                    n_feat
+                    for n_feat, feature in enumerate(tickers_features[0])
+                    if feature.type_and_size[0] is feature_type
+                    and isinstance(feature, features.MarketFeature) is market
+                ]
+                if not channels:
+                    continue
+                keys = [list(self._features_description)[n_feat] for n_feat in channels]
+                if market:
+                    tickers_parts = [[tickers_features[0][n_feat].market_parts() for n_feat in channels]]
+                else:
+                    tickers_parts = [
+                        [ticker_features[n_feat].window_parts() for n_feat in channels]
+                        for ticker_features in tickers_features
+                    ]
+                self._groups[feature_type, market] = keys, _stack_parts(tickers_parts, days)
+
+        ticker_idx = []
+        start_idx = []
+        for n_ticker, ticker in enumerate(tickers):
+            pad = params.offset(ticker)
+            size = params.len(ticker)
+            ticker_idx.append(torch.full((size,), n_ticker, dtype=torch.long))
+            start_idx.append(torch.arange(pad, pad + size))
+        self._ticker_idx = torch.cat(ticker_idx).to(DEVICE)
+        self._start_idx = torch.cat(start_idx).to(DEVICE)
+
+    def __getitem__(self, items: List[int]) -> Dict[str, Tensor]:
+        items = torch.as_tensor(items, dtype=torch.long, device=DEVICE)
+        tickers = self._ticker_idx[items]
+        starts = self._start_idx[items]
+
+        batch = {}
+        for (feature_type, market), (keys, parts) in self._groups.items():
+            groups_tickers = torch.zeros_like(tickers) if market else tickers
+            values = _BATCH_MAKERS[feature_type](parts, groups_tickers, starts, self._history_days)
+            batch.update(zip(keys, values.unbind(dim=1)))
+
+        return {key: batch[key] for key in self._features_description}
+
+    def __len__(self) -> int:
+        return len(self._ticker_idx)
+
+    @property
+    def features_description(self) -> Dict[str, Tuple[features.FeatureType, int]]:
+        """Словарь с описанием всех признаков."""
+        return self._features_description
+
+
+class CrossSectionDataset(BatchedDataset):
+    """Готовит батчи, в которых пример - все тикеры на одну дату.
+
+    Признаки тикеров имеют размерность [даты, тикеры, ...], а рыночные признаки вычисляются один раз
+    для даты и имеют размерность [даты, ...]. Маска [даты, тикеры] отмечает тикеры, для которых есть
+    пример на данную дату, а метки формируются только для них в порядке дат и тикеров внутри даты.
+    """
+
+    def __init__(self, params: features.DataParams):
+        super().__init__(params)
+        valid = torch.zeros(params.days, len(params.tickers), dtype=torch.bool, device=DEVICE)
+        valid[self._start_idx, self._ticker_idx] = True
+        self._valid = valid
+        self._dates = valid.any(dim=1).nonzero().squeeze(dim=1)
+
+    def __getitem__(self, items: List[int]) -> Dict[str, Tensor]:
+        dates = self._dates[torch.as_tensor(items, dtype=torch.long, device=DEVICE)]
+        mask = self._valid[dates]
+        n_dates, n_tickers = mask.shape
+        tickers = torch.arange(n_tickers, device=DEVICE).repeat(n_dates)
+        starts = dates.repeat_interleave(n_tickers)
+
+        batch = {}
+        for (feature_type, market), (keys, parts) in self._groups.items():
+            if market:
+                values = _BATCH_MAKERS[feature_type](parts, torch.zeros_like(dates), dates, self._history_days)
+            else:
+                values = _BATCH_MAKERS[feature_type](parts, tickers, starts, self._history_days)
+
+            for key, value in zip(keys, values.unbind(dim=1)):
+                if feature_type is features.FeatureType.LABEL:
+                    value = value[mask.flatten()]
+                elif not market:
+                    value = value.reshape(n_dates, n_tickers, *value.shape[1:])
+                batch[key] = value
+
+        return {MASK: mask, **{key: batch[key] for key in self._features_description}}
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+
 class DescribedDataLoader(data.DataLoader):
     """Загрузчик данных, который дополнительно хранит описание параметров данных."""
 
@@ -49,6 +224,8 @@ class DescribedDataLoader(data.DataLoader):
         end: pd.Timestamp,
         params: PhenotypeData,
         params_type: Type[features.DataParams],
+        batched: bool = False,
+        cross_section: bool = False,
     ):
         """Формирует загрузчики данных для обучения, валидации, тестирования и прогнозирования для
         заданных тикеров и конечной даты на основе словаря с параметрами.
@@ -62,9 +239,26 @@ class DescribedDataLoader(data.DataLoader):
             Словарь с параметрами для построения признаков и других элементов модели.
         :param params_type:
             Тип формируемых признаков.
+        :param batched:
+            Формировать батчи целиком с помощью BatchedDataset, а не по одному примеру.
+        :param cross_section:
+            Формировать батчи из сечений всех тикеров по датам с помощью CrossSectionDataset. Количество
+            дат в батче выбирается так, чтобы количество примеров примерно соответствовало размеру батча.
         """
         params = params_type(tickers, end, params)
-        data_sets = [OneTickerDataset(ticker, params) for ticker in tickers]
+        if cross_section:
+            batch_size = max(1, round(params.batch_size / len(params.tickers)))
+            self._init_batched(CrossSectionDataset(params), batch_size, params.shuffle)
+        elif batched:
+            self._init_batched(BatchedDataset(params), params.batch_size, params.shuffle)
+        else:
+            self._init_one_ticker(params)
+        self._history_days = params.history_days
+        self._examples = sum(params.len(ticker) for ticker in params.tickers)
+
+    def _init_one_ticker(self, params: features.DataParams) -> None:
+        """Загрузчик, который формирует батч из отдельных примеров для каждого тикера."""
+        data_sets = [OneTickerDataset(ticker, params) for ticker in params.tickers]
         super().__init__(
             dataset=data.ConcatDataset(data_sets),
             batch_size=params.batch_size,
@@ -73,7 +267,19 @@ class DescribedDataLoader(data.DataLoader):
             num_workers=0,  # Загрузка в отдельном потоке - увеличение потоков не докидывает
         )
         self._features_description = data_sets[0].features_description
-        self._history_days = params.history_days
+
+    def _init_batched(self, dataset: BatchedDataset, batch_size: int, shuffle: bool) -> None:
+        """Загрузчик, в котором семплер выдает номера примеров батча, а набор данных - сразу весь батч."""
+        sampler = data.SequentialSampler(dataset)
+        if shuffle:
+            sampler = data.RandomSampler(dataset)
+        super().__init__(
+            dataset=dataset,
+            batch_size=None,
+            sampler=data.BatchSampler(sampler, batch_size=batch_size, drop_last=False),
+            num_workers=0,
+        )
+        self._features_description = dataset.features_description
 
     @property
     def features_description(self) -> Dict[str, Tuple[features.FeatureType, int]]:
@@ -84,3 +290,8 @@ class DescribedDataLoader(data.DataLoader):
     def history_days(self) -> int:
         """Количество дней в истории."""
         return self._history_days
+
+    @property
+    def examples(self) -> int:
+        """Количество примеров для всех тикеров."""
+        return self._examples
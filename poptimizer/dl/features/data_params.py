@@ -1,25 +1,133 @@
 """Описание модели и данных."""
 import abc
 import copy
-from typing import Generator, Tuple
+import functools
+from typing import Callable, Generator, Iterable, Optional, Tuple
 
 import pandas as pd
+import torch
 
 from poptimizer import config
+from poptimizer.config import DEVICE
 from poptimizer.data.views import quotes
+from poptimizer.dl.features import store
 
 FORECAST_DAYS = config.FORECAST_DAYS
 
 
+class DataSnapshot:
+    """Неизменяемый снимок данных для набора тикеров на определенную дату.
+
+    Цены, дивиденды, рыночные ряды и панели данных по тикерам загружаются и преобразуются в тензоры
+    один раз для всех дат, а параметры данных для обучения, тестирования и прогнозирования используют
+    их представления для своего диапазона дат.
+    """
+
+    def __init__(self, tickers: Tuple[str, ...], end: pd.Timestamp, sources: Iterable = ()):
+        """
+        :param tickers:
+            Перечень тикеров.
+        :param end:
+            Конечная дата данных.
+        :param sources:
+            Время обновления таблиц, из которых загружаются данные.
+        """
+        self._store = store.Store(tickers, end, sources)
+        div_price = self._store.load(
+            "div_and_prices",
+            lambda: pd.concat(quotes.div_and_prices(tickers, end), axis=1),
+        )
+        self._div = div_price.iloc[:, : len(tickers)]
+        self._price = div_price.iloc[:, len(tickers) :]
+        self._tickers = tickers
+        self._starts = {}
+        for ticker in tickers:
+            start = self._price[ticker].first_valid_index()
+            self._starts[ticker] = None if start is None else self._price.index.get_loc(start)
+        self._div_tensor = _to_tensor(self._div.to_numpy().transpose())
+        self._price_tensor = _to_tensor(self._price.to_numpy().transpose())
+        self._market = {}
+        self._panels = {}
+
+    @property
+    def tickers(self) -> Tuple[str, ...]:
+        """Перечень тикеров."""
+        return self._tickers
+
+    @property
+    def div(self) -> pd.DataFrame:
+        """Дивиденды по всем датам."""
+        return self._div
+
+    @property
+    def price(self) -> pd.DataFrame:
+        """Цены по всем датам."""
+        return self._price
+
+    @property
+    def div_tensor(self) -> torch.Tensor:
+        """Дивиденды по всем датам размерностью [тикеры, даты]."""
+        return self._div_tensor
+
+    @property
+    def price_tensor(self) -> torch.Tensor:
+        """Цены по всем датам размерностью [тикеры, даты]."""
+        return self._price_tensor
+
+    def start(self, ticker: str) -> Optional[int]:
+        """Номер первой даты с котировками тикера или None при их отсутствии."""
+        return self._starts[ticker]
+
+    def stored(self, name: str, load: Callable[[], store.PandasData]) -> store.PandasData:
+        """Исходные данные для признаков, которые сохраняются на диске для набора тикеров и даты."""
+        return self._store.load(name, load)
+
+    def market(self, name: str, load: Callable[[], pd.Series], ffill: bool) -> torch.Tensor:
+        """Ряд рыночных данных, выровненный по всем датам снимка."""
+        if (series := self._market.get(name)) is None:
+            series = self.stored(name, load).reindex(self._price.index, method="ffill" if ffill else None, axis=0)
+            series = _to_tensor(series.to_numpy())
+            self._market[name] = series
+
+        return series
+
+    def panel(self, name: str, load: Callable[[], pd.DataFrame], ffill: bool) -> torch.Tensor:
+        """Данные по тикерам, выровненные по всем датам снимка, размерностью [тикеры, даты]."""
+        if (panel := self._panels.get(name)) is None:
+            panel = self.stored(name, load).reindex(self._price.index, method="ffill" if ffill else None, axis=0)
+            panel = _to_tensor(panel[list(self._tickers)].to_numpy().transpose())
+            self._panels[name] = panel
+
+        return panel
+
+
+def _to_tensor(values) -> torch.Tensor:
+    return torch.tensor(values, dtype=torch.float, device=DEVICE)
+
+
+def snapshot(tickers: Tuple[str, ...], end: pd.Timestamp) -> DataSnapshot:
+    """Снимок данных для набора тикеров на дату, общий для всех параметров данных.
+
+    Снимок создается заново при обновлении таблиц, из которых загружаются данные.
+    """
+    return _snapshot(tickers, end, quotes.timestamps(tickers))
+
+
+@functools.lru_cache(maxsize=1)
+def _snapshot(tickers: Tuple[str, ...], end: pd.Timestamp, sources: tuple) -> DataSnapshot:
+    """Снимок данных — время обновления таблиц используется в ключе кеша."""
+    return DataSnapshot(tickers, end, sources)
+
+
 def div_price_train_size(
     tickers: Tuple[str, ...],
     end: pd.Timestamp,
 ) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
     """Данные по дивидендам, ценам и количество дней в тренировочном наборе."""
-    div, price = quotes.div_and_prices(tickers, end)
-    train_size = len(price) - FORECAST_DAYS
+    data = snapshot(tickers, end)
+    train_size = len(data.price) - FORECAST_DAYS
 
-    return div, price, train_size
+    return data.div, data.price, train_size
 
 
 class DataParams(abc.ABC):
@@ -32,7 +140,8 @@ class DataParams(abc.ABC):
         классах. Кроме собственно необходимых для построения признаков параметров класс хранит
         кешированные и обрезанные у четом типа данных и отсутствующих значений информацию о дивидендах
         и стоимости акций, которые могут быть использованы для построения признаков и корректного их
-        выравнивания по времени.
+        выравнивания по времени. Сами данные загружаются один раз в общий снимок, а параметры данных
+        хранят только их представления.
 
         :param tickers:
             Перечень тикеров, для которых будет строится модель.
@@ -43,16 +152,30 @@ class DataParams(abc.ABC):
             Словарь с параметрами для построения признаков и других элементов модели.
         """
         self._cache = {}
+        self._snapshot = snapshot(tickers, end)
         self._tickers = tickers
         self._end = end
         self._params = copy.deepcopy(params)
-        div, price = self._div_price(tickers, end)
+        price = self._snapshot.price
+        rows = self._date_rows(range(len(price)), len(price) - FORECAST_DAYS)
+        self._rows = slice(rows.start, rows.stop)
+        self._index = price.index[self._rows]
+        self._starts = {}
         self._div = {}
         self._price = {}
         for ticker in tickers:
-            start = price[ticker].first_valid_index()
-            self._div[ticker] = div.loc[start:, ticker]
-            self._price[ticker] = price.loc[start:, ticker]
+            start = self._ticker_start(ticker)
+            self._starts[ticker] = start
+            self._div[ticker] = self._snapshot.div[ticker].iloc[start : self._rows.stop]
+            self._price[ticker] = price[ticker].iloc[start : self._rows.stop]
+
+    def _ticker_start(self, ticker: str) -> int:
+        """Номер даты снимка, с которой начинается история тикера в диапазоне дат параметров."""
+        start = self._snapshot.start(ticker)
+        if start is None or start >= self._rows.stop:
+            return self._rows.start
+
+        return max(start, self._rows.start)
 
     @property
     def cache(self) -> dict:
@@ -104,6 +227,73 @@ class DataParams(abc.ABC):
         """
         return self._div[ticker]
 
+    @property
+    def days(self) -> int:
+        """Количество дат в данных для всех тикеров."""
+        return len(self._index)
+
+    def offset(self, ticker: str) -> int:
+        """Количество дат до начала истории тикера."""
+        return self._starts[ticker] - self._rows.start
+
+    def stored(self, name: str, load: Callable[[], store.PandasData]) -> store.PandasData:
+        """Исходные данные для признаков, которые сохраняются на диске для набора тикеров и даты.
+
+        :param name:
+            Название данных в хранилище.
+        :param load:
+            Функция загрузки данных при их отсутствии в хранилище.
+        """
+        return self._snapshot.stored(name, load)
+
+    def market(self, name: str, load: Callable[[], pd.Series], ffill: bool = True) -> torch.Tensor:
+        """Общий для всех тикеров ряд рыночных данных на всех датах.
+
+        Загружается и выравнивается по датам один раз для снимка данных, а признаки отдельных тикеров
+        используют его представления, начиная с первой даты своей истории.
+
+        :param name:
+            Название ряда для кеширования.
+        :param load:
+            Функция загрузки ряда.
+        :param ffill:
+            Нужно ли заполнять пропуски предыдущими значениями.
+        """
+        return self._snapshot.market(name, load, ffill)[self._rows]
+
+    def panel(
+        self,
+        name: str,
+        ticker: str,
+        load: Callable[[], pd.DataFrame],
+        ffill: bool = True,
+    ) -> torch.Tensor:
+        """Ряд данных тикера из панели по всем тикерам на датах истории тикера.
+
+        Панель загружается, выравнивается по датам и преобразуется в тензор один раз для снимка данных.
+
+        :param name:
+            Название панели в хранилище.
+        :param ticker:
+            Тикер.
+        :param load:
+            Функция загрузки панели.
+        :param ffill:
+            Нужно ли заполнять пропуски предыдущими значениями.
+        """
+        return self._ticker_row(self._snapshot.panel(name, load, ffill), ticker)
+
+    def price_tensor(self, ticker: str) -> torch.Tensor:
+        """Цены тикера на датах его истории."""
+        return self._ticker_row(self._snapshot.price_tensor, ticker)
+
+    def div_tensor(self, ticker: str) -> torch.Tensor:
+        """Дивиденды тикера на датах его истории."""
+        return self._ticker_row(self._snapshot.div_tensor, ticker)
+
+    def _ticker_row(self, panel: torch.Tensor, ticker: str) -> torch.Tensor:
+        return panel[self._tickers.index(ticker), self._starts[ticker] : self._rows.stop]
+
     def len(self, ticker) -> int:
         """Количество доступных примеров для данного тикера."""
         return max(0, len(self.price(ticker)) - self.history_days - FORECAST_DAYS + 1)
@@ -117,11 +307,11 @@ class DataParams(abc.ABC):
         return self._params["features"][feat_name]
 
     @abc.abstractmethod
-    def _div_price(self, tickers, end) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        """Данные о дивидендах и стоимости акций для указанных тикеров и конечной даты.
+    def _date_rows(self, days: range, train_size: int) -> range:
+        """Диапазон номеров дат снимка данных для параметров.
 
         Метод должен реализовывать необходимую обрезку с учетом конкретного класса - для обучения,
-        валидации, тестирования или тренировки. При необходимости изменять параметры.
+        валидации, тестирования или тренировки.
         """
 
 
@@ -133,38 +323,28 @@ class TrainParams(DataParams):
         """Нужно перемешивать данные."""
         return True
 
-    def _div_price(self, tickers, end) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        div, price, train_size = div_price_train_size(tickers, end)
-        div = div.iloc[:train_size]
-        price = price.iloc[:train_size]
-
-        return div, price
+    def _date_rows(self, days: range, train_size: int) -> range:
+        return days[:train_size]
 
 
 class TestParams(DataParams):
     """Параметры для тестирования."""
 
-    def _div_price(self, tickers, end) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        history_days = self.history_days
-        div, price, train_size = div_price_train_size(tickers, end)
-        div = div.iloc[train_size - history_days :]
-        price = price.iloc[train_size - history_days :]
-
-        return div, price
+    def _date_rows(self, days: range, train_size: int) -> range:
+        return days[train_size - self.history_days :]
 
 
 class ForecastParams(DataParams):
     """Метки не формируются, а признаки формируются только для последней даты."""
 
+    def __init__(self, tickers: Tuple[str, ...], end: pd.Timestamp, params: dict):
+        """Параметры без признака с метками."""
+        super().__init__(tickers, end, params)
+        self._params["features"].pop("Label")
+
     def len(self, ticker) -> int:
         """Количество доступных примеров для данного тикера."""
         return 1
 
-    def _div_price(self, tickers, end) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        history_days = self.history_days
-        div, price, train_size = div_price_train_size(tickers, end)
-        div = div.iloc[-history_days:]
-        price = price.iloc[-history_days:]
-        self._params["features"].pop("Label")
-
-        return div, price
+    def _date_rows(self, days: range, train_size: int) -> range:
+        return days[-self.history_days :]
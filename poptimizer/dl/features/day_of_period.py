@@ -5,7 +5,7 @@ import torch
 
 from poptimizer.config import DEVICE
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 
 
 class DayOfPeriod(Feature):
@@ -19,9 +19,12 @@ class DayOfPeriod(Feature):
         super().__init__(ticker, params)
 
         self.history_days = params.history_days
+        self.days = len(params.price(ticker))
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return torch.arange(self.history_days, device=DEVICE)
+    def window_parts(self) -> WindowParts:
+        """Номер дня в окне равен разнице номеров дня с начала истории."""
+        days = torch.arange(self.days, device=DEVICE)
+        return WindowParts(days, days, torch.ones_like(days))
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
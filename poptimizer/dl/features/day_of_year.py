@@ -5,7 +5,7 @@ import torch
 
 from poptimizer.config import DEVICE
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 
 
 class DayOfYear(Feature):
@@ -23,8 +23,9 @@ class DayOfYear(Feature):
 
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.day_of_year[item : item + self.history_days]
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        return WindowParts(self.day_of_year, torch.zeros_like(self.day_of_year), torch.ones_like(self.day_of_year))
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
@@ -3,9 +3,8 @@ from typing import Tuple
 
 import torch
 
-from poptimizer.config import DEVICE
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 
 
 class Dividends(Feature):
@@ -13,14 +12,15 @@ class Dividends(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-        self.div = torch.tensor(params.div(ticker).values, dtype=torch.float, device=DEVICE)
-        self.price = torch.tensor(params.price(ticker).values, dtype=torch.float, device=DEVICE)
+        self.div = params.div_tensor(ticker)
+        self.price = params.price_tensor(ticker)
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return (
-            self.div[item : item + self.history_days].cumsum(dim=0) / self.price[item]
-        )
+    def window_parts(self) -> WindowParts:
+        """Накопленные дивиденды за окно выражаются через разницу накопленных с начала истории."""
+        cum_div = torch.cumsum(self.div.double(), dim=0)
+        shift = cum_div - self.div
+        return WindowParts(cum_div.float(), shift.float(), self.price)
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
@@ -1,7 +1,7 @@
 """Абстрактный класс признака."""
 import abc
 import enum
-from typing import Tuple
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
 
 from torch import Tensor
 
@@ -21,6 +21,64 @@ class FeatureType(enum.Enum):
     EMBEDDING_SEQUENCE = enum.auto()
 
 
+class WindowParts(NamedTuple):
+    """Представление признака в виде рядов для пакетного формирования примеров.
+
+    Все ряды имеют длину равную количеству дней в истории тикера, а значение признака для примера,
+    начинающегося в день start, зависит от типа признака:
+
+    - SEQUENCE - (value[start + day] - shift[start]) / scale[start] для дней истории
+    - EMBEDDING_SEQUENCE - value[start + day] - shift[start] для дней истории
+    - EMBEDDING - value[start]
+    - LABEL - (value[start] - shift[start]) / scale[start]
+    """
+
+    value: Tensor
+    shift: Tensor
+    scale: Tensor
+
+
+def _sequence_windows(parts: WindowParts, history_days: int) -> WindowParts:
+    return parts._replace(value=parts.value.unfold(0, history_days, 1))
+
+
+def _point_windows(parts: WindowParts, history_days: int) -> WindowParts:
+    return parts
+
+
+def _sequence_item(windows: WindowParts, item: int) -> Tensor:
+    return (windows.value[item] - windows.shift[item]) / windows.scale[item]
+
+
+def _embedding_sequence_item(windows: WindowParts, item: int) -> Tensor:
+    return windows.value[item] - windows.shift[item]
+
+
+def _embedding_item(windows: WindowParts, item: int) -> Tensor:
+    return windows.value[item]
+
+
+def _label_item(windows: WindowParts, item: int) -> Tensor:
+    return _sequence_item(windows, item).unsqueeze(0)
+
+
+# Представления рядов признака в виде окон для всех примеров тикера - примеры по первой оси
+_WINDOWS_MAKERS: Dict[FeatureType, Callable[[WindowParts, int], WindowParts]] = {
+    FeatureType.SEQUENCE: _sequence_windows,
+    FeatureType.EMBEDDING_SEQUENCE: _sequence_windows,
+    FeatureType.EMBEDDING: _point_windows,
+    FeatureType.LABEL: _point_windows,
+}
+
+# Формирование значения признака для примера из окон
+_ITEM_MAKERS: Dict[FeatureType, Callable[[WindowParts, int], Tensor]] = {
+    FeatureType.SEQUENCE: _sequence_item,
+    FeatureType.EMBEDDING_SEQUENCE: _embedding_sequence_item,
+    FeatureType.EMBEDDING: _embedding_item,
+    FeatureType.LABEL: _label_item,
+}
+
+
 class Feature(abc.ABC):
     """Абстрактный класс признака.
 
@@ -30,12 +88,67 @@ class Feature(abc.ABC):
     # noinspection PyUnusedLocal
     def __init__(self, ticker: str, params: DataParams):
         """Каждый признак должен сам сохранять необходимую для быстрого вычисления информацию."""
+        self._window_days = params.history_days
+        self._windows: Optional[WindowParts] = None
 
-    @abc.abstractmethod
     def __getitem__(self, item: int) -> Tensor:
-        """Нумерация идет с начала ряда данных в кэше параметров данных."""
+        """Нумерация идет с начала ряда данных в кэше параметров данных.
+
+        Сдвиг и масштаб применяются только к окну запрошенного примера.
+        """
+        feature_type, _ = self.type_and_size
+        return _ITEM_MAKERS[feature_type](self.materialize(), item)
+
+    def materialize(self) -> WindowParts:
+        """Окна рядов признака для всех примеров тикера.
+
+        Формируются один раз при первом обращении и являются представлениями рядов признака без
+        копирования данных — для последовательностей окна значений имеют размерность [примеры, дни истории].
+        """
+        if self._windows is None:
+            feature_type, _ = self.type_and_size
+            self._windows = _WINDOWS_MAKERS[feature_type](self.window_parts(), self._window_days)
+        return self._windows
 
     @property
     @abc.abstractmethod
     def type_and_size(self) -> Tuple[FeatureType, int]:
         """Тип признака и размер признака."""
+
+    @abc.abstractmethod
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+
+
+class MarketFeature(Feature):
+    """Абстрактный класс признака, не зависящего от тикера.
+
+    Ряды признака хранятся в параметрах данных в одном экземпляре для всех дат, а у тикера
+    используются их представления, начиная с первой даты истории тикера.
+    """
+
+    def __init__(self, ticker: str, params: DataParams):
+        """Сохраняет смещение начала истории тикера относительно общих рядов."""
+        super().__init__(ticker, params)
+        self._offset = params.offset(ticker)
+        self._cache = params.cache
+
+    def materialize(self) -> WindowParts:
+        """Окна рядов признака для всех примеров тикера.
+
+        Формируются один раз для всех тикеров, а у отдельного тикера используются их представления.
+        """
+        key = f"{self.__class__.__name__}_windows"
+        if (windows := self._cache.get(key)) is None:
+            feature_type, _ = self.type_and_size
+            windows = _WINDOWS_MAKERS[feature_type](self.market_parts(), self._window_days)
+            self._cache[key] = windows
+        return WindowParts(*(part[self._offset :] for part in windows))
+
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        return WindowParts(*(part[self._offset :] for part in self.market_parts()))
+
+    @abc.abstractmethod
+    def market_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака на всех датах параметров данных."""
@@ -1,10 +1,7 @@
 """Динамика максимальной цены."""
-import torch
-
-from poptimizer.config import DEVICE
 from poptimizer.data.views import quotes
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 from poptimizer.shared import col
 
 
@@ -17,19 +14,13 @@ class High(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-        p_high = quotes.prices(params.tickers, params.end, col.HIGH)[ticker]
-        price = params.price(ticker)
-        p_high = p_high.reindex(
-            price.index,
-            method="ffill",
-            axis=0,
-        )
-        self.high = torch.tensor(p_high.values, dtype=torch.float, device=DEVICE)
-        self.price = torch.tensor(params.price(ticker).values, dtype=torch.float, device=DEVICE)
+        self.high = params.panel(col.HIGH, ticker, lambda: quotes.prices(params.tickers, params.end, col.HIGH))
+        self.price = params.price_tensor(ticker)
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.high[item : item + self.history_days] / self.price[item] - 1
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        return WindowParts(self.high, self.price, self.price)
 
     @property
     def type_and_size(self) -> tuple[FeatureType, int]:
@@ -1,15 +1,12 @@
 """Динамика основного индекса MOEX (без дивидендов)."""
 from typing import Tuple
 
-import torch
-
-from poptimizer.config import DEVICE
 from poptimizer.data.views import indexes
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import FeatureType, MarketFeature, WindowParts
 
 
-class IMOEX(Feature):
+class IMOEX(MarketFeature):
     """Динамика основного индекса MOEX нормированная на начальную дату.
 
     Динамика индекса отражает общую рыночную конъюнктуру, в рамках которой осуществляется
@@ -19,18 +16,12 @@ class IMOEX(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-        imoex = indexes.imoex(params.end)
-        price = params.price(ticker)
-        imoex = imoex.reindex(
-            price.index,
-            method="ffill",
-            axis=0,
-        )
-        self.imoex = torch.tensor(imoex.values, dtype=torch.float, device=DEVICE)
+        self.imoex = params.market("IMOEX", lambda: indexes.imoex(params.end))
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.imoex[item : item + self.history_days] / self.imoex[item] - 1
+    def market_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака на всех датах параметров данных."""
+        return WindowParts(self.imoex, self.imoex, self.imoex)
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
@@ -2,10 +2,10 @@
 from typing import Tuple
 
 import torch
+from torch.nn import functional
 
-from poptimizer.config import DEVICE
 from poptimizer.dl.features import data_params
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 
 
 class Label(Feature):
@@ -13,27 +13,29 @@ class Label(Feature):
 
     def __init__(self, ticker: str, params: data_params.DataParams):
         super().__init__(ticker, params)
-        div = torch.tensor(params.div(ticker).values, dtype=torch.float, device=DEVICE)
+        div = params.div_tensor(ticker)
         self.cum_div = torch.cumsum(div, dim=0)
-        self.price = torch.tensor(params.price(ticker).values, dtype=torch.float, device=DEVICE)
+        self.price = params.price_tensor(ticker)
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        price = self.price
-        div = self.cum_div
-
-        start = item + self.history_days - 1
-        last_history_price = price[start]
-        last_history_div = div[start]
+    def window_parts(self) -> WindowParts:
+        """Доходность выражается через сумму цены и накопленных дивидендов.
 
+        Ряды сдвинуты на длину истории, а хвост без меток заполнен нейтральными значениями.
+        """
+        start = self.history_days - 1
         end = start + data_params.FORECAST_DAYS
-        last_forecast_price = price[end]
-        last_forecast_div = div[end]
 
-        div = last_forecast_div - last_history_div
-        price_growth = last_forecast_price - last_history_price
-        label = (price_growth + div) / last_history_price
-        return label.reshape(-1)
+        total = self.price + self.cum_div
+        value = total[end:]
+        size = len(value)
+        pad = (0, len(total) - size)
+
+        return WindowParts(
+            functional.pad(value, pad),
+            functional.pad(total[start : start + size], pad),
+            functional.pad(self.price[start : start + size], pad, value=1),
+        )
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
@@ -1,10 +1,7 @@
 """Динамика минимальной цены."""
-import torch
-
-from poptimizer.config import DEVICE
 from poptimizer.data.views import quotes
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 from poptimizer.shared import col
 
 
@@ -17,19 +14,13 @@ class Low(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-        p_low = quotes.prices(params.tickers, params.end, col.LOW)[ticker]
-        price = params.price(ticker)
-        p_low = p_low.reindex(
-            price.index,
-            method="ffill",
-            axis=0,
-        )
-        self.low = torch.tensor(p_low.values, dtype=torch.float, device=DEVICE)
-        self.price = torch.tensor(params.price(ticker).values, dtype=torch.float, device=DEVICE)
+        self.low = params.panel(col.LOW, ticker, lambda: quotes.prices(params.tickers, params.end, col.LOW))
+        self.price = params.price_tensor(ticker)
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.low[item : item + self.history_days] / self.price[item] - 1
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        return WindowParts(self.low, self.price, self.price)
 
     @property
     def type_and_size(self) -> tuple[FeatureType, int]:
@@ -1,15 +1,12 @@
 """Динамика индекса волатильности MCFTRR."""
 from typing import Tuple
 
-import torch
-
-from poptimizer.config import DEVICE
 from poptimizer.data.views import indexes
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import FeatureType, MarketFeature, WindowParts
 
 
-class MCFTRR(Feature):
+class MCFTRR(MarketFeature):
     """Динамика индекса полной доходности MCFTRR нормированная на начальную дату.
 
     Динамика индекса отражает общую рыночную конъюнктуру, в рамках которой осуществляется
@@ -18,18 +15,12 @@ class MCFTRR(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-        mcftrr = indexes.mcftrr(params.end)
-        price = params.price(ticker)
-        mcftrr = mcftrr.reindex(
-            price.index,
-            method="ffill",
-            axis=0,
-        )
-        self.mcftrr = torch.tensor(mcftrr.values, dtype=torch.float, device=DEVICE)
+        self.mcftrr = params.market("MCFTRR", lambda: indexes.mcftrr(params.end))
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.mcftrr[item : item + self.history_days] / self.mcftrr[item] - 1
+    def market_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака на всех датах параметров данных."""
+        return WindowParts(self.mcftrr, self.mcftrr, self.mcftrr)
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
@@ -1,12 +1,9 @@
 """Динамика цены открытия."""
 from typing import Tuple
 
-import torch
-
-from poptimizer.config import DEVICE
 from poptimizer.data.views import quotes
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 from poptimizer.shared import col
 
 
@@ -19,19 +16,13 @@ class Open(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-        p_open = quotes.prices(params.tickers, params.end, col.OPEN)[ticker]
-        price = params.price(ticker)
-        p_open = p_open.reindex(
-            price.index,
-            method="ffill",
-            axis=0,
-        )
-        self.open = torch.tensor(p_open.values, dtype=torch.float, device=DEVICE)
-        self.price = torch.tensor(params.price(ticker).values, dtype=torch.float, device=DEVICE)
+        self.open = params.panel(col.OPEN, ticker, lambda: quotes.prices(params.tickers, params.end, col.OPEN))
+        self.price = params.price_tensor(ticker)
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.open[item : item + self.history_days] / self.price[item] - 1
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        return WindowParts(self.open, self.price, self.price)
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
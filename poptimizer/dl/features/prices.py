@@ -1,11 +1,8 @@
 """Динамика изменения цены нормированная на первоначальную цену."""
 from typing import Tuple
 
-import torch
-
-from poptimizer.config import DEVICE
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 
 
 class Prices(Feature):
@@ -13,13 +10,12 @@ class Prices(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-        self.price = torch.tensor(params.price(ticker).values, dtype=torch.float, device=DEVICE)
+        self.price = params.price_tensor(ticker)
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        history_days = self.history_days
-        price = self.price
-        return price[item : item + history_days] / price[item] - 1
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        return WindowParts(self.price, self.price, self.price)
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
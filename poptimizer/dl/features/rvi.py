@@ -3,13 +3,12 @@ from typing import Tuple
 
 import torch
 
-from poptimizer.config import DEVICE
 from poptimizer.data.views import indexes
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import FeatureType, MarketFeature, WindowParts
 
 
-class RVI(Feature):
+class RVI(MarketFeature):
     """Динамика индекса волатильности RVI.
 
     Индекс отражает ожидание участников рынка относительно волатильности в ближайший месяц, что может
@@ -18,18 +17,12 @@ class RVI(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-        rvi = indexes.rvi(params.end)
-        price = params.price(ticker)
-        rvi = rvi.reindex(
-            price.index,
-            method="ffill",
-            axis=0,
-        )
-        self.rvi = torch.tensor(rvi.values, dtype=torch.float, device=DEVICE)
+        self.rvi = params.market("RVI", lambda: indexes.rvi(params.end))
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.rvi[item : item + self.history_days]
+    def market_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака на всех датах параметров данных."""
+        return WindowParts(self.rvi, torch.zeros_like(self.rvi), torch.ones_like(self.rvi))
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
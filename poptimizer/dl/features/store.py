@@ -0,0 +1,256 @@
+"""Хранилище исходных данных для признаков в отображаемых в память файлах."""
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+from typing import Callable, Final, Iterable, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from poptimizer import config
+
+PandasData = Union[pd.DataFrame, pd.Series]
+
+# Расширения файлов с данными, индексом и описанием рядов
+_VALUES = "values"
+_INDEX = "index"
+_META = "json"
+_LOCK = ".lock"
+
+# Префикс директорий с версиями рядов
+_VERSION_PREFIX = "v"
+
+# Хранилища наборов тикеров, которые не обновлялись дольше этого срока, удаляются
+MAX_AGE_SECONDS: Final = 7 * 24 * 60 ** 2
+
+
+class Store:
+    """Хранилище исходных рядов для признаков определенного набора тикеров.
+
+    Ряды записываются на диск один раз для торгового дня и отображаются в память всеми
+    использующими их моделями и процессами. Описание рядов хранит время обновления таблиц, из которых
+    они загружены, поэтому при изменении исходных данных ряды загружаются заново. Данные для дат ранее
+    последней сохраненной выдаются как начало сохраненных рядов.
+
+    При появлении нового торгового дня к сохраненным рядам дописываются только новые строки, если ранее
+    сохраненные строки не изменились. В ином случае ряды записываются в новую версию, на которую
+    атомарно переключается описание, а устаревшие версии удаляются.
+    """
+
+    def __init__(
+        self,
+        tickers: tuple[str, ...],
+        end: pd.Timestamp,
+        sources: Iterable = (),
+        path: pathlib.Path = config.FEATURES_PATH,
+    ):
+        """
+        :param tickers:
+            Перечень тикеров, для которых сохраняются данные.
+        :param end:
+            Конечная дата данных.
+        :param sources:
+            Время обновления таблиц, из которых загружаются данные.
+        :param path:
+            Директория хранилища.
+        """
+        self._root = path
+        self._path = path / hashlib.md5(",".join(tickers).encode()).hexdigest()
+        self._end = pd.Timestamp(end).value
+        self._sources = [str(source) for source in sources]
+
+    def load(self, name: str, load: Callable[[], PandasData]) -> PandasData:
+        """Загружает ряды из хранилища, а при отсутствии актуальной версии сохраняет результат загрузки.
+
+        Если сохранены ряды для более поздней даты, но исходные данные изменились, то результат загрузки
+        не сохраняется, так как он не содержит данных для более поздних дат.
+
+        :param name:
+            Название рядов.
+        :param load:
+            Функция загрузки рядов с числовыми значениями и индексом из дат.
+        :return:
+            Загруженные ряды, значения которых отображены в память.
+        """
+        meta = self._meta(name)
+        if (stored := self._open_actual(name, meta)) is not None:
+            return stored
+        if meta is not None and meta["end"] > self._end:
+            return load()
+
+        data = load()
+        self._path.mkdir(parents=True, exist_ok=True)
+        with self._lock():
+            meta = self._meta(name)
+            if not self._is_actual(meta) and (meta is None or meta["end"] <= self._end):
+                meta = self._write(name, data, meta)
+
+        if (stored := self._open_actual(name, meta)) is None:
+            return data
+
+        return stored
+
+    def _is_actual(self, meta: Optional[dict]) -> bool:
+        """Сохранены ряды для той же или более поздней даты из неизменившихся исходных данных."""
+        return meta is not None and meta["sources"] == self._sources and meta["end"] >= self._end
+
+    def _open_actual(self, name: str, meta: Optional[dict]) -> Optional[PandasData]:
+        """Отображает в память актуальные ряды или возвращает None при их отсутствии.
+
+        Версия рядов может быть удалена другим процессом после чтения описания, но до отображения в память —
+        в этом случае описание перечитывается один раз.
+        """
+        if not self._is_actual(meta):
+            return None
+        try:
+            return self._open(name, meta)
+        except FileNotFoundError:
+            meta = self._meta(name)
+
+        if not self._is_actual(meta):
+            return None
+
+        return self._open(name, meta)
+
+    @contextlib.contextmanager
+    def _lock(self) -> Iterator[None]:
+        with (self._path / _LOCK).open("w") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _file(self, name: str, suffix: str, version: str) -> pathlib.Path:
+        return self._path / name / version / suffix
+
+    def _meta(self, name: str) -> Optional[dict]:
+        path = self._path / f"{name}.{_META}"
+        if not path.exists():
+            return None
+        with path.open() as file:
+            return json.load(file)
+
+    def _arrays(self, name: str, meta: dict) -> tuple[np.ndarray, np.ndarray]:
+        rows, cols = meta["rows"], len(meta["columns"])
+        if not rows:
+            return np.empty((0, cols)), np.empty(0, dtype=np.int64)
+
+        version = meta["version"]
+        values = np.memmap(self._file(name, _VALUES, version), dtype=np.float64, mode="r", shape=(rows, cols))
+        index = np.memmap(self._file(name, _INDEX, version), dtype=np.int64, mode="r", shape=(rows,))
+
+        return values, index
+
+    def _open(self, name: str, meta: dict) -> PandasData:
+        """Отображает в память сохраненные ряды, обрезанные по конечной дате."""
+        values, index = self._arrays(name, meta)
+        index = pd.DatetimeIndex(index.view(meta["index_dtype"]), name=meta["index"])
+        if meta["end"] > self._end:
+            rows = index.searchsorted(pd.Timestamp(self._end), side="right")
+            values, index = values[:rows], index[:rows]
+
+        if meta["series"]:
+            return pd.Series(values[:, 0], index=index, name=meta["columns"][0], copy=False)
+
+        return pd.DataFrame(values, index=index, columns=meta["columns"], copy=False)
+
+    def _write(self, name: str, data: PandasData, meta: Optional[dict]) -> dict:
+        """Дописывает новые строки, если сохраненные не изменились, и записывает новую версию в ином случае.
+
+        Описание рядов заменяется после записи данных, поэтому процессы, прочитавшие предыдущее описание,
+        отображают в память согласованные с ним данные.
+        """
+        series = isinstance(data, pd.Series)
+        if series:
+            columns = [data.name]
+            data = data.to_frame()
+        else:
+            columns = list(data.columns)
+
+        values = data.to_numpy(dtype=np.float64)
+        index = data.index.values.view(np.int64)
+        rows = self._saved_rows(name, meta, data, columns, values, index)
+
+        if rows:
+            version = meta["version"]
+            for suffix, array in ((_VALUES, values), (_INDEX, index)):
+                with self._file(name, suffix, version).open("r+b") as file:
+                    file.seek(rows * (array.nbytes // len(array)))
+                    file.truncate()
+                    file.write(np.ascontiguousarray(array[rows:]).tobytes())
+        else:
+            versions = self._path / name
+            versions.mkdir(exist_ok=True)
+            version = pathlib.Path(tempfile.mkdtemp(prefix=_VERSION_PREFIX, dir=versions)).name
+            for suffix, array in ((_VALUES, values), (_INDEX, index)):
+                self._file(name, suffix, version).write_bytes(np.ascontiguousarray(array).tobytes())
+
+        new_meta = dict(
+            version=version,
+            end=self._end,
+            sources=self._sources,
+            rows=len(values),
+            columns=columns,
+            index=data.index.name,
+            index_dtype=str(data.index.dtype),
+            series=series,
+        )
+        _replace(self._path / f"{name}.{_META}", json.dumps(new_meta).encode())
+
+        if not rows:
+            self._prune_versions(name, {version, meta and meta["version"]})
+            self._prune_stores()
+
+        return new_meta
+
+    def _saved_rows(
+        self,
+        name: str,
+        meta: Optional[dict],
+        data: pd.DataFrame,
+        columns: list,
+        values: np.ndarray,
+        index: np.ndarray,
+    ) -> int:
+        """Количество сохраненных строк, которые совпадают с началом новых данных."""
+        if meta is None or meta["columns"] != columns or meta["rows"] > len(values):
+            return 0
+        if meta["index_dtype"] != str(data.index.dtype):
+            return 0
+
+        saved_values, saved_index = self._arrays(name, meta)
+        rows = meta["rows"]
+        if np.array_equal(saved_index, index[:rows]) and np.array_equal(
+            saved_values,
+            values[:rows],
+            equal_nan=True,
+        ):
+            return rows
+
+        return 0
+
+    def _prune_versions(self, name: str, keep: set) -> None:
+        """Удаляет версии рядов кроме текущей и предыдущей, которую могут использовать другие процессы."""
+        for version in (self._path / name).iterdir():
+            if version.name not in keep:
+                shutil.rmtree(version, ignore_errors=True)
+
+    def _prune_stores(self) -> None:
+        """Удаляет хранилища других наборов тикеров, которые давно не обновлялись."""
+        expired = time.time() - MAX_AGE_SECONDS
+        for path in self._root.iterdir():
+            if path != self._path and path.is_dir() and path.stat().st_mtime < expired:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def _replace(path: pathlib.Path, content: bytes) -> None:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
@@ -146,3 +146,31 @@ class TestForecastParams:
 
     def test_get_all_feat(self, forecast_params):
         assert list(forecast_params.get_all_feat()) == ["Prices"]
+
+
+def test_shared_snapshot():
+    train_params = data_params.TrainParams(TICKERS, DATE, PARAMS)
+    test_params = data_params.TestParams(TICKERS, DATE, PARAMS)
+    forecast_params = data_params.ForecastParams(TICKERS, DATE, PARAMS)
+
+    snapshot = data_params.snapshot(TICKERS, DATE)
+    for params in (train_params, test_params, forecast_params):
+        assert params._snapshot is snapshot
+        for ticker in TICKERS:
+            price = params.price_tensor(ticker)
+            assert price.tolist() == pytest.approx(params.price(ticker).tolist())
+            assert params.div_tensor(ticker).tolist() == pytest.approx(params.div(ticker).tolist())
+            assert price.untyped_storage().data_ptr() == snapshot.price_tensor.untyped_storage().data_ptr()
+
+
+def test_snapshot_refreshed_on_update(monkeypatch):
+    timestamps = iter([(1,), (1,), (2,)])
+    monkeypatch.setattr(data_params.quotes, "timestamps", lambda tickers: next(timestamps))
+    monkeypatch.setattr(data_params, "DataSnapshot", lambda *args: object())
+    data_params._snapshot.cache_clear()
+
+    snapshot = data_params.snapshot(TICKERS, DATE)
+    assert data_params.snapshot(TICKERS, DATE) is snapshot
+    assert data_params.snapshot(TICKERS, DATE) is not snapshot
+
+    data_params._snapshot.cache_clear()
@@ -41,3 +41,15 @@ class TestMCFTRR:
 
     def test_type_and_size(self, feature):
         assert feature.type_and_size == (FeatureType.SEQUENCE, 8)
+
+
+def test_shared_storage():
+    params = data_params.TrainParams(("POGR", "LKOH"), pd.Timestamp("2020-11-03"), PARAMS)
+    pogr = mcftrr.MCFTRR("POGR", params)
+    lkoh = mcftrr.MCFTRR("LKOH", params)
+
+    assert pogr.mcftrr is lkoh.mcftrr
+    assert len(pogr.mcftrr) == params.days
+    assert len(pogr.window_parts().value) == len(params.price("POGR"))
+    shift = params.offset("POGR") - params.offset("LKOH")
+    assert pogr.materialize().value.data_ptr() == lkoh.materialize().value[shift:].data_ptr()
@@ -45,3 +45,11 @@ class TestLabel:
 
     def test_type_and_size(self, feature):
         assert feature.type_and_size == (FeatureType.SEQUENCE, 8)
+
+    def test_materialize(self, feature):
+        windows = feature.materialize()
+        assert windows is feature.materialize()
+        assert windows.value.shape[1] == 8
+        assert windows.value.data_ptr() == feature.window_parts().value.data_ptr()
+        expected = (windows.value[49] - windows.shift[49]) / windows.scale[49]
+        assert expected.allclose(feature[49])
@@ -0,0 +1,125 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from poptimizer.dl.features import store
+
+TICKERS = ("AKRN", "GMKN")
+DATES = pd.date_range("2021-03-01", periods=6, freq="B", name="DATE")
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    values = np.arange(rows * 2, dtype=float).reshape(rows, 2)
+    values[0, 1] = np.nan
+    return pd.DataFrame(values, index=DATES[:rows], columns=list(TICKERS))
+
+
+@pytest.fixture(name="loads")
+def count_loads():
+    return []
+
+
+def loader(data, loads):
+    def load():
+        loads.append(1)
+        return data
+
+    return load
+
+
+def test_load_once_per_end(tmp_path, loads):
+    df = make_frame(4)
+
+    first = store.Store(TICKERS, DATES[3], path=tmp_path).load("prices", loader(df, loads))
+    second = store.Store(TICKERS, DATES[3], path=tmp_path).load("prices", loader(df, loads))
+
+    assert len(loads) == 1
+    pd.testing.assert_frame_equal(first, df, check_freq=False)
+    pd.testing.assert_frame_equal(second, df, check_freq=False)
+
+
+def test_append_new_rows(tmp_path, loads):
+    store.Store(TICKERS, DATES[3], path=tmp_path).load("prices", loader(make_frame(4), loads))
+    values_path = next(tmp_path.glob("*/prices/*/values"))
+    inode = values_path.stat().st_ino
+
+    df = make_frame(6)
+    extended = store.Store(TICKERS, DATES[5], path=tmp_path).load("prices", loader(df, loads))
+
+    assert values_path.stat().st_ino == inode
+    pd.testing.assert_frame_equal(extended, df, check_freq=False)
+
+
+def test_rewrite_changed_rows(tmp_path, loads):
+    old = store.Store(TICKERS, DATES[3], path=tmp_path).load("prices", loader(make_frame(4), loads))
+    values_path = next(tmp_path.glob("*/prices/*/values"))
+
+    df = make_frame(6)
+    df.iloc[1, 0] = 100
+    rewritten = store.Store(TICKERS, DATES[5], path=tmp_path).load("prices", loader(df, loads))
+
+    assert json.loads(next(tmp_path.glob("*/prices.json")).read_text())["version"] != values_path.parent.name
+    pd.testing.assert_frame_equal(rewritten, df, check_freq=False)
+    pd.testing.assert_frame_equal(old, make_frame(4), check_freq=False)
+
+
+def test_reload_changed_sources(tmp_path, loads):
+    df = make_frame(4)
+    store.Store(TICKERS, DATES[3], (1, 2), tmp_path).load("prices", loader(df, loads))
+    store.Store(TICKERS, DATES[3], (1, 2), tmp_path).load("prices", loader(df, loads))
+    assert len(loads) == 1
+
+    df = df * 2
+    reloaded = store.Store(TICKERS, DATES[3], (1, 3), tmp_path).load("prices", loader(df, loads))
+
+    assert len(loads) == 2
+    pd.testing.assert_frame_equal(reloaded, df, check_freq=False)
+
+
+def test_reopen_pruned_version(tmp_path, loads):
+    stale = store.Store(TICKERS, DATES[3], path=tmp_path)
+    stale.load("prices", loader(make_frame(4), loads))
+    meta = stale._meta("prices")
+
+    for n_rows in (5, 6):
+        df = make_frame(n_rows)
+        df.iloc[1, 0] = n_rows
+        store.Store(TICKERS, DATES[n_rows - 1], path=tmp_path).load("prices", loader(df, loads))
+
+    assert not (tmp_path / stale._path.name / "prices" / meta["version"]).exists()
+    pd.testing.assert_frame_equal(stale._open_actual("prices", meta), df.iloc[:4], check_freq=False)
+
+
+def test_series_and_old_end(tmp_path, loads):
+    series = make_frame(6)[TICKERS[0]]
+    store.Store(TICKERS, DATES[5], path=tmp_path).load("index", loader(series, loads))
+
+    loaded = store.Store(TICKERS, DATES[2], path=tmp_path).load("index", loader(series.iloc[:3], loads))
+
+    assert len(loads) == 1
+    pd.testing.assert_series_equal(loaded, series.iloc[:3], check_freq=False)
+
+    old = series.iloc[:3] * 2
+    loaded = store.Store(TICKERS, DATES[2], (1,), tmp_path).load("index", loader(old, loads))
+
+    assert loaded is old
+    loaded = store.Store(TICKERS, DATES[5], path=tmp_path).load("index", loader(old, loads))
+    pd.testing.assert_series_equal(loaded, series, check_freq=False)
+    assert len(loads) == 2
+
+
+def test_prune(tmp_path, loads):
+    expired = tmp_path / "expired"
+    expired.mkdir()
+    os.utime(expired, (0, 0))
+
+    for n_rows in (4, 5, 6):
+        df = make_frame(n_rows)
+        df.iloc[1, 0] = n_rows
+        store.Store(TICKERS, DATES[n_rows - 1], path=tmp_path).load("prices", loader(df, loads))
+
+    assert len(list(tmp_path.glob("*/prices/*"))) == 2
+    assert not expired.exists()
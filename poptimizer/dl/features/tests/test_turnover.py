@@ -52,17 +52,17 @@ class TestTurnover:
         assert turnover_cntlp.type_and_size == (FeatureType.SEQUENCE, 8)
 
 
-@pytest.fixture(scope="class")
-def clean_cache(params):
-    del params.cache[turnover.TURNOVER]
-    del params.cache[turnover.AVERAGE_TURNOVER]
-
-
 @pytest.fixture(scope="function", name="avr_lkoh")
 def make_turnover_lkoh(params):
     yield turnover.AverageTurnover("LKOH", params)
 
 
+@pytest.fixture(scope="function", name="avr_lkoh_no_cache")
+def make_turnover_lkoh_no_cache(params):
+    data_params._snapshot.cache_clear()
+    yield turnover.AverageTurnover("LKOH", data_params.TestParams(params.tickers, params.end, PARAMS))
+
+
 class TestAverageTurnover:
     def test_getitem(self, avr_lkoh):
         assert avr_lkoh[0].shape == torch.Size([8])
@@ -81,8 +81,8 @@ class TestAverageTurnover:
         assert torch.tensor(22.8645569305271).allclose(avr_lkoh[236][7])
 
     # noinspection DuplicatedCode
-    @pytest.mark.usefixtures("clean_cache")
-    def test_getitem_no_cache(self, avr_lkoh):
+    def test_getitem_no_cache(self, avr_lkoh_no_cache):
+        avr_lkoh = avr_lkoh_no_cache
         assert avr_lkoh[0].shape == torch.Size([8])
         assert torch.tensor(21.4069205180786).allclose(avr_lkoh[0][0])
         assert torch.tensor(20.9764804037646).allclose(avr_lkoh[0][5])
@@ -5,7 +5,7 @@ import torch
 
 from poptimizer.config import DEVICE
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 
 
 class Ticker(Feature):
@@ -16,9 +16,12 @@ class Ticker(Feature):
         tickers = params.tickers
         self._num_tickers = len(tickers)
         self._idx = torch.tensor(tickers.index(ticker), dtype=torch.long, device=DEVICE)
+        self._days = len(params.price(ticker))
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self._idx
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        value = self._idx.expand(self._days)
+        return WindowParts(value, torch.zeros_like(value), torch.ones_like(value))
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
@@ -6,7 +6,7 @@ import torch
 from poptimizer.config import DEVICE
 from poptimizer.data.views import listing
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, WindowParts
 from poptimizer.shared import col
 
 
@@ -22,9 +22,12 @@ class TickerType(Feature):
         super().__init__(ticker, params)
         ticker_type = listing.ticker_types()[ticker]
         self._ticker_type = torch.tensor(ticker_type, dtype=torch.long, device=DEVICE)
+        self._days = len(params.price(ticker))
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self._ticker_type
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        value = self._ticker_type.expand(self._days)
+        return WindowParts(value, torch.zeros_like(value), torch.ones_like(value))
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
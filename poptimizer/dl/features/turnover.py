@@ -2,39 +2,42 @@
 from typing import Tuple
 
 import numpy as np
+import pandas as pd
 import torch
 
 import poptimizer.data.views.quotes
-from poptimizer.config import DEVICE
 from poptimizer.data.views import listing
 from poptimizer.dl.features.data_params import DataParams
-from poptimizer.dl.features.feature import Feature, FeatureType
+from poptimizer.dl.features.feature import Feature, FeatureType, MarketFeature, WindowParts
 
-# Ключ для хранения данных оборота в кеше параметров данных
+# Ключи для хранения данных оборота
 TURNOVER = "turnover"
 AVERAGE_TURNOVER = "average_turnover"
 
 
+def _load_turnover(params: DataParams) -> pd.DataFrame:
+    return poptimizer.data.views.quotes.turnovers(params.tickers, params.end)
+
+
+def _average_turnover(params: DataParams) -> pd.Series:
+    turnover = params.stored(TURNOVER, lambda: _load_turnover(params)).mean(axis=1)
+
+    return turnover.apply(np.log1p)
+
+
 class Turnover(Feature):
     """Динамика логарифма 1 + оборот."""
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
 
-        cache = params.cache
-        if (turnover := cache.get(TURNOVER)) is None:
-            turnover = poptimizer.data.views.quotes.turnovers(params.tickers, params.end)
-            cache[TURNOVER] = turnover
-
-        turnover = turnover[ticker]
-        price = params.price(ticker)
-        turnover = turnover.reindex(price.index, axis=0)
-        turnover = torch.tensor(turnover.values, dtype=torch.float, device=DEVICE)
+        turnover = params.panel(TURNOVER, ticker, lambda: _load_turnover(params), ffill=False)
         self.turnover = torch.log1p(turnover)
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.turnover[item : item + self.history_days]
+    def window_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака сразу для всех примеров тикера."""
+        return WindowParts(self.turnover, torch.zeros_like(self.turnover), torch.ones_like(self.turnover))
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
@@ -42,7 +45,7 @@ class Turnover(Feature):
         return FeatureType.SEQUENCE, self.history_days
 
 
-class AverageTurnover(Feature):
+class AverageTurnover(MarketFeature):
     """Динамика логарифма 1 + среднего оборота всех бумаг портфеля.
 
     Использование этого фактора совместно с фактором оборота позволяет выделять вспышки оборота
@@ -51,23 +54,12 @@ class AverageTurnover(Feature):
 
     def __init__(self, ticker: str, params: DataParams):
         super().__init__(ticker, params)
-
-        cache = params.cache
-        if (turnover := cache.get(AVERAGE_TURNOVER)) is None:
-            if (turnover := cache.get(TURNOVER)) is None:
-                turnover = poptimizer.data.views.quotes.turnovers(params.tickers, params.end)
-                cache[TURNOVER] = turnover
-            turnover = turnover.mean(axis=1)
-            turnover = turnover.apply(np.log1p)
-            cache[AVERAGE_TURNOVER] = turnover
-
-        price = params.price(ticker)
-        turnover = turnover.reindex(price.index, axis=0)
-        self.turnover = torch.tensor(turnover.values, dtype=torch.float, device=DEVICE)
+        self.turnover = params.market(AVERAGE_TURNOVER, lambda: _average_turnover(params), ffill=False)
         self.history_days = params.history_days
 
-    def __getitem__(self, item: int) -> torch.Tensor:
-        return self.turnover[item : item + self.history_days]
+    def market_parts(self) -> WindowParts:
+        """Ряды для формирования значений признака на всех датах параметров данных."""
+        return WindowParts(self.turnover, torch.zeros_like(self.turnover), torch.ones_like(self.turnover))
 
     @property
     def type_and_size(self) -> Tuple[FeatureType, int]:
@@ -1,4 +1,7 @@
 """Ledoit & Wolf constant correlation unequal variance shrinkage estimator."""
+import functools
+from typing import Optional
+
 import numpy as np
 import pandas as pd
 
@@ -25,11 +28,38 @@ def shrinkage(returns: np.array) -> tuple[np.array, float, float]:
     :return:
         Covariance matrix, sample average correlation, shrinkage.
     """
-    t, n = returns.shape
-    mean_returns = np.mean(returns, axis=0, keepdims=True)
-    returns -= mean_returns
+    t, _ = returns.shape
+    returns = returns - np.mean(returns, axis=0, keepdims=True)
     sample_cov = returns.transpose() @ returns / t
 
+    y = returns ** 2
+    squares = (y.transpose() @ y) / t
+    cubes = ((returns ** 3).transpose() @ returns) / t
+
+    return _shrink(t, sample_cov, squares, cubes)
+
+
+def _shrink(
+    t: int,
+    sample_cov: np.array,
+    squares: np.array,
+    cubes: np.array,
+) -> tuple[np.array, float, float]:
+    """Shrinkage by sample covariance and averages of centered returns products.
+
+    :param t:
+        Number of observations.
+    :param sample_cov:
+        Sample covariance matrix.
+    :param squares:
+        Averages of squared returns products.
+    :param cubes:
+        Averages of cubed returns and returns products.
+    :return:
+        Covariance matrix, sample average correlation, shrinkage.
+    """
+    n = len(sample_cov)
+
     # sample average correlation
     var = np.diag(sample_cov).reshape(-1, 1)
     sqrt_var = var ** 0.5
@@ -39,12 +69,11 @@ def shrinkage(returns: np.array) -> tuple[np.array, float, float]:
     np.fill_diagonal(prior, var)
 
     # pi-hat
-    y = returns ** 2
-    phi_mat = (y.transpose() @ y) / t - sample_cov ** 2
+    phi_mat = squares - sample_cov ** 2
     phi = phi_mat.sum()
 
     # rho-hat
-    theta_mat = ((returns ** 3).transpose() @ returns) / t - var * sample_cov
+    theta_mat = cubes - var * sample_cov
     np.fill_diagonal(theta_mat, 0)
     rho = np.diag(phi_mat).sum() + average_cor * (1 / sqrt_var @ sqrt_var.transpose() * theta_mat).sum()
 
@@ -61,18 +90,166 @@ def shrinkage(returns: np.array) -> tuple[np.array, float, float]:
     return sigma, average_cor, shrink
 
 
+class _WindowMoments:
+    """Суммы степеней доходностей и их попарных произведений для окна доходностей.
+
+    Суммы считаются для доходностей, центрированных на среднее окна при последнем полном пересчете, чтобы
+    избежать потери точности при выражении центральных моментов через суммы степеней. При сдвиге окна или
+    изменении его длины суммы обновляются только на добавленные и удаленные строки, если общие строки не
+    изменились. Суммы пересчитываются заново, когда количество обновленных строк превышает длину окна или
+    среднее окна смещается от точки центрирования больше чем на СКО.
+    """
+
+    def __init__(self) -> None:
+        self._window: Optional[pd.DataFrame] = None
+        self._center: Optional[np.array] = None
+        self._sums: dict[str, np.array] = {}
+        self._updates = 0
+
+    def move(self, window: pd.DataFrame) -> dict[str, np.array]:
+        """Суммы для нового окна центрированных доходностей."""
+        old = self._window
+        self._window = window
+
+        if old is None or not old.columns.equals(window.columns):
+            return self._reset(window)
+
+        overlap = old.index.intersection(window.index)
+        removed = old.index.difference(window.index)
+        added = window.index.difference(old.index)
+        updates = self._updates + len(removed) + len(added)
+
+        if overlap.empty or updates > len(window):
+            return self._reset(window)
+        if not np.array_equal(old.loc[overlap].to_numpy(), window.loc[overlap].to_numpy()):
+            return self._reset(window)
+
+        added_sums = _power_sums(window.loc[added].to_numpy() - self._center)
+        removed_sums = _power_sums(old.loc[removed].to_numpy() - self._center)
+        sums = {key: sums + added_sums[key] - removed_sums[key] for key, sums in self._sums.items()}
+
+        mean = sums["s1"] / sums["t"]
+        if np.any(mean ** 2 > sums["s2"] / sums["t"] - mean ** 2):
+            return self._reset(window)
+
+        self._sums = sums
+        self._updates = updates
+
+        return self._sums
+
+    def _reset(self, window: pd.DataFrame) -> dict[str, np.array]:
+        rows = window.to_numpy()
+        self._center = rows.mean(axis=0)
+        self._sums = _power_sums(rows - self._center)
+        self._updates = 0
+
+        return self._sums
+
+
+def _power_sums(rows: np.array) -> dict[str, np.array]:
+    """Суммы степеней доходностей до третьей и попарных произведений степеней до четвертой."""
+    squares = rows ** 2
+    cubes = squares * rows
+
+    return dict(
+        t=np.array(len(rows), dtype=float),
+        s1=rows.sum(axis=0),
+        s2=squares.sum(axis=0),
+        s3=cubes.sum(axis=0),
+        p11=rows.transpose() @ rows,
+        p21=squares.transpose() @ rows,
+        p22=squares.transpose() @ squares,
+        p31=cubes.transpose() @ rows,
+    )
+
+
+def _moments_shrinkage(sums: dict[str, np.array]) -> tuple[np.array, float, float]:
+    """Shrinkage нормированных доходностей по суммам степеней доходностей, сдвинутых на константу.
+
+    Центральные моменты не зависят от сдвига и выражаются через суммы степеней, а нормировка на СКО
+    сводится к делению на произведения СКО соответствующих степеней.
+    """
+    t = sums["t"]
+    s1 = sums["s1"]
+    p11, p21 = sums["p11"], sums["p21"]
+
+    mean = (s1 / t).reshape(-1, 1)
+    mean_t = mean.transpose()
+
+    c11 = p11 - t * mean * mean_t
+
+    c22 = sums["p22"] - 2 * mean_t * p21 - 2 * mean * p21.transpose() + 4 * mean * mean_t * p11
+    c22 += mean_t ** 2 * sums["s2"].reshape(-1, 1) + mean ** 2 * sums["s2"].reshape(1, -1)
+    c22 -= 2 * mean * mean_t ** 2 * s1.reshape(-1, 1) + 2 * mean ** 2 * mean_t * s1.reshape(1, -1)
+    c22 += t * mean ** 2 * mean_t ** 2
+
+    c3 = sums["s3"].reshape(-1, 1) - 3 * mean * sums["s2"].reshape(-1, 1) + 3 * mean ** 2 * s1.reshape(-1, 1)
+    c3 -= t * mean ** 3
+    c31 = sums["p31"] - 3 * mean * p21 + 3 * mean ** 2 * p11 - mean ** 3 * s1.reshape(1, -1) - mean_t * c3
+
+    std = (np.diag(c11).reshape(-1, 1) / t) ** 0.5
+    std_t = std.transpose()
+
+    sample_cov = c11 / t / (std * std_t)
+    squares = c22 / t / (std * std_t) ** 2
+    cubes = c31 / t / (std ** 3 * std_t)
+
+    return _shrink(int(t), sample_cov, squares, cubes)
+
+
+@functools.lru_cache(maxsize=4)
+def _moments(tickers: tuple[str, ...]) -> _WindowMoments:
+    """Суммы для последнего окна доходностей нескольких последних наборов тикеров."""
+    return _WindowMoments()
+
+
+@functools.lru_cache(maxsize=4)
+def _returns(tickers: tuple[str, ...], date: pd.Timestamp, timestamps: tuple) -> pd.DataFrame:
+    """Доходности с учетом дивидендов за вычетом единицы для уменьшения ошибок округления в суммах степеней.
+
+    Время обновления таблиц с котировками и дивидендами используется только в ключе кеша.
+    """
+    div, p1 = quotes.div_and_prices(tickers, date)
+    p0 = p1.shift(1)
+
+    return (p1 + div) / p0 - 1
+
+
 def ledoit_wolf_cor(
     tickers: tuple,
     date: pd.Timestamp,
     history_days: int,
     forecast_days: int = 0,
 ) -> tuple[np.array, float, float]:
-    """Корреляционная матрица на основе Ledoit Wolf."""
-    div, p1 = quotes.div_and_prices(tickers, date)
-    p0 = p1.shift(1)
-    returns = (p1 + div) / p0
+    """Корреляционная матрица на основе Ledoit Wolf.
+
+    Результаты кешируются до обновления таблиц с котировками и дивидендами, а при расчете для нового окна
+    суммы степеней доходностей обновляются только на разницу с предыдущим окном для тех же тикеров.
+    Возвращаемая матрица доступна только для чтения.
+    """
+    return _ledoit_wolf_cor(tickers, date, history_days, forecast_days, quotes.timestamps(tickers))
+
+
+@functools.lru_cache(maxsize=256)
+def _ledoit_wolf_cor(
+    tickers: tuple,
+    date: pd.Timestamp,
+    history_days: int,
+    forecast_days: int,
+    timestamps: tuple,
+) -> tuple[np.array, float, float]:
+    """Корреляционная матрица — время обновления таблиц используется в ключе кеша."""
+    returns = _returns(tickers, date, timestamps)
     returns = returns.iloc[-history_days - forecast_days :]
     returns = returns.iloc[:history_days]
-    returns = (returns - returns.mean()) / returns.std(ddof=0)
 
-    return shrinkage(returns.values)
+    if returns.isna().to_numpy().any():
+        returns = (returns - returns.mean()) / returns.std(ddof=0)
+        sigma, average_cor, shrink = shrinkage(returns.to_numpy())
+    else:
+        sums = _moments(tickers).move(returns)
+        sigma, average_cor, shrink = _moments_shrinkage(sums)
+
+    sigma.flags.writeable = False
+
+    return sigma, average_cor, shrink
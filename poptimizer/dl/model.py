@@ -1,7 +1,9 @@
 """Тренировка модели."""
 import collections
+import copy
 import io
 import itertools
+import json
 import logging
 import sys
 from typing import Final, Optional, Callable
@@ -11,13 +13,14 @@ import pandas as pd
 import torch
 import tqdm
 from scipy import optimize
-from torch import nn, optim
+from torch import distributions, func, nn, optim
 
 from poptimizer import config
 from poptimizer.config import DEVICE, YEAR_IN_TRADING_DAYS
-from poptimizer.dl import data_loader, ledoit_wolf, models, PhenotypeData
+from poptimizer.dl import cost, data_loader, ledoit_wolf, models, PhenotypeData
 from poptimizer.dl.features import data_params
 from poptimizer.dl.forecast import Forecast
+from poptimizer.dl.models import wave_net
 from poptimizer.dl.models.wave_net import GradientsError, ModelError
 
 
@@ -27,11 +30,18 @@ LLH_DRAW_DOWN = 1
 # Максимальный размер документа в MongoDB
 MAX_DOC_SIZE: Final = 2 * (2 ** 10) ** 2
 
-# Максимальный размер батча GB
-MAX_BATCH_SIZE: Final = 197
-
 DAY_IN_SECONDS: Final = 24 * 60 ** 2
 
+# Доли шагов обучения, на которых кривая обучения сравнивается с кривыми организмов популяции
+PRUNING_CHECKPOINTS: Final = (0.25, 0.5, 0.75)
+# Минимальное количество кривых для сравнения и их квантиль, ниже которого обучение прерывается
+PRUNING_MIN_CURVES: Final = 4
+PRUNING_QUANTILE: Final = 0.25
+
+# Точность оптимизации весов портфеля — с аналитическим градиентом дополнительные итерации дешевы
+UTILITY_FTOL: Final = 1e-14
+UTILITY_GTOL: Final = 1e-10
+
 LOGGER = logging.getLogger()
 
 
@@ -53,6 +63,10 @@ class DegeneratedModelError(ModelError):
     """В модели отключены все признаки."""
 
 
+class TrainingPrunedError(ModelError):
+    """Обучение безнадежно отстает от организмов популяции, обученных для той же даты."""
+
+
 def log_normal_llh_mix(
     model: nn.Module,
     batch: dict[str, torch.Tensor],
@@ -73,6 +87,9 @@ class Model:
         end: pd.Timestamp,
         phenotype: data_loader.PhenotypeData,
         pickled_model: Optional[bytes] = None,
+        warm_model: Optional[bytes] = None,
+        peer_curves: Optional[list[list[float]]] = None,
+        interrupt: Optional[Callable[[], None]] = None,
     ):
         """Сохраняет необходимые данные.
 
@@ -84,11 +101,23 @@ class Model:
             Параметры данных, модели, оптимизатора и политики обучения.
         :param pickled_model:
             Сохраненные параметры для натренированной модели.
+        :param warm_model:
+            Сохраненные параметры модели, обученной до предыдущей даты, с которых начинается сокращенное
+            обучение вместо обучения с нуля.
+        :param peer_curves:
+            Кривые обучения организмов популяции, обученных для той же даты, для прерывания безнадежно
+            отстающего обучения.
+        :param interrupt:
+            Вызывается на каждом шаге обучения и может прервать его исключением.
         """
         self._tickers = tickers
         self._end = end
         self._phenotype = phenotype
         self._pickled_model = pickled_model
+        self._warm_model = warm_model
+        self._peer_curves = peer_curves or []
+        self._interrupt = interrupt or _never_interrupt
+        self._learning_curve = []
         self._model = None
         self._llh = None
 
@@ -106,6 +135,11 @@ class Model:
         torch.save(state_dict, buffer)
         return buffer.getvalue()
 
+    @property
+    def learning_curve(self) -> list[float]:
+        """LLH обучения на контрольных долях шагов обучения."""
+        return self._learning_curve
+
     @property
     def quality_metrics(self) -> tuple[float, float]:
         """Логарифм правдоподобия."""
@@ -132,15 +166,10 @@ class Model:
         Прогнозы пересчитываются в дневное выражение для сопоставимости и вычисляется логарифм
         правдоподобия. Модель загружается при наличии сохраненных весов или обучается с нуля.
         """
-        loader = data_loader.DescribedDataLoader(
-            self._tickers,
-            self._end,
-            self._phenotype["data"],
-            data_params.TestParams,
-        )
+        loader = self._make_loader(data_params.TestParams)
 
         n_tickers = len(self._tickers)
-        days, rez = divmod(len(loader.dataset), n_tickers)
+        days, rez = divmod(loader.examples, n_tickers)
         if rez:
             history = int(self._phenotype["data"]["history_days"])
 
@@ -186,6 +215,19 @@ class Model:
 
         return llh, ir
 
+    def _make_loader(self, params_type: type[data_params.DataParams]) -> data_loader.DescribedDataLoader:
+        """Загрузчик данных с формой батчей, которую использует модель."""
+        model_type = getattr(models, self._phenotype["type"])
+
+        return data_loader.DescribedDataLoader(
+            self._tickers,
+            self._end,
+            self._phenotype["data"],
+            params_type,
+            batched=True,
+            cross_section=model_type.cross_section,
+        )
+
     def _load_trained_model(
         self,
         pickled_model: bytes,
@@ -212,16 +254,19 @@ class Model:
         return model
 
     def _train_model(self) -> nn.Module:
-        """Тренировка модели."""
+        """Тренировка модели.
+
+        Модели, для которых предсказанная память шага обучения превышает доступную, отбрасываются до
+        загрузки данных, а модели со слишком большим предсказанным временем обучения — до его начала.
+        """
         phenotype = self._phenotype
 
+        step_cost = cost.step_cost(phenotype)
+        if (memory := step_cost.memory) > (budget := cost.memory_budget()):
+            raise TooLargeModelError(f"Память шага {memory / 2 ** 30:.1f}Gb > {budget / 2 ** 30:.1f}Gb")
+
         try:
-            loader = data_loader.DescribedDataLoader(
-                self._tickers,
-                self._end,
-                phenotype["data"],
-                data_params.TrainParams,
-            )
+            loader = self._make_loader(data_params.TrainParams)
         except ValueError:
             history = int(self._phenotype["data"]["history_days"])
 
@@ -231,25 +276,33 @@ class Model:
             raise DegeneratedModelError("Отсутствуют активные признаки в генотипе")
 
         model = self._make_untrained_model(loader)
+        scheduler_params = dict(phenotype["scheduler"])
+        epochs = scheduler_params.pop("epochs")
+        scheduler_params.pop("warm_start", None)
+        warm_epochs = scheduler_params.pop("warm_epochs", 1)
+        if self._warm_model is not None:
+            _load_compatible(model, self._warm_model)
+            epochs *= warm_epochs
+
         model.to(DEVICE)
         optimizer = optim.AdamW(model.parameters(), **phenotype["optimizer"])
 
         steps_per_epoch = len(loader)
-        scheduler_params = dict(phenotype["scheduler"])
-        epochs = scheduler_params.pop("epochs")
         total_steps = 1 + int(steps_per_epoch * epochs)
         scheduler_params["total_steps"] = total_steps
         scheduler = optim.lr_scheduler.OneCycleLR(optimizer, **scheduler_params)
 
-        LOGGER.info(f"Epochs - {epochs:.2f} / Train size - {len(loader.dataset)}")
+        train_seconds = step_cost.seconds * total_steps
+        if train_seconds > DAY_IN_SECONDS:
+            raise DegeneratedModelError(f"Прогнозное время тренировки: {train_seconds:.0f} > {DAY_IN_SECONDS}")
+
+        LOGGER.info(
+            f"Epochs - {epochs:.2f} / Train size - {loader.examples} / Прогноз времени - {train_seconds:.0f}с",
+        )
         modules = sum(1 for _ in model.modules())
         model_params = sum(tensor.numel() for tensor in model.parameters())
         LOGGER.info(f"Количество слоев / параметров - {modules} / {model_params}")
 
-        batch_size = (model_params * 4) * self._phenotype["data"]["batch_size"] / (2 ** 10) ** 3
-        if batch_size > MAX_BATCH_SIZE:
-            raise TooLargeModelError(f"Размер батча {batch_size:.0f} > {MAX_BATCH_SIZE}Gb")
-
         llh_sum = 0
         llh_deque = collections.deque([0], maxlen=steps_per_epoch)
         weight_sum = 0
@@ -259,12 +312,14 @@ class Model:
         loader = itertools.repeat(loader)
         loader = itertools.chain.from_iterable(loader)
         loader = itertools.islice(loader, total_steps)
+        checkpoints = [int(total_steps * share) for share in PRUNING_CHECKPOINTS]
 
         model.train()
         bars = tqdm.tqdm(loader, file=sys.stdout, total=total_steps, desc="~~> Train")
         llh_min = None
         llh_adj = np.log(data_params.FORECAST_DAYS) / 2
-        for batch in bars:
+        for step, batch in enumerate(bars, 1):
+            self._interrupt()
             optimizer.zero_grad()
 
             loss, means, _ = loss_fn(model, batch)
@@ -294,32 +349,53 @@ class Model:
             if not (llh > llh_min):
                 raise GradientsError(f"LLH снизилось - начальное: {llh_min + LLH_DRAW_DOWN:0.5f}")
 
+            if step in checkpoints:
+                self._prune(llh)
+
         return model
 
+    def _prune(self, llh: float) -> None:
+        """Сохраняет точку кривой обучения и прерывает обучение при отставании от кривых популяции.
+
+        Для прерванных ранее обучений используется их последняя точка, чтобы порог не завышался за счет
+        отбрасывания отстающих кривых.
+        """
+        point = len(self._learning_curve)
+        self._learning_curve.append(float(llh))
+
+        peers = [curve[min(point, len(curve) - 1)] for curve in self._peer_curves if curve]
+        if len(peers) < PRUNING_MIN_CURVES:
+            return
+
+        if llh < (bound := np.quantile(peers, PRUNING_QUANTILE)):
+            raise TrainingPrunedError(f"LLH в контрольной точке {point + 1}: {llh:0.5f} < {bound:0.5f}")
+
+    @property
+    def architecture(self) -> str:
+        """Ключ архитектуры модели.
+
+        Модели с одинаковым ключом используют одинаковые данные для прогноза и имеют параметры одинаковой
+        формы, поэтому могут прогнозировать совместно.
+        """
+        return architecture(self._phenotype)
+
     def forecast(self) -> Forecast:
         """Прогноз годовой доходности."""
-        loader = data_loader.DescribedDataLoader(
-            self._tickers,
-            self._end,
-            self._phenotype["data"],
-            data_params.ForecastParams,
-        )
+        loader = self._make_loader(data_params.ForecastParams)
 
         model = self.prepare_model(loader)
         model.to(DEVICE)
 
-        means = []
-        stds = []
         with torch.no_grad():
             model.eval()
-            for batch in loader:
-                dist = model.dist(batch)
+            dists = [model.dist(batch) for batch in loader]
 
-                means.append(dist.mean - torch.tensor(1.0))
-                stds.append(dist.variance ** 0.5)
+        return self._make_forecast(dists)
 
-        means = torch.cat(means, dim=0).cpu().numpy().flatten()
-        stds = torch.cat(stds, dim=0).cpu().numpy().flatten()
+    def _make_forecast(self, dists: list[distributions.Distribution]) -> Forecast:
+        """Прогноз годовой доходности по распределениям для батчей прогнозных данных."""
+        means = torch.cat([dist.mean - torch.tensor(1.0) for dist in dists], dim=0).cpu().numpy().flatten()
+        stds = torch.cat([dist.variance ** 0.5 for dist in dists], dim=0).cpu().numpy().flatten()
 
         means = pd.Series(means, index=list(self._tickers))
         means = means.mul(YEAR_IN_TRADING_DAYS / data_params.FORECAST_DAYS)
@@ -338,6 +414,66 @@ class Model:
         )
 
 
+def _load_compatible(model: nn.Module, pickled_model: bytes) -> None:
+    """Загружает сохраненные параметры, совпадающие по названию и форме с параметрами модели.
+
+    Форма части параметров, например, эмбедингов тикеров, может отличаться при изменении их состава —
+    такие параметры остаются случайными.
+    """
+    state_dict = model.state_dict()
+    saved = torch.load(io.BytesIO(pickled_model))
+    state_dict.update(
+        (key, tensor) for key, tensor in saved.items() if key in state_dict and tensor.shape == state_dict[key].shape
+    )
+    model.load_state_dict(state_dict)
+
+
+def _never_interrupt() -> None:
+    """Обучение не прерывается."""
+
+
+def architecture(phenotype: data_loader.PhenotypeData) -> str:
+    """Ключ архитектуры модели с заданным фенотипом, не требующий создания модели."""
+    data = {key: param for key, param in phenotype["data"].items() if key != "batch_size"}
+
+    return json.dumps([phenotype["type"], phenotype["model"], data], sort_keys=True, default=str)
+
+
+def ensemble_forecasts(ensemble: list[Model]) -> list[Forecast]:
+    """Прогнозы моделей с одинаковой архитектурой для одних тикеров и даты.
+
+    Прогнозные данные загружаются один раз, а параметры моделей объединяются, поэтому для каждого батча
+    выполняется один векторизованный по моделям расчет вместо отдельного расчета для каждой модели.
+    """
+    if len(ensemble) == 1:
+        return [ensemble[0].forecast()]
+
+    loader = ensemble[0]._make_loader(data_params.ForecastParams)
+    nets = [member.prepare_model(loader).to(DEVICE) for member in ensemble]
+    params, buffers = func.stack_module_state(nets)
+
+    base = copy.deepcopy(nets[0]).to("meta")
+    base.eval()
+
+    def forward(
+        net_params: dict[str, torch.Tensor],
+        net_buffers: dict[str, torch.Tensor],
+        batch: dict[str, torch.Tensor],
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        return func.functional_call(base, (net_params, net_buffers), (batch,))
+
+    forward = func.vmap(forward, in_dims=(0, 0, None))
+
+    dists = [[] for _ in ensemble]
+    with torch.no_grad():
+        for batch in loader:
+            logits, mean, std = forward(params, buffers, batch)
+            for n_member, member_dists in enumerate(dists):
+                member_dists.append(wave_net.mixture(logits[n_member], mean[n_member], std[n_member]))
+
+    return [member._make_forecast(member_dists) for member, member_dists in zip(ensemble, dists)]
+
+
 def _opt_port(
     mean: np.array,
     var: np.array,
@@ -406,23 +542,35 @@ def _opt_weight(
     std = variance ** 0.5
     sigma = std.reshape(1, -1) * sigma * std.reshape(-1, 1)
 
+    return _max_utility(phenotype, mean, sigma), sigma
+
+
+def _max_utility(phenotype: PhenotypeData, mean: np.array, sigma: np.array) -> np.array:
+    """Веса портфеля с максимальной полезностью.
+
+    Оптимизация ведется по ненормированным неотрицательным весам с аналитическим градиентом, поэтому
+    каждая итерация требует одного расчета полезности вместо расчета по каждому активу для численного
+    градиента.
+    """
     w = np.ones_like(mean).flatten()
 
     rez = optimize.minimize(
         _make_utility_func(phenotype, mean, sigma),
         w,
+        jac=True,
         bounds=[(0, None) for _ in w],
+        options=dict(ftol=UTILITY_FTOL, gtol=UTILITY_GTOL),
     )
 
-    return rez.x / rez.x.sum(), sigma
+    return rez.x / rez.x.sum()
 
 
 def _make_utility_func(
     phenotype: PhenotypeData,
     mean: np.array,
     sigma: np.array,
-) -> Callable[[float, float], float]:
-    """Функция полезности.
+) -> Callable[[np.array], tuple[float, np.array]]:
+    """Функция полезности и ее градиент.
 
     Оптимизация портфеля осуществляется с использованием функции полезности следующего вида:
 
@@ -433,15 +581,25 @@ def _make_utility_func(
 
     error_tolerance - величина минимальной требуемой величины коэффициента Шарпа или мера возможной достоверности оценок
     доходности. В рамках второй интерпретации происходит максимизация нижней границы доверительного интервала.
+
+    Функция зависит от нормированных весов, поэтому градиент по ненормированным весам равен градиенту по
+    нормированным за вычетом его проекции на нормированные веса, деленному на сумму весов.
     """
     risk_aversion = phenotype["utility"]["risk_aversion"]
     error_tolerance = phenotype["utility"]["error_tolerance"]
+    mean = mean.flatten()
+
+    def utility_func(w: np.array) -> tuple[float, np.array]:
+        w_sum = w.sum()
+        w = w / w_sum
+        ret = w @ mean
+        sigma_w = sigma @ w
+        variance = w @ sigma_w
+        std = variance ** 0.5
 
-    def utility_func(w: np.array) -> float:
-        w = w.reshape(-1, 1) / w.sum()
-        ret = (w.T @ mean).item()
-        variance = (w.T @ sigma @ w).item()
+        grad = -(mean - risk_aversion * sigma_w - error_tolerance * sigma_w / std)
+        grad = (grad - grad @ w) / w_sum
 
-        return -(ret - risk_aversion / 2 * variance - error_tolerance * variance ** 0.5)
+        return -(ret - risk_aversion / 2 * variance - error_tolerance * std), grad
 
     return utility_func
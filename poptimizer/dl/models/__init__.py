@@ -1,2 +1,3 @@
 """Модели для обучения."""
+from poptimizer.dl.models.cross_wave_net import CrossWaveNet
 from poptimizer.dl.models.wave_net import WaveNet
@@ -0,0 +1,171 @@
+"""Модель на основе WaveNet для сечений всех тикеров на одну дату."""
+from typing import Optional, Union
+
+import torch
+from torch import nn
+from torch.nn import functional
+
+from poptimizer.dl import features
+from poptimizer.dl.data_loader import MASK
+from poptimizer.dl.features import FeatureType
+from poptimizer.dl.models.wave_net import WaveNet
+
+
+def _moments(x: torch.Tensor, weights: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+    """Взвешенные по примерам среднее и смещенная дисперсия каналов для x размерностью [примеры, каналы, дни]."""
+    count = weights.sum() * x.shape[2]
+    mean = torch.einsum("r,rch->c", weights, x) / count
+    var = torch.einsum("r,rch->c", weights, (x - mean.view(1, -1, 1)) ** 2) / count
+
+    return mean, var
+
+
+class CrossWaveNet(WaveNet):
+    """WaveNet для батчей из сечений всех тикеров на одну дату.
+
+    Рыночные признаки общие для всех тикеров, поэтому нормируются и проходят через начальную свертку
+    один раз для даты, а результат транслируется на все тикеры с примерами на эту дату. Дальнейшие
+    вычисления производятся только для тикеров с примерами и совпадают с WaveNet, а параметры обеих
+    моделей взаимозаменяемы. Распределения формируются в порядке дат и тикеров внутри даты, как и метки.
+    """
+
+    # Модель использует батчи из сечений всех тикеров по датам
+    cross_section = True
+
+    def __init__(
+        self,
+        history_days: int,
+        features_description: dict[str, tuple[FeatureType, int]],
+        **kwargs,
+    ) -> None:
+        """
+        :param history_days:
+            Количество дней в истории.
+        :param features_description:
+            Описание признаков.
+        :param kwargs:
+            Параметры WaveNet.
+        """
+        super().__init__(history_days, features_description, **kwargs)
+        self._history_days = history_days
+
+        sequence = [
+            key for key, (feature_type, _) in features_description.items() if feature_type is FeatureType.SEQUENCE
+        ]
+        self._market_keys = [key for key in sequence if issubclass(getattr(features, key), features.MarketFeature)]
+        self._ticker_keys = [key for key in sequence if key not in self._market_keys]
+        self._market_channels = [sequence.index(key) for key in self._market_keys]
+        self._ticker_channels = [sequence.index(key) for key in self._ticker_keys]
+
+    def _input(self, batch: dict[str, Union[torch.Tensor, list[torch.Tensor]]]) -> torch.Tensor:
+        """Объединение признаков во входные каналы сети размерностью [примеры тикеров, каналы, дни].
+
+        Признаки тикеров имеют размерность [даты, тикеры, ...], а рыночные — [даты, ...].
+        """
+        mask = batch[MASK]
+        y = torch.zeros(1, 1, 1, dtype=torch.float, device=mask.device)
+
+        if self._ticker_keys or self._market_keys:
+            y = self._start(batch, mask)
+
+        for key, (feature_type, _) in self._features_description.items():
+            if feature_type is FeatureType.EMBEDDING_SEQUENCE:
+                emb_seq = self.embedding_seq_dict[key](batch[key][mask])
+                emb_seq = emb_seq.permute((0, 2, 1))
+                y = emb_seq + y
+            if feature_type is FeatureType.EMBEDDING:
+                emb = self.embedding_dict[key](batch[key][mask])
+                emb = emb.unsqueeze(2)
+                y = emb + y
+
+        return y
+
+    def _start(self, batch: dict[str, torch.Tensor], mask: torch.Tensor) -> torch.Tensor:
+        """Нормировка и начальная свертка последовательностей.
+
+        Свертка линейна, поэтому вклад рыночных каналов считается для дат и добавляется к вкладу каналов
+        тикеров.
+        """
+        ticker_x = None
+        if self._ticker_keys:
+            ticker_x = torch.stack([batch[key][mask] for key in self._ticker_keys], dim=1)
+        market_x = None
+        if self._market_keys:
+            market_x = torch.stack([batch[key] for key in self._market_keys], dim=1)
+
+        ticker_x, market_x = self._norm(ticker_x, market_x, mask)
+
+        weight = self.start_conv.weight
+        y = self.start_conv.bias.view(1, -1, 1)
+        if ticker_x is not None:
+            y = functional.conv1d(ticker_x, weight[:, self._ticker_channels], self.start_conv.bias)
+        if market_x is not None:
+            market_y = functional.conv1d(market_x, weight[:, self._market_channels])
+            dates = mask.nonzero(as_tuple=True)[0]
+            y = market_y[dates] + y
+
+        return y
+
+    def _norm(
+        self,
+        ticker_x: Optional[torch.Tensor],
+        market_x: Optional[torch.Tensor],
+        mask: torch.Tensor,
+    ) -> tuple[Optional[torch.Tensor], Optional[torch.Tensor]]:
+        """BN, эквивалентная нормировке каналов с транслированными на все тикеры рыночными признаками.
+
+        Рыночные каналы дат при расчете статистик взвешиваются по количеству тикеров с примерами.
+        """
+        bn = self.bn
+        if not isinstance(bn, nn.BatchNorm1d):
+            return ticker_x, market_x
+
+        if bn.training:
+            mean, var = self._batch_moments(ticker_x, market_x, mask)
+        else:
+            mean, var = bn.running_mean, bn.running_var
+
+        scale = bn.weight / torch.sqrt(var + bn.eps)
+        shift = bn.bias - mean * scale
+
+        if ticker_x is not None:
+            channels = self._ticker_channels
+            ticker_x = ticker_x * scale[channels].view(1, -1, 1) + shift[channels].view(1, -1, 1)
+        if market_x is not None:
+            channels = self._market_channels
+            market_x = market_x * scale[channels].view(1, -1, 1) + shift[channels].view(1, -1, 1)
+
+        return ticker_x, market_x
+
+    def _batch_moments(
+        self,
+        ticker_x: Optional[torch.Tensor],
+        market_x: Optional[torch.Tensor],
+        mask: torch.Tensor,
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        """Статистики каналов для батча с обновлением накопленных статистик BN."""
+        bn = self.bn
+        mean = torch.zeros_like(bn.running_mean)
+        var = torch.zeros_like(bn.running_var)
+
+        tickers_per_date = mask.sum(dim=1).to(mean.dtype)
+        for x, channels, weights in (
+            (ticker_x, self._ticker_channels, torch.ones(int(tickers_per_date.sum()), device=mask.device)),
+            (market_x, self._market_channels, tickers_per_date),
+        ):
+            if x is not None:
+                x_mean, x_var = _moments(x, weights)
+                channels = torch.tensor(channels, device=mask.device)
+                mean = mean.index_put((channels,), x_mean)
+                var = var.index_put((channels,), x_var)
+
+        with torch.no_grad():
+            bn.num_batches_tracked.add_(1)
+            momentum = bn.momentum
+            if momentum is None:
+                momentum = 1 / float(bn.num_batches_tracked)
+            count = tickers_per_date.sum() * self._history_days
+            bn.running_mean.mul_(1 - momentum).add_(mean * momentum)
+            bn.running_var.mul_(1 - momentum).add_(var * count / (count - 1) * momentum)
+
+        return mean, var
@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+import torch
+
+from poptimizer.dl import data_loader
+from poptimizer.dl.features import data_params
+from poptimizer.dl.models import cross_wave_net, wave_net
+
+TICKERS = ("MTSS", "BANE", "POGR")
+DATE = pd.Timestamp("2020-11-03")
+DATA_PARAMS = {
+    "batch_size": 100,
+    "history_days": 30,
+    "features": {
+        "Label": {"on": True},
+        "Prices": {"on": True},
+        "Dividends": {"on": True},
+        "MCFTRR": {"on": True},
+        "RVI": {"on": True},
+        "Ticker": {"on": True},
+        "DayOfYear": {"on": True},
+    },
+}
+NET_PARAMS = {
+    "start_bn": True,
+    "kernels": 3,
+    "sub_blocks": 1,
+    "gate_channels": 16,
+    "residual_channels": 16,
+    "skip_channels": 16,
+    "end_channels": 16,
+    "mixture_size": 3,
+}
+
+
+@pytest.fixture(scope="module", name="loaders")
+def make_data_loaders():
+    cross = data_loader.DescribedDataLoader(
+        TICKERS,
+        DATE,
+        DATA_PARAMS,
+        data_params.TrainParams,
+        cross_section=True,
+    )
+    flat = data_loader.DescribedDataLoader(
+        TICKERS,
+        DATE,
+        DATA_PARAMS,
+        data_params.TrainParams,
+        batched=True,
+    )
+    return cross, flat
+
+
+def same_examples(cross, flat, items):
+    """Батчи с одинаковыми примерами в порядке дат и тикеров."""
+    batch = cross.dataset[items]
+    mask = batch[data_loader.MASK]
+
+    dates = cross.dataset._dates[items]
+    starts = flat.dataset._start_idx.tolist()
+    tickers = flat.dataset._ticker_idx.tolist()
+    flat_items = {(start, ticker): n_item for n_item, (start, ticker) in enumerate(zip(starts, tickers))}
+    rows = [flat_items[dates[n_date].item(), ticker] for n_date, ticker in mask.nonzero().tolist()]
+
+    return batch, flat.dataset[rows]
+
+
+def test_cross_section_batch(loaders):
+    cross, flat = loaders
+    assert cross.features_description == flat.features_description
+    assert cross.examples == len(flat.dataset)
+
+    batch, flat_batch = same_examples(cross, flat, list(range(10)))
+    mask = batch[data_loader.MASK]
+    assert mask.shape == (10, 3)
+    assert batch["Prices"].shape == (10, 3, 30)
+    assert batch["MCFTRR"].shape == (10, 30)
+    assert batch["Ticker"].shape == (10, 3)
+    assert batch["Label"].shape == (mask.sum(), 1)
+
+    assert torch.allclose(batch["Prices"][mask], flat_batch["Prices"])
+    assert torch.allclose(batch["Label"], flat_batch["Label"])
+
+
+@pytest.mark.parametrize("start_bn", [True, False])
+@pytest.mark.parametrize("train", [True, False])
+def test_same_as_wave_net(loaders, start_bn, train):
+    cross, flat = loaders
+    batch, flat_batch = same_examples(cross, flat, list(range(len(cross.dataset) - 20, len(cross.dataset))))
+
+    net_params = dict(NET_PARAMS, start_bn=start_bn)
+    net = wave_net.WaveNet(cross.history_days, cross.features_description, **net_params)
+    cross_net = cross_wave_net.CrossWaveNet(cross.history_days, cross.features_description, **net_params)
+    cross_net.load_state_dict(net.state_dict())
+    net.train(train)
+    cross_net.train(train)
+
+    for output, cross_output in zip(net(flat_batch), cross_net(batch)):
+        assert output.shape == cross_output.shape
+        assert output.allclose(cross_output, rtol=1e-4, atol=1e-4)
+
+    for key, tensor in net.state_dict().items():
+        assert tensor.allclose(cross_net.state_dict()[key])
@@ -155,6 +155,9 @@ class WaveNet(nn.Module):
     последовательностей и количеству каналов эмбеддинга.
     """
 
+    # Модель использует батчи из примеров для отдельных тикеров
+    cross_section = False
+
     def __init__(
         self,
         history_days: int,
@@ -266,6 +269,10 @@ class WaveNet(nn.Module):
         ->........------+                                                     |--------|
         ->embedding-----+                                                     |-output_s-softplus->
         """
+        return self._output(self._input(batch))
+
+    def _input(self, batch: dict[str, Union[torch.Tensor, list[torch.Tensor]]]) -> torch.Tensor:
+        """Объединение признаков во входные каналы сети размерностью [примеры, каналы, дни]."""
         y = torch.zeros(1, 1, 1, dtype=torch.float, device=DEVICE)
 
         y_seq = []
@@ -289,6 +296,10 @@ class WaveNet(nn.Module):
                 emb = emb.unsqueeze(2)
                 y = emb + y
 
+        return y
+
+    def _output(self, y: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Расчет параметров смеси распределений по входным каналам."""
         skips = torch.tensor(0, dtype=torch.float)
 
         for block in self.blocks:
@@ -322,13 +333,16 @@ class WaveNet(nn.Module):
         batch: dict[str, Union[torch.Tensor, list[torch.Tensor]]],
     ) -> distributions.Distribution:
         """Возвращает распределение доходности."""
-        logits, mean, std = self(batch)
+        return mixture(*self(batch))
+
 
-        try:
-            weights_dist = distributions.Categorical(logits=logits)
-        except ValueError:
-            raise GradientsError(f"Ошибка при обновлении градиентов: NaN in Categorical distribution")
+def mixture(logits: torch.Tensor, mean: torch.Tensor, std: torch.Tensor) -> distributions.Distribution:
+    """Смесь логнормальных распределений доходности по выходам сети."""
+    try:
+        weights_dist = distributions.Categorical(logits=logits)
+    except ValueError:
+        raise GradientsError(f"Ошибка при обновлении градиентов: NaN in Categorical distribution")
 
-        comp_dist = distributions.LogNormal(mean, std)
+    comp_dist = distributions.LogNormal(mean, std)
 
-        return distributions.MixtureSameFamily(weights_dist, comp_dist)
+    return distributions.MixtureSameFamily(weights_dist, comp_dist)
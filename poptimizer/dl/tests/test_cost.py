@@ -0,0 +1,47 @@
+import pytest
+
+from poptimizer.dl import cost
+from poptimizer.dl.features import FeatureType
+from poptimizer.dl.models import wave_net
+
+MODEL = {
+    "start_bn": True,
+    "kernels": 3,
+    "sub_blocks": 2,
+    "gate_channels": 8,
+    "residual_channels": 16,
+    "skip_channels": 12,
+    "end_channels": 10,
+    "mixture_size": 3,
+}
+
+
+@pytest.mark.parametrize("history_days", [30, 64, 123])
+@pytest.mark.parametrize("start_bn", [True, False])
+def test_complexity_params(history_days, start_bn):
+    description = {"Prices": (FeatureType.SEQUENCE, 1), "Dividends": (FeatureType.SEQUENCE, 1)}
+    params = dict(MODEL, start_bn=start_bn)
+    net = wave_net.WaveNet(history_days, description, **params)
+
+    complexity = cost._complexity(history_days, len(description), **params)
+
+    assert complexity.params == sum(tensor.numel() for tensor in net.parameters())
+    assert complexity.calls == len(net.blocks) + 2
+
+
+def test_step_cost_grows_with_batch_and_channels():
+    phenotype = {
+        "data": {"batch_size": 100, "history_days": 30, "features": {"Label": {"on": True}, "Prices": {"on": True}}},
+        "model": MODEL,
+    }
+    small = cost.step_cost(phenotype)
+
+    phenotype["data"]["batch_size"] = 200
+    large_batch = cost.step_cost(phenotype)
+
+    phenotype["model"] = dict(MODEL, gate_channels=32, residual_channels=32)
+    large_net = cost.step_cost(phenotype)
+
+    assert 0 < small.seconds < large_batch.seconds < large_net.seconds
+    assert 0 < small.memory < large_batch.memory < large_net.memory
+    assert large_net.memory < cost.memory_budget()
@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
 import torch
+from torch.utils import data
 
 from poptimizer.dl import data_loader
 from poptimizer.dl.features import FeatureType, data_params
@@ -72,3 +73,34 @@ class TestDescribedDataLoader:
         assert description == dict(
             Prices=(FeatureType.SEQUENCE, 245), Dividends=(FeatureType.SEQUENCE, 245)
         )
+
+
+@pytest.mark.parametrize("params_type", [data_params.TrainParams, data_params.TestParams])
+def test_batched_dataset(params_type):
+    params = params_type(TICKERS, DATE, PARAMS)
+    batched = data_loader.BatchedDataset(params)
+    one_ticker = data.ConcatDataset([data_loader.OneTickerDataset(ticker, params) for ticker in TICKERS])
+
+    assert len(batched) == len(one_ticker)
+    assert batched.features_description == one_ticker.datasets[0].features_description
+
+    items = list(range(0, len(one_ticker), 7))
+    batch = batched[items]
+    expected = data.default_collate([one_ticker[item] for item in items])
+
+    assert list(batch) == list(expected)
+    for key, tensor in expected.items():
+        assert batch[key].shape == tensor.shape
+        assert torch.allclose(batch[key], tensor)
+
+
+def test_batched_loader():
+    loader = data_loader.DescribedDataLoader(TICKERS, DATE, PARAMS, data_params.ForecastParams, batched=True)
+    assert len(loader.dataset) == 2
+
+    example = next(iter(loader))
+    assert set(example) == {"Prices", "Dividends"}
+    assert example["Prices"].shape == (2, 245)
+    assert loader.features_description == dict(
+        Prices=(FeatureType.SEQUENCE, 245), Dividends=(FeatureType.SEQUENCE, 245)
+    )
@@ -62,3 +62,70 @@ def test_ledoit_wolf_cor_forecast_days():
     assert np.allclose(sigma, sigma2)
     assert average_cor == average_cor2
     assert shrink == shrink2
+
+
+def test_moments_shrinkage_same_as_shrinkage():
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(0.001, 0.02, (300, 5)), index=pd.bdate_range("2021-01-01", periods=300))
+    moments = ledoit_wolf._WindowMoments()
+
+    for start, end in [(0, 60), (1, 61), (5, 61), (5, 90), (40, 90), (200, 260), (201, 262)]:
+        window = returns.iloc[start:end]
+        standardized = (window - window.mean()) / window.std(ddof=0)
+
+        sigma, average_cor, shrink = ledoit_wolf._moments_shrinkage(moments.move(window))
+        sigma2, average_cor2, shrink2 = ledoit_wolf.shrinkage(standardized.values)
+
+        assert np.allclose(sigma, sigma2)
+        assert np.allclose(average_cor, average_cor2)
+        assert np.allclose(shrink, shrink2)
+
+
+def test_moments_shrinkage_large_mean():
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(100, 0.01, (1000, 5)), index=pd.bdate_range("2021-01-01", periods=1000))
+    returns += np.linspace(0, 1, 1000).reshape(-1, 1)
+    moments = ledoit_wolf._WindowMoments()
+
+    for start in range(0, 940, 3):
+        window = returns.iloc[start : start + 60]
+        standardized = (window - window.mean()) / window.std(ddof=0)
+
+        sigma, average_cor, shrink = ledoit_wolf._moments_shrinkage(moments.move(window))
+        sigma2, average_cor2, shrink2 = ledoit_wolf.shrinkage(standardized.values)
+
+        assert np.allclose(sigma, sigma2)
+        assert np.allclose(average_cor, average_cor2)
+        assert np.allclose(shrink, shrink2)
+
+
+def test_ledoit_wolf_cor_cached():
+    args = ("CHEP", "MTSS", "PLZL"), pd.Timestamp("2020-05-19"), 30
+
+    sigma, *_ = ledoit_wolf.ledoit_wolf_cor(*args)
+
+    assert ledoit_wolf.ledoit_wolf_cor(*args)[0] is sigma
+    assert not sigma.flags.writeable
+
+
+def test_ledoit_wolf_cor_refreshed_on_update(monkeypatch):
+    args = ("CHEP", "MTSS", "PLZL"), pd.Timestamp("2020-05-19"), 30
+    timestamps = iter([(1,), (1,), (2,)])
+    monkeypatch.setattr(ledoit_wolf.quotes, "timestamps", lambda tickers: next(timestamps))
+
+    sigma, *_ = ledoit_wolf.ledoit_wolf_cor(*args)
+
+    assert ledoit_wolf.ledoit_wolf_cor(*args)[0] is sigma
+    assert ledoit_wolf.ledoit_wolf_cor(*args)[0] is not sigma
+
+
+def test_moments_bounded():
+    ledoit_wolf._moments.cache_clear()
+    moments = ledoit_wolf._moments(("AKRN",))
+    assert ledoit_wolf._moments(("AKRN",)) is moments
+
+    for ticker in ("CHEP", "MTSS", "PLZL", "GAZP"):
+        ledoit_wolf._moments((ticker,))
+
+    assert ledoit_wolf._moments(("AKRN",)) is not moments
+    assert ledoit_wolf._moments.cache_info().currsize == 4
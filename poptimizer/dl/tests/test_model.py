@@ -1,7 +1,11 @@
 import copy
+import io
 
+import numpy as np
 import pandas as pd
 import pytest
+import torch
+from scipy import optimize
 
 from poptimizer.dl import model
 from poptimizer.dl.forecast import Forecast
@@ -60,3 +64,64 @@ def test_forecast(org):
     assert forecast.mean.index.tolist() == list(org._doc.tickers)
     assert isinstance(forecast.std, pd.Series)
     assert forecast.std.index.tolist() == list(org._doc.tickers)
+
+
+def scaled_model(pickled_model: bytes, scale: float) -> bytes:
+    state_dict = torch.load(io.BytesIO(pickled_model))
+    state_dict = {key: tensor * scale if tensor.is_floating_point() else tensor for key, tensor in state_dict.items()}
+    buffer = io.BytesIO()
+    torch.save(state_dict, buffer)
+    return buffer.getvalue()
+
+
+def test_ensemble_forecasts(org):
+    tickers = tuple(org._doc.tickers)
+    phenotype = org.genotype.get_phenotype()
+    pickled_models = [org._doc.model, scaled_model(org._doc.model, 0.9), scaled_model(org._doc.model, 1.1)]
+
+    ensemble = [model.Model(tickers, org._doc.date, phenotype, pickled) for pickled in pickled_models]
+    assert len({net.architecture for net in ensemble}) == 1
+
+    forecasts = model.ensemble_forecasts(ensemble)
+
+    assert len(forecasts) == len(pickled_models)
+    for forecast, pickled in zip(forecasts, pickled_models):
+        single = model.Model(tickers, org._doc.date, phenotype, pickled).forecast()
+        assert forecast.mean.index.tolist() == list(tickers)
+        assert np.allclose(forecast.mean, single.mean, rtol=1e-4, atol=1e-6)
+        assert np.allclose(forecast.std, single.std, rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("risk_aversion, error_tolerance", [(1, 0), (2, 0.5)])
+def test_max_utility(risk_aversion, error_tolerance):
+    rng = np.random.default_rng(0)
+    n_tickers = 10
+    factors = rng.normal(size=(n_tickers, n_tickers))
+    sigma = (factors @ factors.transpose() / n_tickers + np.eye(n_tickers)) * 0.1
+    mean = rng.normal(0.1, 0.2, (n_tickers, 1))
+    phenotype = {"utility": {"risk_aversion": risk_aversion, "error_tolerance": error_tolerance}}
+    utility_func = model._make_utility_func(phenotype, mean, sigma)
+
+    w = rng.uniform(0.1, 1, n_tickers)
+    assert np.allclose(utility_func(w)[1], optimize.approx_fprime(w, lambda x: utility_func(x)[0], 1e-8), atol=1e-6)
+
+    weights = model._max_utility(phenotype, mean, sigma)
+    rez = optimize.minimize(lambda x: utility_func(x)[0], np.ones(n_tickers), bounds=[(0, None)] * n_tickers)
+    weights_num = rez.x / rez.x.sum()
+
+    assert np.isclose(weights.sum(), 1)
+    assert utility_func(weights)[0] <= utility_func(weights_num)[0] + 1e-8
+    assert np.allclose(weights, weights_num, atol=1e-3)
+
+
+def test_prune():
+    peer_curves = [[0.5, 1], [0.6, 1.1], [0.7, 1.2], [0.8]]
+    net = model.Model(("GAZP",), pd.Timestamp("2020-04-13"), {}, peer_curves=peer_curves)
+
+    net._prune(0.6)
+    net._prune(1.0)
+    assert net.learning_curve == [0.6, 1.0]
+
+    net = model.Model(("GAZP",), pd.Timestamp("2020-04-13"), {}, peer_curves=peer_curves)
+    with pytest.raises(model.TrainingPrunedError):
+        net._prune(0.5)
@@ -75,6 +75,10 @@ class Chromosome(UserDict):
             value_key = gene.path[-1]
             node[value_key] = gene.phenotype_function(self[gene.name])
 
+    def flat(self) -> list[float]:
+        """Значения генов в порядке их описания в хромосоме."""
+        return [self[gene.name] for gene in self._genes]
+
     def make_child(
         self,
         parent1: "Chromosome",
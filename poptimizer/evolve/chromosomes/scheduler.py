@@ -66,6 +66,23 @@ FINAL_DIV_FACTOR = chromosome.GeneParams(
     phenotype_function=float,
 )
 
+WARM_START = chromosome.GeneParams(
+    name="warm_start",
+    path=("scheduler", "warm_start"),
+    default_range=(-1.0, 0.0),
+    lower_bound=None,
+    upper_bound=None,
+    phenotype_function=lambda x: x > 0,
+)
+WARM_EPOCHS = chromosome.GeneParams(
+    name="warm_epochs",
+    path=("scheduler", "warm_epochs"),
+    default_range=(0.1, 0.3),
+    lower_bound=0.0,
+    upper_bound=1.0,
+    phenotype_function=float,
+)
+
 
 class Scheduler(chromosome.Chromosome):
     """Хромосома ответственная за параметры One cycle learning rate policy."""
@@ -79,4 +96,6 @@ class Scheduler(chromosome.Chromosome):
         MAX_MOMENTUM,  # Максимальный моментум
         DIV_FACTOR,  # Понижающий коэффициент скорости обучения для периода разогрева
         FINAL_DIV_FACTOR,  # Понижающий коэффициент для скорости обучения в конце цикла понижения
+        WARM_START,  # Дообучение весов с предыдущей даты вместо их повторного использования
+        WARM_EPOCHS,  # Доля эпох обучения при дообучении
     )
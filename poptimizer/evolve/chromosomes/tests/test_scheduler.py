@@ -3,7 +3,7 @@ from poptimizer.evolve.chromosomes import scheduler
 
 def test_init_no_data():
     chromo = scheduler.Scheduler({})
-    assert len(chromo.data) == 8
+    assert len(chromo.data) == 10
     assert 0.001 < chromo.data["max_lr"] < 0.01
     assert 1 < chromo.data["epochs"] < 3
     assert 0.299 < chromo.data["pct_start"] < 0.301
@@ -12,6 +12,8 @@ def test_init_no_data():
     assert 0.949 < chromo.data["max_momentum"] < 0.951
     assert 3 < chromo.data["div_factor"] < 300
     assert 1.0e3 < chromo.data["final_div_factor"] < 1.0e5
+    assert -1.0 < chromo.data["warm_start"] < 0.0
+    assert 0.1 < chromo.data["warm_epochs"] < 0.3
 
 
 def test_setup_phenotype():
@@ -24,11 +26,14 @@ def test_setup_phenotype():
         max_momentum=0.7,
         div_factor=1.8,
         final_div_factor=9.9,
+        warm_start=0.5,
+        warm_epochs=0.2,
     )
     chromo = scheduler.Scheduler(chromosome_data)
     base_phenotype = dict(type="Test_Model")
     phenotype_data = dict(type="Test_Model", scheduler=chromosome_data)
     # noinspection PyTypeChecker
     phenotype_data["scheduler"]["anneal_strategy"] = "linear"
+    phenotype_data["scheduler"]["warm_start"] = True
     chromo.change_phenotype(base_phenotype)
     assert base_phenotype == phenotype_data
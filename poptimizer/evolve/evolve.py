@@ -1,18 +1,26 @@
 """Эволюция параметров модели."""
 import datetime
-import functools
 import logging
-import operator
-from typing import Optional
+import time
+import types
+import warnings
+from typing import Final, Optional
 
 import numpy as np
+import pandas as pd
 
 from poptimizer import config
 from poptimizer.data.views import listing
 from poptimizer.dl import ModelError
-from poptimizer.evolve import population, seq
+from poptimizer.evolve import lease, population, seq, store, surrogate
 from poptimizer.portfolio.portfolio import load_tickers
 
+# Период ожидания рабочим процессом организмов для оценки
+WORKER_POLL_SECONDS: Final = 60
+
+# Метрики для сравнения организмов и соответствующие им поля документа
+METRICS: Final = types.MappingProxyType({"LLH": "llh", "RET": "ir"})
+
 
 class Evolution:  # noqa: WPS214
     """Эволюция параметров модели.
@@ -32,6 +40,9 @@ class Evolution:  # noqa: WPS214
     - Организмы, уступающие базовой популяции погибают, при этом сужается окрестность порождения потомков, чтобы новые
     потомки были ближе к родителю по характеристикам, что повышает вероятность создания новых организмов минимально
     приемлемого качества.
+
+    Переоценка существующих организмов для новой даты может параллельно осуществляться рабочими процессами на
+    других машинах. Организмы оцениваются под арендой в MongoDB, поэтому каждый из них оценивается одним процессом.
     """
 
     def __init__(self):
@@ -40,6 +51,7 @@ class Evolution:  # noqa: WPS214
         self._jump = 1
         self._tickers = None
         self._end = None
+        self._owner = lease.owner_id()
         self._logger = logging.getLogger()
 
     def evolve(self) -> None:
@@ -51,6 +63,7 @@ class Evolution:  # noqa: WPS214
         current = None
 
         while _check_time_range():
+            population.snapshot(refresh=True)
             step, current = self._step_setup(step, current)
 
             date = self._end.date()
@@ -63,11 +76,29 @@ class Evolution:  # noqa: WPS214
 
             current = self._step(current)
 
+    def work(self) -> None:
+        """Переоценивает существующие организмы для даты, на которой координатор ведет эволюцию.
+
+        Рабочий процесс арендует самые старые организмы, не оцененные для этой даты, и ожидает их появления при
+        отсутствии.
+        """
+        while _check_time_range():
+            target = lease.get_target()
+            if target is None or (org := population.lease_next(target[1], self._owner)) is None:
+                time.sleep(WORKER_POLL_SECONDS)
+
+                continue
+
+            self._tickers, self._end = target
+            self._logger.info(f"***{self._end.date()}: Переоценка организма***")
+            population.snapshot(refresh=True)
+            self._eval_organism(org)
+
     def _step_setup(
         self,
         step: int,
         org: Optional[population.Organism],
-    ) -> tuple[int, population.Organism]:
+    ) -> tuple[int, Optional[population.Organism]]:
         self._setup()
 
         d_min, d_max = population.min_max_date()
@@ -78,12 +109,15 @@ class Evolution:  # noqa: WPS214
 
         dates = listing.all_history_date(self._tickers, start=self._end)
         if (d_min != d_max) or (len(dates) == 1):
+            lease.publish_target(self._tickers, self._end)
+
             return step + 1, org
 
         self._scale = 1
         self._jump = 1
         self._tickers = load_tickers()
         self._end = dates[1]
+        lease.publish_target(self._tickers, self._end)
 
         return 1, org
 
@@ -96,23 +130,33 @@ class Evolution:  # noqa: WPS214
     def _next_org(
         self,
         current: Optional[population.Organism] = None,
-    ) -> population.Organism:
+    ) -> Optional[population.Organism]:
         """Возвращает следующий организм и информацию новый ли он.
 
         В первую очередь берутся не переоцененные существующие организмы. При их отсутствии создается
-        потомок текущего в окрестности. При отсутствии текущего (обычно после возобновления прерванной
-        эволюции) берется самый старый организм.
+        потомок текущего в окрестности, отобранный суррогатной моделью. При отсутствии текущего (обычно
+        после возобновления прерванной эволюции) берется самый старый организм. Организмы, арендованные
+        рабочими процессами, пропускаются, поэтому при аренде всех организмов возвращается None.
         """
         if (org := population.get_next_one(self._end)) is not None:
             return org
 
         if current is not None:
-            return current.make_child(1 / self._scale)
+            return surrogate.best_child(current, 1 / self._scale)
 
         return population.get_next_one(None)
 
-    def _step(self, hunter: population.Organism) -> population.Organism:
-        """Один шаг эволюции."""
+    def _step(self, hunter: Optional[population.Organism]) -> Optional[population.Organism]:
+        """Один шаг эволюции.
+
+        Если свободные организмы отсутствуют, то ожидает их освобождения рабочими процессами.
+        """
+        if hunter is None:
+            self._logger.info("Все организмы оцениваются рабочими процессами\n")
+            time.sleep(WORKER_POLL_SECONDS)
+
+            return None
+
         self._logger.info("Родитель:")
         if (hunter_margin := self._eval_organism(hunter)) is None:
             return self._next_org(None)
@@ -144,17 +188,36 @@ class Evolution:  # noqa: WPS214
         return hunter
 
     def _eval_organism(self, organism: population.Organism) -> Optional[float]:
+        """Оценка организма под арендой.
+
+        Если организм удален, арендован другим процессом или аренда утеряна, то возвращается None без
+        ожидания освобождения организма.
+        """
+        try:
+            with organism.leased(self._owner):
+                return self._eval_leased(organism)
+        except store.IdError:
+            self._logger.info("Организм удален другим процессом\n")
+        except lease.BusyError:
+            self._logger.info("Организм оценивается другим процессом\n")
+        except lease.LeaseError:
+            self._logger.error("Аренда утеряна - результаты оценки не сохранены\n")
+
+        return None
+
+    def _eval_leased(self, organism: population.Organism) -> Optional[float]:
         """Оценка организмов.
 
         Если организм уже оценен для данной даты, то он не оценивается.
         Если организм старый, то оценивается один раз.
         Если организм новый, то он оценивается для минимального количества дат из истории, необходимых
-        для последовательного тестирования.
+        для последовательного тестирования. Оценка прекращается досрочно, если организм гарантированно
+        будет исключен из популяции при любых результатах для оставшихся дат.
         """
         try:
             self._logger.info(f"{organism}\n")
         except AttributeError as err:
-            organism.die()
+            organism.die(type(err).__name__)
             self._logger.error(f"Удаляю - {err}\n")
 
             return None
@@ -171,17 +234,50 @@ class Evolution:  # noqa: WPS214
             dates = listing.all_history_date(self._tickers, end=self._end)
             dates = dates[-bounding_n:].tolist()
 
-        for date in dates:
-            try:
-                organism.evaluate_fitness(self._tickers, date)
-            except (ModelError, AttributeError) as error:
-                organism.die()
-                self._logger.error(f"Удаляю - {error}\n")
+        try:
+            organism.evaluate_fitness_history(self._tickers, dates, lambda: self._is_hopeless(organism, dates))
+        except (ModelError, AttributeError) as error:
+            organism.die(type(error).__name__)
+            self._logger.error(f"Удаляю - {error}\n")
+
+            return None
+
+        if organism.date != self._end:
+            organism.die("hopeless")
+            self._logger.info(f"Исключен из популяции после {len(organism.llh)} из {len(dates)} дат...\n")
 
-                return None
+            return -np.inf
 
         return self._get_margin(organism)
 
+    def _is_hopeless(self, org: population.Organism, dates: list[pd.Timestamp]) -> bool:
+        """Организм гарантированно будет исключен из популяции после оценки для оставшихся дат.
+
+        Результаты для оставшихся дат считаются сколь угодно удачными, поэтому для каждой метрики и организма
+        базовой популяции рассчитывается наибольшая возможная верхняя граница медианной разницы после
+        завершения оценки. Если она отрицательна, то исход оценки предрешен.
+        """
+        if not (remaining := len(dates) - 1 - dates.index(org.date)):
+            return False
+
+        candidate = {
+            "date": dates[-1],
+            "llh": [np.inf] * remaining + org.llh,
+            "ir": [np.inf] * remaining + org.ir,
+        }
+        targets = [target for target in population.base_pop_metrics() if target["_id"] != org.id]
+        p_value = _p_value()
+
+        for metric in METRICS:
+            history = _history_matrix([candidate, *targets], metric)
+            for diff in history[0] - history[1:]:
+                diff = diff[~np.isnan(diff)]
+                known = diff[np.isfinite(diff)]
+                if seq.median_conf_upper_best(known, len(diff) - len(known), p_value) < 0:
+                    return True
+
+        return False
+
     def _get_margin(self, org: population.Organism) -> float:
         """Используется тестирование разницы llh и ret против всех организмов базовой популяции.
 
@@ -191,7 +287,7 @@ class Evolution:  # noqa: WPS214
         """
         margin = np.inf
 
-        for metric in ("LLH", "RET"):
+        for metric in METRICS:
             maximum, median, upper = _select_worst_bound(
                 targets=list(population.base_pop_metrics()),
                 candidate={"date": org.date, "llh": org.llh, "ir": org.ir},
@@ -217,17 +313,20 @@ class Evolution:  # noqa: WPS214
         self._logger.info(f"Margin - {margin:.2%}, Time excess - {time_delta:.2%}\n")  # noqa: WPS221
 
         if margin < 0:
-            org.die()
+            org.die("excluded")
             self._logger.info("Исключен из популяции...\n")
 
         return margin - time_delta
 
 
 def _time_delta(org):
-    """Штраф за время, если организм медленнее самого медленного в популяции."""
-    max_timer = max(doc["timer"] for doc in population.base_pop_metrics())
+    """Штраф за время, если организм медленнее самого медленного в популяции.
 
-    return max((org.timer / max_timer - 1), 0)
+    Время складывается из обучения с нуля и последнего дообучения для новой даты.
+    """
+    max_timer = max(doc["timer"] + doc.get("warm_timer", 0) for doc in population.base_pop_metrics())
+
+    return max(((org.timer + org.warm_timer) / max_timer - 1), 0)
 
 
 def _check_time_range() -> bool:
@@ -252,42 +351,54 @@ def _select_worst_bound(targets: list[dict], candidate: dict, metric: str) -> tu
     то же время сравнение может идти против самого себя, в этом случае граница будет нулевой. Для
     исключения этого случая нулевое значение подменяется на inf.
     """
-    bounds = map(functools.partial(_aligned_tests, candidate=candidate, metric=metric), targets)
+    history = _history_matrix([candidate, *targets], metric)
+    median, upper, maximum = _test_diff(history[0] - history[1:])
+    worst = int(np.argmin(np.where(upper == 0, np.inf, upper)))
+
+    return maximum[worst], median[worst], upper[worst]
+
 
-    median, upper, maximum = min(
-        bounds,
-        key=lambda bound: bound[1] or np.inf,
-    )
+def pairwise_bounds(docs: list[dict], metric: str) -> tuple[np.ndarray, np.ndarray]:
+    """Медианы и верхние границы доверительных интервалов для разниц метрики всех пар организмов.
 
-    return maximum, median, upper
+    Элемент [i, j] соответствует разнице метрик i-го и j-го организма, что позволяет дешево рассчитывать
+    турнирную статистику популяции.
+    """
+    history = _history_matrix(docs, metric)
+    median, upper, _ = _test_diff(history[:, np.newaxis, :] - history[np.newaxis, :, :])
 
+    return median, upper
 
-def _aligned_tests(target: dict, candidate: dict, metric: str) -> tuple[float, float, float]:
-    candidate_start = 0
-    target_start = 0
 
-    if candidate["date"] > target["date"]:
-        candidate_start = 1
-    if candidate["date"] < target["date"]:
-        target_start = 1
+def _history_matrix(docs: list[dict], metric: str) -> np.ndarray:
+    """Значения метрики организмов, выровненные по датам, в строках дополненного NaN массива.
 
-    candidate_data = candidate["ir"][candidate_start:]
-    target_data = target["ir"][target_start:]
+    Первый столбец соответствует самой поздней дате, а значения организмов с более ранними датами сдвигаются
+    на количество более поздних дат, поэтому в парах отбрасываются значения без пары.
+    """
+    key = METRICS[metric]
+    dates = sorted({doc["date"] for doc in docs}, reverse=True)
+    offsets = [dates.index(doc["date"]) for doc in docs]
 
-    if metric == "LLH":
-        candidate_data = candidate["llh"][candidate_start:]
-        target_data = target["llh"][target_start:]
+    history = np.full((len(docs), max(offset + len(doc[key]) for offset, doc in zip(offsets, docs))), np.nan)
+    for row, (offset, doc) in enumerate(zip(offsets, docs)):
+        history[row, offset : offset + len(doc[key])] = doc[key]
 
-    return _test_diff(target_data, candidate_data)
+    return history
 
 
-def _test_diff(target: list[float], candidate: list[float]) -> tuple[float, float, float]:
+def _test_diff(diffs: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """Последовательный тест на медианную разницу с учетом множественного тестирования.
 
-    Тестирование одностороннее, поэтому p-value нужно умножить на 2, но проводится 2 * generations_count тестов,
-    поэтому 2 сокращается.
+    Разницы расположены вдоль последней оси и дополнены NaN. Тестирование одностороннее, поэтому p-value
+    нужно умножить на 2, но проводится 2 * generations_count тестов, поэтому 2 сокращается.
     """
-    diff = list(map(operator.sub, candidate, target))
-    _, upper = seq.median_conf_bound(diff, config.P_VALUE / population.generations_count())
+    _, upper = seq.median_conf_bounds(diffs, _p_value())
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        return np.nanmedian(diffs, axis=-1), upper, np.nanmax(diffs, axis=-1)
+
 
-    return float(np.median(diff)), upper, np.max(diff)
+def _p_value() -> float:
+    return config.P_VALUE / population.generations_count()
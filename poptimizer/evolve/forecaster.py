@@ -1,12 +1,17 @@
 """Формирует прогноз по всем моделям в популяции."""
+import collections
+import contextlib
 from collections.abc import Iterable
+from concurrent import futures
 from typing import Iterator, Optional
 
+import bson
 import pandas as pd
 import tqdm
 
-from poptimizer.dl import Forecast
-from poptimizer.evolve import population
+from poptimizer import config
+from poptimizer.dl import Forecast, ensemble_forecasts
+from poptimizer.evolve import pool, population, store
 from poptimizer.store import database
 
 # База для хранений кеша прогноза и ключ с документа с метаинформацией о прогнозах
@@ -55,18 +60,103 @@ def _prepare_forecasts(
     tickers: tuple[str, ...],
     date: pd.Timestamp,
 ) -> list[Forecast]:
-    forecasts = []
-    for organism in tqdm.tqdm(population.get_oldest(), desc="Forecasts"):
+    """Прогнозы организмов популяции в порядке их возраста.
+
+    Модели с одинаковой архитектурой прогнозируют совместно за один проход по прогнозным данным. Группы
+    формируются по фенотипам без загрузки моделей. При наличии нескольких процессов группы моделей
+    прогнозируют параллельно, а порядок прогнозов не зависит от порядка завершения расчетов.
+    """
+    groups = collections.defaultdict(list)
+    for n_organism, organism in enumerate(population.get_oldest()):
         try:
-            forecast = organism.forecast(tickers, date)
+            architecture = organism.architecture(tickers)
         except (population.ForecastError, AttributeError):
             continue
 
-        forecasts.append(forecast)
+        groups[architecture].append((n_organism, organism))
+
+    if config.FORECAST_WORKERS:
+        forecasts = _parallel_forecasts(list(groups.values()), tickers, date)
+    else:
+        forecasts = {}
+        for group in tqdm.tqdm(groups.values(), desc="Forecasts"):
+            forecasts.update(_group_forecasts(group, tickers, date))
+
+    return [forecasts[n_organism] for n_organism in sorted(forecasts)]
+
+
+def _parallel_forecasts(
+    groups: list[list[tuple[int, population.Organism]]],
+    tickers: tuple[str, ...],
+    date: pd.Timestamp,
+) -> dict[int, Forecast]:
+    """Прогнозы групп моделей в пуле процессов.
+
+    Процессы получают только номера и id организмов, а крупные группы запускаются первыми для
+    равномерной загрузки процессов.
+    """
+    groups = sorted(groups, key=len, reverse=True)
+    forecasts = {}
+    with pool.make_pool(config.FORECAST_WORKERS) as workers:
+        jobs = []
+        for group in groups:
+            ids = [(n_organism, organism.id) for n_organism, organism in group]
+            jobs.append(workers.submit(_forecast_ids, ids, tickers, date))
+        for job in tqdm.tqdm(futures.as_completed(jobs), total=len(jobs), desc="Forecasts"):
+            forecasts.update(job.result())
 
     return forecasts
 
 
+def _forecast_ids(
+    ids: list[tuple[int, bson.ObjectId]],
+    tickers: tuple[str, ...],
+    date: pd.Timestamp,
+) -> list[tuple[int, Forecast]]:
+    """Прогнозы группы организмов с одинаковой архитектурой моделей в процессе пула."""
+    group = []
+    for n_organism, id_ in ids:
+        try:
+            group.append((n_organism, population.Organism(_id=id_)))
+        except store.IdError:
+            continue
+
+    return list(_group_forecasts(group, tickers, date))
+
+
+def _group_forecasts(
+    group: list[tuple[int, population.Organism]],
+    tickers: tuple[str, ...],
+    date: pd.Timestamp,
+) -> Iterator[tuple[int, Forecast]]:
+    """Прогнозы группы организмов с одинаковой архитектурой моделей.
+
+    При ошибке совместного прогноза организмы прогнозируют по отдельности.
+    """
+    models = []
+    for n_organism, organism in group:
+        with contextlib.suppress(population.ForecastError, store.IdError):
+            models.append((n_organism, organism, organism.trained_model(tickers, date)))
+    if not models:
+        return
+
+    try:
+        forecasts = ensemble_forecasts([model for _, _, model in models])
+    except (population.ForecastError, AttributeError):
+        forecasts = [None] * len(models)
+
+    for (n_organism, organism, _), forecast in zip(models, forecasts):
+        try:
+            if forecast is None:
+                forecast = organism.forecast(tickers, date)
+            else:
+                forecast = organism.check_forecast(forecast)
+        except (population.ForecastError, AttributeError):
+            continue
+
+        yield n_organism, forecast
+
+
 class Cache:
     """Создает кэш прогнозов и обновляет его по необходимости."""
 
@@ -67,6 +67,10 @@ class Genotype(UserDict):
             chromosome.change_phenotype(phenotype)
         return phenotype
 
+    def flat(self) -> list[float]:
+        """Значения генов всех хромосом в фиксированном порядке."""
+        return [gene for chromosome in self.values() for gene in chromosome.flat()]
+
     def make_child(
         self,
         parent1: "Genotype",
@@ -0,0 +1,154 @@
+"""Аренда организмов процессами эволюции для распределенной оценки."""
+import contextlib
+import datetime
+import logging
+import os
+import socket
+import threading
+from typing import Final, Iterator, Optional
+
+import bson
+import pandas as pd
+import pymongo
+
+from poptimizer.config import POptimizerError
+from poptimizer.evolve import store
+from poptimizer.store import database
+
+# Поля с владельцем аренды и временем ее окончания
+LEASE: Final = "lease"
+EXPIRY: Final = "lease_expiry"
+
+# Длительность аренды без продления и период ее продления
+LEASE_TTL: Final = datetime.timedelta(minutes=10)
+HEARTBEAT: Final = datetime.timedelta(minutes=1)
+
+# Ключ документа с датой и тикерами, для которых координатор ведет эволюцию
+TARGET: Final = "evolution_target"
+
+LOGGER = logging.getLogger()
+
+
+class LeaseError(POptimizerError):
+    """Аренда организма утеряна — результаты оценки не сохраняются."""
+
+
+class BusyError(POptimizerError):
+    """Организм арендован другим процессом."""
+
+
+def owner_id() -> str:
+    """Уникальное название процесса на хосте."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def free() -> dict:
+    """Условие отсутствия действующей аренды.
+
+    Окончание аренды сравнивается со временем сервера, чтобы расхождение часов хостов не влияло на аренду.
+    """
+    return {"$or": [{LEASE: None}, {"$expr": {"$lt": [f"${EXPIRY}", "$$NOW"]}}]}
+
+
+def _prolong(owner: str) -> list[dict]:
+    """Конвейер обновления, устанавливающий арендатора и окончание аренды по времени сервера."""
+    ttl_ms = LEASE_TTL // datetime.timedelta(milliseconds=1)
+
+    return [{"$set": {LEASE: {"$literal": owner}, EXPIRY: {"$add": ["$$NOW", ttl_ms]}}}]
+
+
+def lease_next(date: pd.Timestamp, owner: str) -> Optional[bson.ObjectId]:
+    """Атомарно арендует самый старый оцененный организм с датой оценки не равной данной.
+
+    :param date:
+        Дата, для которой нужна оценка.
+    :param owner:
+        Арендатор.
+    :return:
+        ID арендованного организма или None при отсутствии свободных.
+    """
+    doc = store.get_collection().find_one_and_update(
+        {"date": {"$exists": True, "$ne": date}, **free()},
+        _prolong(owner),
+        projection={store.ID: True},
+        sort=[(store.ID, pymongo.ASCENDING)],
+    )
+
+    return doc and doc[store.ID]
+
+
+def acquire(id_: bson.ObjectId, owner: str) -> bool:
+    """Атомарно арендует организм, если он свободен или уже арендован тем же арендатором."""
+    doc = store.get_collection().find_one_and_update(
+        {store.ID: id_, "$or": [*free()["$or"], {LEASE: owner}]},
+        _prolong(owner),
+        projection={store.ID: True},
+    )
+
+    return doc is not None
+
+
+def extend(id_: bson.ObjectId, owner: str) -> bool:
+    """Продлевает аренду, если она не перешла к другому арендатору."""
+    rez = store.get_collection().update_one(
+        {store.ID: id_, LEASE: owner},
+        _prolong(owner),
+    )
+
+    return rez.matched_count == 1
+
+
+def release(id_: bson.ObjectId, owner: str) -> None:
+    """Освобождает организм, если он арендован данным арендатором."""
+    store.get_collection().update_one(
+        {store.ID: id_, LEASE: owner},
+        {"$unset": {LEASE: "", EXPIRY: ""}},
+    )
+
+
+@contextlib.contextmanager
+def hold(id_: bson.ObjectId, owner: str) -> Iterator[threading.Event]:
+    """Арендует организм на время выполнения блока.
+
+    Не ожидает освобождения организма — если организм удален или арендован другим процессом, выбрасывается
+    исключение. Во время выполнения блока аренда продлевается в фоновом потоке, а при неудачном продлении
+    устанавливается возвращаемое событие утери аренды.
+    """
+    if not acquire(id_, owner):
+        if store.get_collection().count_documents({store.ID: id_}) == 0:
+            raise store.IdError(id_)
+
+        raise BusyError(id_)
+
+    stop = threading.Event()
+    lost = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(id_, owner, stop, lost), daemon=True)
+    heartbeat.start()
+    try:
+        yield lost
+    finally:
+        stop.set()
+        heartbeat.join()
+        release(id_, owner)
+
+
+def _heartbeat(id_: bson.ObjectId, owner: str, stop: threading.Event, lost: threading.Event) -> None:
+    while not stop.wait(HEARTBEAT.total_seconds()):
+        if not extend(id_, owner):
+            LOGGER.warning(f"Аренда организма {id_} утеряна")
+            lost.set()
+
+            return
+
+
+def publish_target(tickers: tuple[str, ...], end: pd.Timestamp) -> None:
+    """Публикует дату и тикеры, для которых координатор ведет эволюцию."""
+    database.MongoDB()[TARGET] = {"tickers": list(tickers), "end": end}
+
+
+def get_target() -> Optional[tuple[tuple[str, ...], pd.Timestamp]]:
+    """Дата и тикеры, для которых координатор ведет эволюцию, или None до начала эволюции."""
+    if (doc := database.MongoDB()[TARGET]) is None:
+        return None
+
+    return tuple(doc["tickers"]), pd.Timestamp(doc["end"])
@@ -0,0 +1,34 @@
+"""Пул процессов для параллельных расчетов по организмам популяции."""
+import multiprocessing
+from concurrent import futures
+
+import torch
+
+from poptimizer import config
+
+
+def _init_worker(threads: int) -> None:
+    """Ограничивает количество потоков torch, чтобы процессы пула не конкурировали за ядра."""
+    torch.set_num_threads(threads)
+
+
+def make_pool(workers: int, threads: int = config.WORKER_THREADS) -> futures.ProcessPoolExecutor:
+    """Пул процессов с фиксированным количеством потоков torch в каждом.
+
+    Процессы создаются заново, а не копируются, поэтому не наследуют соединения с базой данных и
+    состояние torch родительского процесса. Исходные данные для признаков процессы разделяют через
+    отображаемые в память файлы хранилища признаков.
+
+    :param workers:
+        Количество процессов.
+    :param threads:
+        Количество потоков torch в каждом процессе.
+    :return:
+        Пул процессов.
+    """
+    return futures.ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,),
+    )
@@ -1,9 +1,11 @@
 """Класс организма и операции с популяцией организмов."""
 import contextlib
 import datetime
+import functools
 import logging
+import threading
 import time
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Iterator, Optional
 
 import bson
 import numpy as np
@@ -11,8 +13,8 @@ import pandas as pd
 import pymongo
 
 from poptimizer import config
-from poptimizer.dl import Forecast, Model
-from poptimizer.evolve import store
+from poptimizer.dl import Forecast, Model, architecture
+from poptimizer.evolve import lease, pool, store
 from poptimizer.evolve.genotype import Genotype
 
 # Преобразование времени в секунды
@@ -43,6 +45,8 @@ class Organism:  # noqa: WPS214
     ) -> None:
         """Загружает организм из базы данных."""
         self._doc = store.Doc(id_=_id, genotype=genotype)
+        self._owner: Optional[str] = None
+        self._lease_lost: Optional[threading.Event] = None
 
     def __str__(self) -> str:
         """Текстовое представление генотипа организма."""
@@ -77,9 +81,14 @@ class Organism:  # noqa: WPS214
 
     @property
     def timer(self) -> float:
-        """Генотип организма."""
+        """Время обучения с нуля."""
         return self._doc.timer
 
+    @property
+    def warm_timer(self) -> float:
+        """Время последнего дообучения с весов, натренированных до предыдущей даты."""
+        return self._doc.warm_timer
+
     @property
     def scores(self) -> int:
         """Количество оценок LLH."""
@@ -98,42 +107,157 @@ class Organism:  # noqa: WPS214
     def evaluate_fitness(self, tickers: tuple[str, ...], end: pd.Timestamp) -> list[float]:
         """Вычисляет качество организма.
 
-        В первый вызов для нового дня используется метрика существующей натренированной модели.
-        При последующих вызовах в течение дня выбрасывается ошибка.
+        В первый вызов для нового дня используется метрика существующей натренированной модели, а при
+        включенном в генотипе дообучении модель, натренированная до предыдущей даты, сначала дообучается по
+        сокращенному расписанию. При последующих вызовах в течение дня выбрасывается ошибка.
         """
         if end == self.date:
             raise ReevaluationError
 
         tickers = list(tickers)
         doc = self._doc
+        phenotype = self.genotype.get_phenotype()
 
         pickled_model = None
-        if doc.date is not None and doc.date < end and tickers == doc.tickers:
-            pickled_model = doc.model
+        warm_model = None
+        if doc.date is not None and doc.date < end:
+            if phenotype["scheduler"]["warm_start"]:
+                warm_model = doc.model
+            elif tickers == doc.tickers:
+                pickled_model = doc.model
 
-        timer = time.monotonic_ns()
-        model = Model(tuple(tickers), end, self.genotype.get_phenotype(), pickled_model)
-        llh, ir = model.quality_metrics
+        cold = pickled_model is None and warm_model is None
+        prunable = cold and not doc.llh
+        peer_curves = learning_curves(end) if prunable else None
 
-        if pickled_model is None:
+        timer = time.monotonic_ns()
+        model = Model(
+            tuple(tickers),
+            end,
+            phenotype,
+            pickled_model,
+            warm_model,
+            peer_curves,
+            interrupt=self._check_lease,
+        )
+        try:
+            llh, ir = model.quality_metrics
+        finally:
+            if prunable:
+                _archive_curve(end, model.learning_curve)
+
+        if cold:
             doc.timer = time.monotonic_ns() - timer
+        elif warm_model is not None:
+            doc.warm_timer = time.monotonic_ns() - timer
+
+        self._record(tickers, end, bytes(model), [(llh, ir)])
+
+        return self.llh
+
+    def evaluate_fitness_history(
+        self,
+        tickers: tuple[str, ...],
+        dates: list[pd.Timestamp],
+        stop: Optional[Callable[[], bool]] = None,
+    ) -> list[float]:
+        """Вычисляет качество организма последовательно для дат в порядке возрастания.
+
+        Модель обучается только для первой даты, если ранее не была обучена для этих тикеров, а для
+        последующих дат используются ее веса. Поэтому при наличии нескольких процессов качество для
+        остальных дат вычисляется параллельно порциями по количеству процессов, а результаты записываются
+        в порядке дат и совпадают с последовательной оценкой. При дообучении модели для каждой даты оценка
+        всегда последовательная.
+
+        После записи результатов для каждой даты или порции дат проверяется условие досрочного
+        прекращения оценки — в этом случае дата организма будет предшествовать последней из дат.
+        """
+        first, *rest = dates
+        self.evaluate_fitness(tickers, first)
+
+        stop = stop or _never
+        if not config.EVOLVE_WORKERS or self.genotype.get_phenotype()["scheduler"]["warm_start"]:
+            for date in rest:
+                if stop():
+                    break
+                self.evaluate_fitness(tickers, date)
+
+            return self.llh
 
-        doc.llh = [llh] + doc.llh
+        doc = self._doc
+        phenotype = self.genotype.get_phenotype()
+        chunk = config.EVOLVE_WORKERS
+        with pool.make_pool(chunk) as workers:
+            for start in range(0, len(rest), chunk):
+                if stop():
+                    break
+                self._check_lease()
+                chunk_dates = rest[start : start + chunk]
+                jobs = [
+                    workers.submit(_quality_metrics, tuple(tickers), date, phenotype, doc.model) for date in chunk_dates
+                ]
+                self._record(list(tickers), chunk_dates[-1], doc.model, [job.result() for job in jobs])
+
+        return self.llh
+
+    def _record(self, tickers: list[str], end: pd.Timestamp, model: bytes, metrics: list[tuple[float, float]]) -> None:
+        """Сохраняет качество организма для последовательных дат и модель, натренированную до них."""
+        doc = self._doc
+
+        for llh, ir in metrics:
+            doc.llh = [llh] + doc.llh
+            doc.ir = [ir] + doc.ir
         doc.wins = len(doc.llh)
-        doc.ir = [ir] + doc.ir
 
-        doc.model = bytes(model)
+        doc.model = model
 
         doc.date = end
         doc.tickers = tickers
 
-        doc.save()
+        if not doc.save(self._owner and {lease.LEASE: self._owner}):
+            raise lease.LeaseError(self.id)
 
-        return self.llh
+    def _check_lease(self) -> None:
+        """Прерывает оценку, если аренда организма утеряна."""
+        if self._lease_lost is not None and self._lease_lost.is_set():
+            raise lease.LeaseError(self.id)
+
+    @contextlib.contextmanager
+    def leased(self, owner: str) -> Iterator[None]:
+        """Организм арендуется процессом на время выполнения блока.
 
-    def die(self) -> None:
-        """Организм удаляется из популяции."""
-        self._doc.delete()
+        Новый организм предварительно сохраняется, а существующий — перезагружается после получения аренды,
+        так как мог быть изменен другим процессом. Результаты оценки сохраняются, только если аренда не утеряна,
+        а при утере аренды обучение прерывается досрочно.
+        """
+        if self._doc.is_new:
+            self.save()
+
+        with lease.hold(self.id, owner) as lost:
+            self._doc = store.Doc(id_=self.id)
+            self._owner = owner
+            self._lease_lost = lost
+            try:
+                yield
+            finally:
+                self._owner = None
+                self._lease_lost = None
+
+    def die(self, outcome: str = "died") -> None:
+        """Организм удаляется из популяции.
+
+        Гены, исход оценки и время обучения сохраняются, чтобы суррогатная модель училась избегать
+        неудачных генотипов.
+
+        :param outcome:
+            Причина гибели организма.
+        """
+        doc = self._doc
+        with contextlib.suppress(AttributeError):
+            store.get_outcomes_collection().insert_one(
+                {"genes": doc.genotype.flat(), "outcome": outcome, "timer": doc.timer},
+            )
+        doc.delete()
 
     def make_child(self, scale: float) -> "Organism":
         """Создает новый организм с помощью дифференциальной мутации."""
@@ -148,12 +272,33 @@ class Organism:  # noqa: WPS214
         При наличии натренированной модели, которая составлена на предыдущей статистике и для таких же
         тикеров, будет использованы сохраненные веса сети, или выбрасывается исключение.
         """
+        return self.check_forecast(self.trained_model(tickers, end).forecast())
+
+    def trained_model(self, tickers: tuple[str, ...], end: pd.Timestamp) -> Model:
+        """Натренированная модель организма для прогноза.
+
+        Выбрасывает исключение, если модель отсутствует или натренирована для других тикеров.
+        """
         doc = self._doc
         if (pickled_model := doc.model) is None or tickers != tuple(doc.tickers):
             raise ForecastError
 
-        model = Model(tickers, end, self.genotype.get_phenotype(), pickled_model)
-        forecast = model.forecast()
+        return Model(tickers, end, self.genotype.get_phenotype(), pickled_model)
+
+    def architecture(self, tickers: tuple[str, ...]) -> str:
+        """Ключ архитектуры натренированной модели организма для совместного прогноза.
+
+        Модель не загружается. Выбрасывает исключение, если модель отсутствует или натренирована для других
+        тикеров.
+        """
+        doc = self._doc
+        if doc.tickers is None or tickers != tuple(doc.tickers) or not doc.has_value("model"):
+            raise ForecastError
+
+        return architecture(self.genotype.get_phenotype())
+
+    def check_forecast(self, forecast: Forecast) -> Forecast:
+        """Проверяет прогноз модели организма — организм с некорректным прогнозом умирает."""
         if np.any(np.isnan(forecast.cov)):
             self.die()
             raise ForecastError
@@ -164,6 +309,20 @@ class Organism:  # noqa: WPS214
         self._doc.save()
 
 
+def _quality_metrics(
+    tickers: tuple[str, ...],
+    end: pd.Timestamp,
+    phenotype: dict,
+    pickled_model: bytes,
+) -> tuple[float, float]:
+    """Качество натренированной модели для даты в процессе пула."""
+    return Model(tickers, end, phenotype, pickled_model).quality_metrics
+
+
+def _never() -> bool:
+    return False
+
+
 def _format_scores_list(scores: list[float]) -> str:
     block = "-"
     if scores:
@@ -179,9 +338,7 @@ def _format_scores_list(scores: list[float]) -> str:
 
 def count() -> int:
     """Количество организмов в популяции."""
-    collection = store.get_collection()
-
-    return collection.count_documents({})
+    return snapshot().count
 
 
 def create_new_organism() -> Organism:
@@ -192,6 +349,38 @@ def create_new_organism() -> Organism:
     return org
 
 
+def learning_curves(date: pd.Timestamp) -> list[list[float]]:
+    """Кривые обучения новых организмов, обученных с нуля до данной даты.
+
+    Включают кривые прерванных и погибших организмов, чтобы порог отсечения не рос по мере отбора.
+    """
+    docs = store.get_curves_collection().find({"date": date}, projection={"llh": True})
+
+    return [doc["llh"] for doc in docs]
+
+
+def _archive_curve(date: pd.Timestamp, curve: list[float]) -> None:
+    if curve:
+        store.get_curves_collection().insert_one({"date": date, "llh": curve})
+
+
+def evaluated_docs() -> Iterable[dict]:
+    """Генотипы, метрики качества и время обучения оцененных организмов."""
+    yield from store.get_collection().find(
+        {"llh.0": {"$exists": True}, "timer": {"$gt": 0}},
+        projection={"genotype": True, "llh": True, "ir": True, "timer": True},
+    )
+
+
+def outcome_docs(limit: int) -> Iterable[dict]:
+    """Гены, исход оценки и время обучения последних погибших организмов."""
+    yield from store.get_outcomes_collection().find(
+        projection={"genes": True, "outcome": True, "timer": True},
+        sort=[(store.ID, pymongo.DESCENDING)],
+        limit=limit,
+    )
+
+
 def _get_parents() -> tuple[Organism, Organism]:
     """Получить родителей.
 
@@ -235,13 +424,20 @@ def get_next_one(date: Optional[pd.Timestamp]) -> Optional[Organism]:
     самая старая модель, чтобы эволюция после перезапуска программы начиналась с проверенных организмов.
     """
     doc = next(
-        _aggregate_oldest(1, {"$match": {"date": {"$ne": date}}}),
+        _aggregate_oldest(1, {"$match": {"date": {"$ne": date}, **lease.free()}}),
         None,
     )
 
     return doc and Organism(_id=doc["_id"])
 
 
+def lease_next(date: pd.Timestamp, owner: str) -> Optional[Organism]:
+    """Арендует самый старый свободный организм, оцененный для даты не равной данной, и None при отсутствии."""
+    id_ = lease.lease_next(date, owner)
+
+    return id_ and Organism(_id=id_)
+
+
 def generations_count() -> int:
     """Количество поколений.
 
@@ -249,26 +445,12 @@ def generations_count() -> int:
     грубо показывает количество выживших поколений. Так переход от 1 к 2 поколениям очень резко влияет
     на уровень значимости в тестах минимальное количество поколений 2.
     """
-    collection = store.get_collection()
-
-    pipeline = [
-        {
-            "$group": {
-                "_id": {},
-                "min": {"$min": "$wins"},
-                "max": {"$max": "$wins"},
-            },
-        },
-    ]
-    doc = next(collection.aggregate(pipeline))
-    gens = 1 + (doc["max"] or 0) - (doc["min"] or 0)
-
-    return max(2, gens)
+    return snapshot().generations_count
 
 
 def base_pop_metrics() -> Iterable[dict[str, list[float]]]:
     """Данные по доходности базовой популяции."""
-    yield from _aggregate_oldest(generations_count(), {"$match": {"date": {"$exists": True}}})
+    yield from snapshot().base_pop_metrics
 
 
 def get_oldest() -> Iterable[Organism]:
@@ -280,38 +462,22 @@ def get_oldest() -> Iterable[Organism]:
 
 def min_max_date() -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
     """Минимальная и максимальная дата в популяции."""
-    collection = store.get_collection()
-
-    pipeline = [
-        {
-            "$group": {
-                "_id": {},
-                "min": {"$min": "$date"},
-                "max": {"$max": "$date"},
-            },
-        },
-    ]
-    doc = next(collection.aggregate(pipeline), {})
-    if doc.get("max") is None:
-        return None, None
-
-    return pd.Timestamp(doc["min"]), pd.Timestamp(doc["max"])
+    return snapshot().min_max_date
 
 
 def print_stat() -> None:
     """Распечатка сводных статистических данных по популяции."""
-    _print_key_stats("llh")
-    _print_key_stats("ir", "RET")
-    _print_wins_stats()
+    pop = snapshot()
+    _print_key_stats(pop, "llh")
+    _print_key_stats(pop, "ir", "RET")
+    LOGGER.info(
+        f"Организмов - {pop.count} / Максимум оценок - {pop.max_wins} / Поколений - {pop.generations_count}",
+    )
 
 
-def _print_key_stats(key: str, view: str = None) -> None:
+def _print_key_stats(pop: "PopulationSnapshot", key: str, view: str = None) -> None:
     """Статистика по минимуму, медиане и максимуму llh."""
-    collection = store.get_collection()
-    db_find = collection.find
-    cursor = db_find(filter={key: {"$exists": True}}, projection=[key])
-
-    keys = map(lambda doc: doc[key], cursor)
+    keys = (doc[key] for doc in pop.docs if key in doc)
     keys = map(
         lambda amount: amount if isinstance(amount, float) else np.median(np.array(amount)),
         keys,
@@ -335,22 +501,77 @@ def _print_key_stats(key: str, view: str = None) -> None:
     LOGGER.info(f"{view} - ({quantiles})")  # noqa: WPS421
 
 
-def _print_wins_stats() -> None:
-    """Статистика по максимуму побед."""
-    collection = store.get_collection()
-    db_find = collection.find
-    request = {
-        "filter": {"wins": {"$exists": True}},
-        "projection": ["wins"],
-        "sort": [("wins", pymongo.DESCENDING)],
-        "limit": 1,
-    }
-    wins = list(db_find(**request))
-    max_wins = None
-    if wins:
-        max_wins = wins[0]
-        max_wins = max_wins["wins"]
+class PopulationSnapshot:
+    """Снимок метрик всех организмов популяции в памяти.
 
-    LOGGER.info(
-        f"Организмов - {count()} / Максимум оценок - {max_wins} / Поколений - {generations_count()}",
-    )
+    Метрики загружаются одним запросом, а статистика популяции рассчитывается без обращения к MongoDB.
+    Снимок устаревает при изменении документов любым процессом.
+    """
+
+    def __init__(self) -> None:
+        """Загружает метрики организмов в порядке возрастания id."""
+        self.revision = store.revision()
+        self.docs = list(
+            store.get_collection().find(
+                projection={"llh": True, "ir": True, "date": True, "timer": True, "warm_timer": True, "wins": True},
+                sort=[(store.ID, pymongo.ASCENDING)],
+            ),
+        )
+
+    @property
+    def count(self) -> int:
+        """Количество организмов в популяции."""
+        return len(self.docs)
+
+    @functools.cached_property
+    def generations_count(self) -> int:
+        """Количество поколений — не менее 2."""
+        wins = [doc["wins"] for doc in self.docs if doc.get("wins") is not None] or [0]
+
+        return max(2, 1 + max(wins) - min(wins))
+
+    @property
+    def base_pop_metrics(self) -> list[dict]:
+        """Метрики самых старых оцененных организмов по количеству поколений."""
+        evaluated = [doc for doc in self.docs if "date" in doc]
+
+        return [
+            {key: doc_value for key, doc_value in doc.items() if key != "wins"}
+            for doc in evaluated[: self.generations_count]
+        ]
+
+    @property
+    def min_max_date(self) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """Минимальная и максимальная дата в популяции."""
+        dates = [doc["date"] for doc in self.docs if doc.get("date") is not None]
+        if not dates:
+            return None, None
+
+        return pd.Timestamp(min(dates)), pd.Timestamp(max(dates))
+
+    @property
+    def max_wins(self) -> Optional[int]:
+        """Максимальное количество оценок организма."""
+        wins = [doc["wins"] for doc in self.docs if "wins" in doc]
+
+        return max(wins, default=None)
+
+
+def snapshot(refresh: bool = False) -> PopulationSnapshot:
+    """Снимок популяции, актуальный с учетом изменений всеми процессами.
+
+    Актуальность проверяется по счетчику изменений в MongoDB, поэтому организмы, удаленные или переоцененные
+    рабочими процессами во время шага эволюции, учитываются при следующем обращении к снимку.
+
+    :param refresh:
+        Загрузить снимок заново, чтобы учесть изменения в обход документов организмов.
+    """
+    if refresh:
+        _snapshot.cache_clear()
+
+    return _snapshot(store.get_collection().full_name, store.revision())
+
+
+@functools.lru_cache(maxsize=1)
+def _snapshot(collection: str, revision: int) -> PopulationSnapshot:
+    return PopulationSnapshot()
@@ -7,6 +7,7 @@ https://arxiv.org/abs/1810.08240
 Sequential estimation of quantiles with applications to A/B-testing and best-arm identification
 https://arxiv.org/abs/1906.09712
 """
+import functools
 import itertools
 
 import numpy as np
@@ -79,6 +80,7 @@ def _median_conf_radius(
     return k1 * 0.5 * (l_t / t) ** 0.5
 
 
+@functools.lru_cache(maxsize=None)
 def minimum_bounding_n(alfa: float) -> int:
     """Подбор минимального ограничивающего n для заданного уровня значимости.
 
@@ -112,3 +114,50 @@ def median_conf_bound(sample: list[float], p_value: float) -> tuple[float, float
             [(0.5 - radius) * 100, (0.5 + radius) * 100],
         ),
     )
+
+
+def median_conf_bounds(samples: np.ndarray, p_value: float) -> tuple[np.ndarray, np.ndarray]:
+    """Доверительные интервалы для медиан выборок, расположенных вдоль последней оси массива.
+
+    Выборки разной длины дополняются NaN. Результаты совпадают с median_conf_bound для каждой выборки.
+    """
+    n = minimum_bounding_n(p_value)  # noqa: WPS111
+    ordered = np.sort(samples, axis=-1)
+    t = (~np.isnan(ordered)).sum(axis=-1)  # noqa: WPS111
+    radius = _median_conf_radius(np.maximum(t, n), p_value, n)
+
+    bounds = []
+    for share in (0.5 - radius, 0.5 + radius):
+        position = np.clip(share * (t - 1), 0, np.maximum(t - 1, 0))
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, np.maximum(t - 1, 0))
+        lower_value = np.take_along_axis(ordered, lower[..., np.newaxis], axis=-1)[..., 0]
+        upper_value = np.take_along_axis(ordered, upper[..., np.newaxis], axis=-1)[..., 0]
+        bounds.append(lower_value + (upper_value - lower_value) * (position - lower))
+
+    small = t < n
+
+    return np.where(small, -np.inf, bounds[0]), np.where(small, np.inf, bounds[1])
+
+
+def median_conf_upper_best(sample: list[float], remaining: int, p_value: float) -> float:
+    """Наибольшая возможная верхняя граница доверительного интервала для медианы после добавления к выборке еще
+    remaining значений.
+
+    Верхняя граница не убывает при росте любого значения выборки, поэтому наибольшая граница достигается при
+    сколь угодно больших новых значениях. Если в этом случае граница определяется новыми значениями, то она
+    не ограничена.
+    """
+    t = len(sample) + remaining  # noqa: WPS111
+    n = minimum_bounding_n(p_value)  # noqa: WPS111
+    if t < n:
+        return np.inf
+    position = (0.5 + _median_conf_radius(t, p_value, n)) * (t - 1)
+    lower = int(np.floor(position))
+    upper = int(np.ceil(position))
+    if upper >= len(sample):
+        return np.inf
+
+    ordered = np.sort(sample)
+
+    return float(ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower))
@@ -14,12 +14,45 @@ _COLLECTION = MONGO_CLIENT[DB]["models"]
 # Название столбца с индексом
 ID: Final = "_id"
 
+# Суффиксы коллекций с архивами кривых обучения и исходов оценки погибших организмов
+CURVES_SUFFIX: Final = "_curves"
+OUTCOMES_SUFFIX: Final = "_outcomes"
+
+# Суффикс коллекции и ID документа со счетчиком изменений документов коллекции всеми процессами
+REVISION_SUFFIX: Final = "_revision"
+_REVISION: Final = "revision"
+
 
 def get_collection() -> Collection:
     """Коллекция для хранения моделей."""
     return _COLLECTION
 
 
+def get_curves_collection() -> Collection:
+    """Коллекция с архивом кривых обучения, который сохраняется после гибели организмов."""
+    return _COLLECTION.database[f"{_COLLECTION.name}{CURVES_SUFFIX}"]
+
+
+def get_outcomes_collection() -> Collection:
+    """Коллекция с генами, исходом оценки и временем обучения погибших организмов."""
+    return _COLLECTION.database[f"{_COLLECTION.name}{OUTCOMES_SUFFIX}"]
+
+
+def revision() -> int:
+    """Количество изменений документов коллекции всеми процессами для проверки актуальности кешей."""
+    doc = _revision_collection().find_one({ID: _REVISION})
+
+    return doc["count"] if doc else 0
+
+
+def _increment_revision() -> None:
+    _revision_collection().update_one({ID: _REVISION}, {"$inc": {"count": 1}}, upsert=True)
+
+
+def _revision_collection() -> Collection:
+    return _COLLECTION.database[f"{_COLLECTION.name}{REVISION_SUFFIX}"]
+
+
 class BaseField:
     """Базовый дескриптор поля.
 
@@ -95,6 +128,33 @@ class IdError(POptimizerError):
     """Ошибка попытки загрузить ID, которого нет в MongoDB."""
 
 
+class LazyField(DefaultField):
+    """Дескриптор поля, загружаемого из MongoDB отдельным запросом при первом обращении.
+
+    Используется для больших полей, которые не нужны для большинства операций с документом.
+    """
+
+    def __set__(self, instance: Any, value: Any):  # noqa: WPS110
+        """Присвоенное значение не требует загрузки."""
+        vars(instance)["_lazy"].discard(self._name)  # noqa: WPS421
+        super().__set__(instance, value)
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        """При первом обращении загружает значение поля из MongoDB."""
+        data_dict = vars(instance)  # noqa: WPS421
+        key = self._name
+
+        if key in data_dict["_lazy"]:
+            doc = get_collection().find_one({ID: data_dict[ID]}, projection={key: True})
+            if doc is None:
+                raise IdError(data_dict[ID])
+            data_dict["_lazy"].discard(key)
+            if key in doc:
+                data_dict[key] = doc[key]
+
+        return super().__get__(instance, owner)
+
+
 class Doc:
     """Документ в базе данных."""
 
@@ -106,31 +166,61 @@ class Doc:
     ):
         """Создает словарь для хранения изменений. Загружает данные по id или создает id."""
         self._update = {}
+        self._lazy = set()
         if id_ is None:
             self.id = bson.ObjectId()  # noqa: WPS601
             self.genotype = genotype  # noqa: WPS601
         else:
             self._load(id_)
 
-    def save(self) -> None:
-        """Сохраняет измененные значения в MongoDB."""
+    @property
+    def is_new(self) -> bool:
+        """Документ еще не сохранялся в MongoDB."""
+        return ID in self._update
+
+    def save(self, condition: Optional[dict] = None) -> bool:
+        """Сохраняет измененные значения в MongoDB.
+
+        При наличии дополнительного условия существующий документ обновляется только при его выполнении.
+
+        :param condition:
+            Дополнительное условие на сохраненный документ.
+        :return:
+            Были ли сохранены изменения.
+        """
         collection = get_collection()
         update = self._update
-        collection.update_one(
-            filter={ID: self.id},
+        rez = collection.update_one(
+            filter={ID: self.id, **(condition or {})},
             update={"$set": self._update},
-            upsert=True,
+            upsert=not condition,
         )
+        if not (rez.matched_count or rez.upserted_id):
+            return False
+
         update.clear()
+        _increment_revision()
+
+        return True
 
     def delete(self) -> None:
         """Удаляет документ из базы."""
         collection = get_collection()
         collection.delete_one({ID: self.id})
+        _increment_revision()
+
+    def has_value(self, key: str) -> bool:
+        """Проверяет, что значение поля не пустое, без загрузки незагруженного ленивого поля из MongoDB."""
+        if key not in self._lazy:
+            return getattr(self, key) is not None
+
+        return get_collection().find_one({ID: self.id, key: {"$ne": None}}, projection={ID: True}) is not None
 
     def _load(self, id_: bson.ObjectId) -> None:
+        """Загружает все поля, кроме ленивых, которые загружаются при первом обращении."""
         collection = get_collection()
-        doc = collection.find_one({ID: id_})
+        lazy = {name for name, field in vars(Doc).items() if isinstance(field, LazyField)}  # noqa: WPS421
+        doc = collection.find_one({ID: id_}, projection={name: False for name in lazy})
 
         if doc is None:
             raise IdError(id_)
@@ -139,13 +229,15 @@ class Doc:
             setattr(self, key, value)
 
         self._update.clear()
+        self._lazy = lazy
 
     id = BaseField(index=True)
     genotype = GenotypeField()
     wins = DefaultField(0)
-    model = DefaultField()
+    model = LazyField()
     llh = FactoryField(list)
     ir = FactoryField(list)
     date = DefaultField()
     timer = DefaultField(0)
+    warm_timer = DefaultField(0)
     tickers = DefaultField()
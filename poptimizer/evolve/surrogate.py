@@ -0,0 +1,92 @@
+"""Суррогатная модель для предварительного отбора потомков перед обучением."""
+import logging
+from typing import Final
+
+import numpy as np
+from scipy import stats
+from sklearn import ensemble
+
+from poptimizer import config
+from poptimizer.evolve import population
+from poptimizer.evolve.genotype import Genotype
+
+# Минимальное количество оцененных организмов для обучения суррогатной модели
+MIN_OBSERVATIONS: Final = 16
+# Количество последних погибших организмов, используемых для обучения
+MAX_OUTCOMES: Final = 1000
+
+LOGGER = logging.getLogger()
+
+
+def best_child(
+    parent: population.Organism,
+    scale: float,
+    candidates: int = config.SURROGATE_CANDIDATES,
+) -> population.Organism:
+    """Потомок с наибольшим предсказанным качеством в расчете на единицу предсказанного времени обучения.
+
+    Суррогатные модели градиентного бустинга обучаются на значениях генов оцененных организмов популяции и
+    последних погибших организмов. Качество живого организма — меньший из рангов медиан LLH и доходности,
+    так как запас организма определяется худшей из метрик, а погибшего — ноль. Время обучения известно для
+    всех живых и обученных погибших организмов. При одном кандидате или недостатке данных возвращается
+    первый из потомков.
+
+    :param parent:
+        Родитель потомков.
+    :param scale:
+        Фактор масштабирования мутации.
+    :param candidates:
+        Количество потомков для отбора.
+    :return:
+        Лучший потомок.
+    """
+    children = [parent.make_child(scale) for _ in range(max(1, candidates))]
+    if len(children) == 1:
+        return children[0]
+
+    children_genes = np.array([child.genotype.flat() for child in children])
+    genes, quality, time_genes, log_time = _observations(children_genes.shape[1])
+    if min(len(quality), len(log_time)) < MIN_OBSERVATIONS:
+        return children[0]
+
+    quality = _fit(genes, quality).predict(children_genes)
+    time = np.exp(_fit(time_genes, log_time).predict(children_genes) - np.median(log_time))
+    best = int(np.argmax(np.maximum(quality, 0) / time))
+
+    LOGGER.info(f"Суррогатный отбор - ранг качества {quality[best]:.2%} / время {time[best]:.2f} от медианы")
+
+    return children[best]
+
+
+def _observations(n_genes: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Значения генов и ранги качества, а также значения генов и логарифмы времени обучения.
+
+    Погибшие организмы с другим количеством генов, сохраненные до изменения генотипа, не используются.
+    """
+    docs = list(population.evaluated_docs())
+    genes = [Genotype(doc["genotype"]).flat() for doc in docs]
+    llh = stats.rankdata([np.median(doc["llh"]) for doc in docs]) / max(1, len(docs))
+    ir = stats.rankdata([np.median(doc["ir"]) for doc in docs]) / max(1, len(docs))
+    quality = list(np.minimum(llh, ir))
+    timers = [doc["timer"] for doc in docs]
+
+    time_genes = list(genes)
+    for doc in population.outcome_docs(MAX_OUTCOMES):
+        if len(doc["genes"]) != n_genes:
+            continue
+        genes.append(doc["genes"])
+        quality.append(0)
+        if doc["timer"] > 0:
+            time_genes.append(doc["genes"])
+            timers.append(doc["timer"])
+
+    return (
+        np.array(genes).reshape(-1, n_genes),
+        np.array(quality, dtype=float),
+        np.array(time_genes).reshape(-1, n_genes),
+        np.log(np.array(timers, dtype=float)),
+    )
+
+
+def _fit(genes: np.ndarray, target: np.ndarray) -> ensemble.GradientBoostingRegressor:
+    return ensemble.GradientBoostingRegressor(subsample=0.8).fit(genes, target)
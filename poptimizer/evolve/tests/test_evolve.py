@@ -1,6 +1,9 @@
 """Тесты для эволюционного процесса."""
+import pandas as pd
+import pytest
+
 from poptimizer.dl import ModelError
-from poptimizer.evolve import evolve
+from poptimizer.evolve import evolve, seq
 
 
 def test_setup_needed(mocker):
@@ -29,11 +32,84 @@ def test_setup_not_needed(mocker):
 
 def test_eval_and_print_err(mocker):
     """При ошибке меняет шкалу разброса."""
-    org = mocker.Mock()
-    org.evaluate_fitness.side_effect = ModelError
+    org = mocker.MagicMock()
+    org.evaluate_fitness_history.side_effect = ModelError
 
     evolution = evolve.Evolution()
 
     assert evolution._eval_organism(org) is None
 
-    org.evaluate_fitness.assert_called_once()
+    org.evaluate_fitness_history.assert_called_once()
+
+
+def test_eval_busy_organism(mocker):
+    """Организм, арендованный другим процессом, не оценивается и не ожидается."""
+    org = mocker.MagicMock()
+    org.leased.side_effect = evolve.lease.BusyError
+
+    evolution = evolve.Evolution()
+
+    assert evolution._eval_organism(org) is None
+    org.evaluate_fitness_history.assert_not_called()
+
+
+def test_step_without_free_organisms(mocker):
+    """При аренде всех организмов рабочими процессами шаг ожидает их освобождения."""
+    sleep = mocker.patch.object(evolve.time, "sleep")
+
+    assert evolve.Evolution()._step(None) is None
+    sleep.assert_called_once_with(evolve.WORKER_POLL_SECONDS)
+
+
+def test_is_hopeless(mocker):
+    """Оценка прекращается, только если организм уступает при любых результатах для оставшихся дат."""
+    dates = list(pd.date_range("2021-01-01", periods=30, freq="B"))
+    fake_population = mocker.patch.object(evolve, "population")
+    fake_population.generations_count.return_value = 2
+    fake_population.base_pop_metrics.return_value = [{"_id": 1, "date": dates[-1], "llh": [0] * 30, "ir": [0] * 30}]
+
+    org = mocker.Mock()
+    org.id = 2
+    org.date = dates[-4]
+    org.llh = [-1] * 27
+    org.ir = [-1] * 27
+
+    evolution = evolve.Evolution()
+
+    assert evolution._is_hopeless(org, dates)
+
+    org.date = dates[4]
+    org.llh = [-1] * 5
+    org.ir = [-1] * 5
+
+    assert not evolution._is_hopeless(org, dates)
+
+
+def test_pairwise_bounds(mocker):
+    """Разницы выравниваются по датам, а матрицы антисимметричны по медиане и совпадают с попарным расчетом."""
+    fake_population = mocker.patch.object(evolve, "population")
+    fake_population.generations_count.return_value = 1
+    dates = pd.date_range("2021-01-01", periods=2, freq="B")
+    docs = [
+        {"date": dates[1], "llh": list(range(1, 31))},
+        {"date": dates[0], "llh": list(range(30))},
+        {"date": dates[1], "llh": [0] * 20},
+    ]
+
+    median, upper = evolve.pairwise_bounds(docs, "LLH")
+
+    assert median.shape == upper.shape == (3, 3)
+    assert median[0, 1] == 2
+    assert median[1, 0] == -2
+    assert median[0, 0] == 0
+    _, pair_upper = seq.median_conf_bound(list(range(1, 21)), evolve.config.P_VALUE)
+    assert upper[0, 2] == pytest.approx(pair_upper)
+
+
+def test_time_delta_includes_warm_start(mocker):
+    """Время дообучения учитывается в штрафе за время."""
+    fake_population = mocker.patch.object(evolve, "population")
+    fake_population.base_pop_metrics.return_value = [{"timer": 100}, {"timer": 50, "warm_timer": 100}]
+
+    assert evolve._time_delta(mocker.Mock(timer=100, warm_timer=0)) == 0
+    assert evolve._time_delta(mocker.Mock(timer=150, warm_timer=75)) == 0.5
@@ -1,4 +1,6 @@
 """Тесты для подготовки прогнозов."""
+from concurrent import futures
+
 import pandas as pd
 
 from poptimizer.evolve import forecaster
@@ -45,3 +47,42 @@ def test_prepare_forecasts(mocker):
     mocker.patch.object(forecaster.population, "get_oldest", return_value=fake_organisms)
 
     assert len(forecaster._prepare_forecasts("", "")) == 100
+
+
+def test_prepare_forecasts_groups(mocker):
+    """Модели с одинаковой архитектурой прогнозируют совместно, а прогнозы идут в порядке организмов."""
+    fake_organisms = [mocker.MagicMock() for _ in range(5)]
+    for n_organism, organism in enumerate(fake_organisms):
+        organism.architecture.return_value = n_organism % 2
+        organism.trained_model.return_value.forecast = n_organism
+        organism.check_forecast.side_effect = lambda forecast: forecast
+    fake_organisms[3].trained_model.side_effect = forecaster.population.ForecastError
+    mocker.patch.object(forecaster.population, "get_oldest", return_value=fake_organisms)
+    ensemble = mocker.patch.object(
+        forecaster,
+        "ensemble_forecasts",
+        side_effect=lambda models: [model.forecast for model in models],
+    )
+
+    assert forecaster._prepare_forecasts("", "") == [0, 1, 2, 4]
+    assert ensemble.call_count == 2
+
+
+def test_prepare_forecasts_parallel(mocker):
+    """Параллельные прогнозы выдаются в порядке организмов."""
+    fake_organisms = [mocker.MagicMock(id=n_organism) for n_organism in range(5)]
+    for n_organism, organism in enumerate(fake_organisms):
+        organism.architecture.return_value = n_organism % 3
+        organism.trained_model.return_value.forecast = n_organism
+        organism.check_forecast.side_effect = lambda forecast: forecast
+    mocker.patch.object(forecaster.population, "get_oldest", return_value=fake_organisms)
+    mocker.patch.object(forecaster.population, "Organism", side_effect=lambda _id: fake_organisms[_id])
+    mocker.patch.object(forecaster.config, "FORECAST_WORKERS", 2)
+    mocker.patch.object(forecaster.pool, "make_pool", return_value=futures.ThreadPoolExecutor(2))
+    mocker.patch.object(
+        forecaster,
+        "ensemble_forecasts",
+        side_effect=lambda models: [model.forecast for model in models],
+    )
+
+    assert forecaster._prepare_forecasts("", "") == list(range(5))
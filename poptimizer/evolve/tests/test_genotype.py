@@ -71,3 +71,13 @@ def test_make_child_zero_scale():
 
     assert isinstance(child, genotype.Genotype)
     assert child.data == parent.data
+
+
+def test_flat():
+    """Гены выдаются в порядке хромосом и описания генов в хромосоме."""
+    genes = genotype.Genotype({"Scheduler": {"epochs": 7.0, "max_lr": 0.5}})
+    flat = genes.flat()
+
+    assert len(flat) == sum(len(chromosome) for chromosome in genes.values())
+    assert flat == [gene for chromosome in genes.values() for gene in chromosome.flat()]
+    assert genes["Scheduler"].flat()[:2] == [0.5, 7.0]
@@ -1,11 +1,14 @@
+import datetime
 import logging
+from concurrent import futures
 from typing import Iterable
 
 import pandas as pd
 import pytest
 
 from poptimizer.dl import Forecast
-from poptimizer.evolve import population, store
+from poptimizer.evolve import lease, population, store
+from poptimizer.evolve.genotype import Genotype
 
 
 @pytest.fixture(scope="module", autouse=True)
@@ -19,13 +22,16 @@ def set_test_collection():
 
     store._COLLECTION = saved_collection
     test_collection.drop()
+    test_collection.database[f"test{store.CURVES_SUFFIX}"].drop()
+    test_collection.database[f"test{store.OUTCOMES_SUFFIX}"].drop()
+    test_collection.database[f"test{store.REVISION_SUFFIX}"].drop()
 
 
 class FakeModel:
     COUNTER = 0
 
     # noinspection PyUnusedLocal
-    def __init__(self, tickers, end, phenotype, pickled_model=None):
+    def __init__(self, tickers, end, phenotype, pickled_model=None, warm_model=None, peer_curves=None, interrupt=None):
         pass
 
     @property
@@ -33,6 +39,10 @@ class FakeModel:
         self.__class__.COUNTER += 1
         return 5, 7
 
+    @property
+    def learning_curve(self):
+        return [1, 2, 3]
+
     def __bytes__(self):
         return bytes(6)
 
@@ -62,6 +72,66 @@ def test_evaluate_fitness(organism):
     assert organism._doc.tickers == ["GAZP", "AKRN"]
     assert organism._doc.model == bytes(6)
     assert organism._doc.timer > 0
+    assert population.learning_curves(pd.Timestamp("2020-04-12")) == [[1, 2, 3]]
+
+
+class CurveModel(FakeModel):
+    PEER_CURVES = []
+
+    def __init__(self, tickers, end, phenotype, pickled_model=None, warm_model=None, peer_curves=None, interrupt=None):
+        self.PEER_CURVES.append(peer_curves)
+
+    @property
+    def quality_metrics(self):
+        if len(self.PEER_CURVES) == 1:
+            raise ValueError
+        return 5, 7
+
+
+def test_prune_only_new(monkeypatch):
+    monkeypatch.setattr(population, "Model", CurveModel)
+    organism = population.Organism()
+    date = pd.Timestamp("2020-04-20")
+
+    with pytest.raises(ValueError):
+        organism.evaluate_fitness(("GAZP", "AKRN"), date)
+    organism.evaluate_fitness(("GAZP", "AKRN"), date)
+    organism.evaluate_fitness(("GAZP", "LKOH"), pd.Timestamp("2020-04-21"))
+
+    assert CurveModel.PEER_CURVES == [[], [[1, 2, 3]], None]
+    assert population.learning_curves(date) == [[1, 2, 3], [1, 2, 3]]
+
+    organism.die()
+
+
+class InterruptModel(FakeModel):
+    # noinspection PyUnusedLocal
+    def __init__(self, tickers, end, phenotype, pickled_model=None, warm_model=None, peer_curves=None, interrupt=None):
+        self._interrupt = interrupt
+
+    @property
+    def quality_metrics(self):
+        self._interrupt()
+        return 5, 7
+
+
+def test_lost_lease_interrupts_training(monkeypatch):
+    monkeypatch.setattr(population, "Model", InterruptModel)
+    monkeypatch.setattr(lease, "HEARTBEAT", datetime.timedelta(milliseconds=10))
+    organism = population.Organism()
+
+    with pytest.raises(lease.LeaseError):
+        with organism.leased("first"):
+            organism.evaluate_fitness(("GAZP", "AKRN"), pd.Timestamp("2020-04-12"))
+            lease.release(organism.id, "first")
+            lease.acquire(organism.id, "second")
+            assert organism._lease_lost.wait(1)
+            organism.evaluate_fitness(("GAZP", "AKRN"), pd.Timestamp("2020-04-13"))
+
+    assert population.Organism(_id=organism.id).llh == [5]
+
+    lease.release(organism.id, "second")
+    organism.die()
 
 
 def test_reload_organism(organism):
@@ -100,6 +170,136 @@ def test_evaluate_new_tickers(organism):
     assert organism.scores == 3
 
 
+class DateModel(FakeModel):
+    PICKLED = []
+    WARM = []
+
+    def __init__(self, tickers, end, phenotype, pickled_model=None, warm_model=None, peer_curves=None, interrupt=None):
+        self._end = end
+        self.PICKLED.append(pickled_model)
+        self.WARM.append(warm_model)
+
+    @property
+    def quality_metrics(self):
+        return self._end.day, -self._end.day
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_evaluate_fitness_history(monkeypatch, workers):
+    monkeypatch.setattr(population, "Model", DateModel)
+    monkeypatch.setattr(population.config, "EVOLVE_WORKERS", workers)
+    monkeypatch.setattr(population.pool, "make_pool", futures.ThreadPoolExecutor)
+    DateModel.PICKLED.clear()
+
+    organism = population.Organism()
+    dates = [pd.Timestamp("2020-04-13"), pd.Timestamp("2020-04-14"), pd.Timestamp("2020-04-15")]
+
+    assert organism.evaluate_fitness_history(("GAZP", "AKRN"), dates) == [15, 14, 13]
+    assert organism.ir == [-15, -14, -13]
+    assert organism._doc.wins == 3
+    assert organism._doc.date == dates[-1]
+    assert organism._doc.model == bytes(6)
+    assert DateModel.PICKLED == [None, bytes(6), bytes(6)]
+
+    organism.die()
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_evaluate_fitness_history_stop(monkeypatch, workers):
+    monkeypatch.setattr(population, "Model", DateModel)
+    monkeypatch.setattr(population.config, "EVOLVE_WORKERS", workers)
+    monkeypatch.setattr(population.pool, "make_pool", futures.ThreadPoolExecutor)
+
+    organism = population.Organism()
+    dates = list(pd.date_range("2020-04-13", periods=5, freq="B"))
+
+    assert organism.evaluate_fitness_history(("GAZP", "AKRN"), dates, lambda: len(organism.llh) > 2) == [15, 14, 13]
+    assert organism._doc.date == dates[2]
+
+    organism.die()
+
+
+def test_evaluate_fitness_warm_start(monkeypatch):
+    monkeypatch.setattr(population, "Model", DateModel)
+    monkeypatch.setattr(population.config, "EVOLVE_WORKERS", 2)
+    DateModel.PICKLED.clear()
+    DateModel.WARM.clear()
+
+    organism = population.Organism(genotype=Genotype({"Scheduler": {"warm_start": 1.0}}))
+    dates = [pd.Timestamp("2020-04-13"), pd.Timestamp("2020-04-14"), pd.Timestamp("2020-04-15")]
+
+    assert organism.evaluate_fitness_history(("GAZP", "AKRN"), dates) == [15, 14, 13]
+    assert DateModel.PICKLED == [None, None, None]
+    assert DateModel.WARM == [None, bytes(6), bytes(6)]
+    assert organism.timer > 0
+    assert organism.warm_timer > 0
+
+    organism.die()
+
+
+def test_lease_next():
+    date = pd.Timestamp("2020-04-15")
+    organism = population.Organism()
+    organism._doc.date = pd.Timestamp("2020-04-14")
+    organism.save()
+
+    leased = []
+    while (next_one := population.lease_next(date, "first")) is not None:
+        leased.append(next_one.id)
+    assert organism.id in leased
+    assert population.lease_next(date, "second") is None
+    assert population.get_next_one(date) is None
+
+    for id_ in leased:
+        lease.release(id_, "first")
+    assert population.get_next_one(date).id == leased[0]
+
+    organism.die()
+
+
+def test_lease_expiry_by_server_time():
+    organism = population.Organism()
+    organism.save()
+    collection = store.get_collection()
+
+    assert lease.acquire(organism.id, "first")
+    expiry = collection.find_one({store.ID: organism.id})[lease.EXPIRY]
+    assert datetime.datetime.utcnow() < expiry <= datetime.datetime.utcnow() + lease.LEASE_TTL
+    assert not lease.acquire(organism.id, "second")
+
+    collection.update_one({store.ID: organism.id}, {"$set": {lease.EXPIRY: expiry - 2 * lease.LEASE_TTL}})
+    assert lease.acquire(organism.id, "second")
+    assert not lease.extend(organism.id, "first")
+    assert lease.extend(organism.id, "second")
+
+    lease.release(organism.id, "second")
+    organism.die()
+
+
+@pytest.mark.usefixtures("fake_model")
+def test_leased_record():
+    organism = population.Organism()
+
+    with organism.leased("first"):
+        assert not lease.acquire(organism.id, "second")
+        with pytest.raises(lease.BusyError):
+            with population.Organism(_id=organism.id).leased("second"):
+                pass
+        organism.evaluate_fitness(("GAZP", "AKRN"), pd.Timestamp("2020-04-12"))
+
+    assert lease.acquire(organism.id, "second")
+    lease.release(organism.id, "second")
+    with pytest.raises(lease.LeaseError):
+        with organism.leased("first"):
+            lease.release(organism.id, "first")
+            lease.acquire(organism.id, "second")
+            organism.evaluate_fitness(("GAZP", "AKRN"), pd.Timestamp("2020-04-13"))
+
+    assert population.Organism(_id=organism.id).llh == [5]
+
+    organism.die()
+
+
 # noinspection PyProtectedMember
 @pytest.fixture()
 def make_weak_organism():
@@ -116,7 +316,9 @@ def make_weak_organism():
 
 def test_die(organism):
     id_ = organism.id
-    organism.die()
+    organism.die("excluded")
+
+    assert next(population.outcome_docs(1))["outcome"] == "excluded"
 
     with pytest.raises(store.IdError) as error:
         population.Organism(_id=id_)
@@ -206,3 +408,19 @@ def test_print_stat(caplog):
 
     assert "LLH" in caplog.records[0].msg
     assert "Максимум оценок" in caplog.records[2].msg
+
+
+def test_snapshot():
+    pop = population.snapshot()
+    assert population.snapshot() is pop
+    assert population.count() == pop.count
+
+    organism = population.create_new_organism()
+    new_pop = population.snapshot()
+    assert new_pop is not pop
+    assert new_pop.count == pop.count + 1
+
+    store.get_collection().delete_one({store.ID: organism.id})
+    assert population.snapshot() is new_pop
+    store._increment_revision()
+    assert population.snapshot().count == pop.count
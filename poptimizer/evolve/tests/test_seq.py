@@ -45,3 +45,30 @@ def test_median_conf_bound():
     lower1, upper1 = seq.median_conf_bound(sample, 0.025)
     assert lower1 > lower0
     assert upper1 < upper0
+
+
+def test_median_conf_upper_best():
+    """Граница совпадает с обычной без новых значений и не ограничена, если определяется новыми значениями."""
+    sample = list(range(24))
+    _, upper = seq.median_conf_bound(sample, 0.025)
+
+    assert seq.median_conf_upper_best(sample, 0, 0.025) == pytest.approx(upper)
+    assert seq.median_conf_upper_best(sample[:22], 2, 0.025) == pytest.approx(upper)
+    assert seq.median_conf_upper_best(sample[:20], 4, 0.025) == np.inf
+    assert seq.median_conf_upper_best(sample[:4], 20, 0.025) == np.inf
+    assert seq.median_conf_upper_best(sample[:4], 1, 0.025) == np.inf
+
+
+def test_median_conf_bounds():
+    """Векторный расчет для дополненных NaN выборок совпадает с расчетом для отдельных выборок."""
+    rng = np.random.default_rng(0)
+    samples = rng.normal(size=(5, 40))
+    lengths = (0, 11, 12, 25, 40)
+    for row, length in enumerate(lengths):
+        samples[row, length:] = np.nan
+
+    lower, upper = seq.median_conf_bounds(samples, 0.025)
+
+    for row, length in enumerate(lengths):
+        bounds = seq.median_conf_bound(list(samples[row, :length]), 0.025)
+        assert (lower[row], upper[row]) == pytest.approx(bounds)
@@ -197,6 +197,30 @@ class TestDoc:
         assert doc_loaded.timer == 111
         assert doc_loaded.tickers is None
 
+    def test_lazy_model(self, mocker):
+        db_doc = store.get_collection().find_one()
+        doc = store.Doc(id_=db_doc[store.ID])
+        doc.model = b"model"
+        doc.save()
+
+        doc_loaded = store.Doc(id_=db_doc[store.ID])
+
+        assert "model" not in vars(doc_loaded)
+        spy = mocker.spy(store.get_collection(), "find_one")
+        assert doc_loaded.model == b"model"
+        assert doc_loaded.model == b"model"
+        assert spy.call_count == 1
+        assert len(doc_loaded._update) == 0
+
+    def test_has_value(self):
+        db_doc = store.get_collection().find_one()
+        doc_loaded = store.Doc(id_=db_doc[store.ID])
+
+        assert doc_loaded.has_value("model")
+        assert "model" not in vars(doc_loaded)
+        assert doc_loaded.has_value("timer")
+        assert not doc_loaded.has_value("tickers")
+
     def test_delete(self):
         assert store.get_collection().count_documents({}) == 1
 
@@ -0,0 +1,74 @@
+import copy
+
+import numpy as np
+import pytest
+
+from poptimizer.evolve import surrogate
+from poptimizer.evolve.genotype import Genotype
+
+MAX_LR = (0.001, 0.002, 0.009, 0.005)
+
+
+class FakeChild:
+    def __init__(self, genotype):
+        self.genotype = genotype
+
+
+class FakeParent:
+    def __init__(self):
+        self._genotype = Genotype()
+        self._max_lr = iter(MAX_LR)
+
+    def make_child(self, scale):
+        genotype = copy.deepcopy(self._genotype)
+        genotype["Scheduler"]["max_lr"] = next(self._max_lr)
+        return FakeChild(genotype)
+
+
+def make_docs(count):
+    docs = []
+    for _ in range(count):
+        genotype = Genotype()
+        max_lr = genotype["Scheduler"]["max_lr"]
+        docs.append({"genotype": genotype, "llh": [max_lr], "ir": [max_lr, 1], "timer": 100})
+
+    return docs
+
+
+def make_outcomes(count):
+    outcomes = []
+    for _ in range(count):
+        genotype = Genotype()
+        genotype["Scheduler"]["max_lr"] = 0.0085 + genotype["Scheduler"]["max_lr"] / 10
+        outcomes.append({"genes": genotype.flat(), "outcome": "TooLargeModelError", "timer": 0})
+
+    return outcomes
+
+
+@pytest.mark.parametrize("docs, best", [(40, 2), (4, 0)])
+def test_best_child(monkeypatch, docs, best):
+    docs = make_docs(docs)
+    monkeypatch.setattr(surrogate.population, "evaluated_docs", lambda: docs)
+    monkeypatch.setattr(surrogate.population, "outcome_docs", lambda limit: [])
+
+    child = surrogate.best_child(FakeParent(), 1, len(MAX_LR))
+
+    assert child.genotype["Scheduler"]["max_lr"] == MAX_LR[best]
+
+
+def test_best_child_avoids_dead(monkeypatch):
+    np.random.seed(0)
+    docs = make_docs(40)
+    outcomes = make_outcomes(40) + [{"genes": [0.5], "outcome": "died", "timer": 100}]
+    monkeypatch.setattr(surrogate.population, "evaluated_docs", lambda: docs)
+    monkeypatch.setattr(surrogate.population, "outcome_docs", lambda limit: outcomes)
+
+    child = surrogate.best_child(FakeParent(), 1, len(MAX_LR))
+
+    assert child.genotype["Scheduler"]["max_lr"] == MAX_LR[3]
+
+
+def test_single_candidate(monkeypatch):
+    monkeypatch.setattr(surrogate.population, "evaluated_docs", lambda: make_docs(40))
+
+    assert surrogate.best_child(FakeParent(), 1, 1).genotype["Scheduler"]["max_lr"] == MAX_LR[0]
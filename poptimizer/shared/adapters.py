@@ -90,13 +90,14 @@ class Mapper(Generic[EntityType]):
 
         return table
 
-    async def get_doc(self, id_: domain.ID) -> domain.StateDict:
+    async def get_doc(self, id_: domain.ID, projection: Optional[dict[str, bool]] = None) -> domain.StateDict:
         """Запрашивает документ по ID.
 
-        При отсутствии возвращает пустой словарь.
+        При наличии проекции загружаются только указанные в ней поля. При отсутствии документа возвращает
+        пустой словарь.
         """
         collection, name = self._get_collection_and_id(id_)
-        return await collection.find_one({"_id": name}, projection={"_id": False}) or {}
+        return await collection.find_one({"_id": name}, projection={"_id": False, **(projection or {})}) or {}
 
     async def commit(
         self,
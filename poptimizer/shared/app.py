@@ -80,13 +80,23 @@ class EventBus(Generic[EntityType]):
         self,
         event: domain.AbstractEvent,
     ) -> None:
-        """Асинхронная обработка события и следующих за ним."""
+        """Асинхронная обработка события и следующих за ним.
+
+        Обработка барьерных событий откладывается до завершения обработки всех остальных событий.
+        """
         pending: PendingTasks = self._create_tasks([event])
+        barriers: list[domain.AbstractEvent] = []
         while pending:
             done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
 
             for task in done:
-                pending |= self._create_tasks(task.result())
+                new_events = task.result()
+                barriers.extend(new for new in new_events if isinstance(new, domain.BarrierEvent))
+                pending |= self._create_tasks([new for new in new_events if not isinstance(new, domain.BarrierEvent)])
+
+            if not pending:
+                pending = self._create_tasks(barriers)
+                barriers = []
 
     def _create_tasks(self, events: list[domain.AbstractEvent]) -> set[FutureEvent]:
         """Создает задания для событий."""
@@ -9,6 +9,11 @@ class AbstractEvent(abc.ABC):
     """Абстрактный тип события."""
 
 
+@dataclasses.dataclass(frozen=True)
+class BarrierEvent(AbstractEvent):
+    """Событие, обработка которого начинается после завершения обработки всех остальных событий."""
+
+
 @dataclasses.dataclass(frozen=True)
 class ID:
     """Базовый идентификатор доменного объекта."""
@@ -1,7 +1,7 @@
 """Тесты для общих классов слоя приложения."""
 import pytest
 
-from poptimizer.shared import app
+from poptimizer.shared import app, domain
 
 
 @pytest.mark.asyncio
@@ -60,3 +60,21 @@ def test_handle_event(event_bus, mocker):
     event_bus.handle_event("event")
 
     assert fake_command.call_count == 6
+
+
+@pytest.mark.asyncio
+async def test_handle_barrier_event_last(event_bus):
+    """Барьерное событие обрабатывается после всех остальных, в том числе порожденных позже него."""
+    barrier = domain.BarrierEvent()
+    children = {"start": [barrier, "slow"], "slow": ["slower"], "slower": [], barrier: []}
+    handled = []
+
+    async def fake_command(event):
+        handled.append(event)
+        return children[event]
+
+    event_bus._handle_one_command = fake_command
+
+    await event_bus._handle_event("start")
+
+    assert handled == ["start", "slow", "slower", barrier]